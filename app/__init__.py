@@ -1,10 +1,49 @@
 """
 GoodFoods Reservation Assistant package.
 
-This exposes the main agent entrypoint so it can be imported as:
+This exposes the main agent entrypoints so they can be imported as:
     from app import handle_user_message
+
+Names are resolved lazily on first access, so `import app` itself loads
+nothing; call `app.startup()` in a worker's boot hook to pay for the DB,
+catalog and LLM client before the first request instead of during it.
 """
+import importlib
+import os
+import sys
+
+# The modules in this package import each other by bare name (they also run
+# as scripts from this directory, e.g. under streamlit), so make that work
+# when imported as a package too.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+_EXPORTS = {
+    "handle_user_message": "agent",
+    "handle_user_message_async": "agent",
+    "startup": "agent",
+    "search_restaurants": "reservations",
+    "find_nearby_restaurants": "reservations",
+    "create_reservation": "reservations",
+    "create_reservations_batch": "reservations",
+    "cancel_reservation": "reservations",
+    "check_availability": "reservations",
+    "list_reservations": "reservations",
+    "list_reservations_page": "reservations",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
 
-from .agent import handle_user_message
 
-__all__ = ["handle_user_message"]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -2,25 +2,59 @@
 import json
 from datetime import datetime,timedelta
 import re
-from typing import Dict, Any
-import traceback
-from dateutil import parser
-
-from llm_clients import call_llm_json
+import time
+import logging
+from typing import Dict, Any, Optional
+
+import metrics
+from intent_router import resolve_relative_datetime, route_followup, route_locally
+from db import run_in_db_thread
+from json_stream import IncrementalIntentParser
+from logs import event, get_logger, sampled, setup_logging
+from llm_clients import (
+    LLM_STREAMING,
+    cache_intent,
+    call_llm_json,
+    call_llm_json_async,
+    get_cached_intent,
+    stream_llm_json,
+    stream_llm_json_async,
+)
 from prompts import build_system_prompt
 from reservations import (
+    BATCH_MODES,
     search_restaurants,
+    find_nearby_restaurants,
+    find_restaurants_by_name,
     create_reservation,
+    create_reservations_batch,
     cancel_reservation,
     check_availability,
+    latest_reservation,
     list_reservations,
+    list_reservations_page,
 )
+from metrics import INTENTS, STAGE_SECONDS, lap
+from sessions import SESSIONS, Session
+from suggestions import suggest_alternatives
 from tools import TOOL_SPECS
 
+log = get_logger("agent")
+
+# Stage timers, bound once so the hot path skips the label lookup.
+_STAGE_ROUTE = STAGE_SECONDS.labels("route")
+_STAGE_PROMPT = STAGE_SECONDS.labels("prompt")
+_STAGE_CACHE = STAGE_SECONDS.labels("cache")
+_STAGE_LLM = STAGE_SECONDS.labels("llm")
+_STAGE_PARSE = STAGE_SECONDS.labels("parse")
+_STAGE_DB = STAGE_SECONDS.labels("db")
+_STAGE_FORMAT = STAGE_SECONDS.labels("format")
+_STAGE_TOTAL = STAGE_SECONDS.labels("total")
+
 
 def parse_llm_response(text: str) -> Dict[str, Any]:
     if not text or not isinstance(text, str):
-        print("Error: Empty or invalid response from LLM")
+        log.warning("empty or invalid LLM response")
         return {
             "intent": "clarify",
             "params": {
@@ -29,7 +63,7 @@ def parse_llm_response(text: str) -> Dict[str, Any]:
         }
 
     text = text.strip()
-    print(f"Parsing LLM response (first 200 chars): {text[:200]!r}")
+    event(log, "llm_response", logging.DEBUG, text=text[:200])
 
     try:
         result = json.loads(text)
@@ -43,13 +77,11 @@ def parse_llm_response(text: str) -> Dict[str, Any]:
         end = text.rfind("}") + 1
         if start >= 0 and end > start:
             json_str = text[start:end]
-            print(f"Trying to parse extracted JSON: {json_str}")
             result = json.loads(json_str)
             if isinstance(result, dict) and "intent" in result:
                 return result
-    except Exception as e:
-        print(f"Unexpected error parsing LLM response: {e}")
-        traceback.print_exc()
+    except Exception:
+        log.exception("could not parse LLM response")
 
     return {
         "intent": "clarify",
@@ -67,42 +99,12 @@ def resolve_reservation_datetime(user_text: str, dt_text: str | None) -> datetim
     text = user_text.lower()
     now = datetime.now()
 
-    if "tomorrow" in text or "today" in text or "tonight" in text:
-        base = now
-        if "tomorrow" in text:
-            base = now + timedelta(days=1)
-
-        hour = 19
-        minute = 0
-
-        m = re.search(r"(\d{1,2})\s*[:\.]\s*(\d{2})\s*(am|pm)?", text)
-        if m:
-            hour = int(m.group(1))
-            minute = int(m.group(2))
-            ampm = m.group(3)
-            if ampm == "pm" and hour < 12:
-                hour += 12
-            elif ampm == "am" and hour == 12:
-                hour = 0
-        else:
-            m = re.search(r"\b(\d{1,2})\s*(am|pm)\b", text)
-            if m:
-                hour = int(m.group(1))
-                ampm = m.group(2)
-                if ampm == "pm" and hour < 12:
-                    hour += 12
-                elif ampm == "am" and hour == 12:
-                    hour = 0
-            else:
-                m = re.search(r"\bat\s+(\d{1,2})\b", text)
-                if m:
-                    h = int(m.group(1))
-                    if 0 < h < 24:
-                        hour = h
-
-        return base.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    relative = resolve_relative_datetime(text, now)
+    if relative is not None:
+        return relative
 
     if dt_text:
+        from dateutil import parser
         try:
             return parser.parse(dt_text, default=now)
         except Exception:
@@ -111,59 +113,378 @@ def resolve_reservation_datetime(user_text: str, dt_text: str | None) -> datetim
     return now.replace(hour=19, minute=0, second=0, microsecond=0)
 
 
-def handle_user_message(user_text: str) -> str:
-    try:
-        system_prompt = build_system_prompt()
-        raw = call_llm_json(system_prompt, user_text)
-        parsed = parse_llm_response(raw)
+def format_alternatives(restaurant_id: int, dt: datetime, seats: int, headline: str) -> str:
+    alt = suggest_alternatives(restaurant_id, dt, seats)
+    if not alt["times"] and not alt["restaurants"]:
+        return headline + " I couldn't find a nearby alternative either. Try another day?"
+
+    lines = [headline]
+    if alt["times"]:
+        lines.append("")
+        lines.append("**Open times at the same restaurant:**")
+        lines.extend(f"- {t.strftime('%A, %d %B at %I:%M %p')}" for t in alt["times"])
+    if alt["restaurants"]:
+        lines.append("")
+        lines.append("**Similar restaurants free at that time:**")
+        lines.extend(
+            f"- {a['restaurant'].id}: {a['restaurant'].name} — {a['restaurant'].cuisine} — "
+            f"{a['distance_km']} km away"
+            for a in alt["restaurants"]
+        )
+    return "\n".join(lines)
 
-        intent = parsed.get("intent")
-        params = parsed.get("params", {}) or {}
 
-        print(f"LLM chose intent/tool: {intent}, params: {params}")
+def listing_filters(params: Dict[str, Any]) -> Dict[str, Any]:
+    """list_reservations_page keyword arguments from list_reservations tool params."""
+    filters = {
+        k: params[k]
+        for k in ("restaurant_id", "status", "name", "phone", "before_id", "limit")
+        if params.get(k) not in (None, "")
+    }
+    for key in ("date_from", "date_to"):
+        if params.get(key):
+            try:
+                filters[key] = datetime.fromisoformat(str(params[key]))
+            except ValueError:
+                pass
+    return filters
+
+
+def context_summary(session: Optional[Session]) -> str:
+    """
+    The conversation state in one line, sent to the LLM ahead of the user's
+    message instead of the whole transcript.
+    """
+    if session is None or not session.has_context():
+        return ""
+    from reservations import RESTAURANTS
+    parts = []
+    if session.results:
+        shown = [rid for rid in session.results[:5] if rid in RESTAURANTS]
+        parts.append("results " + ", ".join(
+            f"{i}) #{rid} {RESTAURANTS[rid].name}" for i, rid in enumerate(shown, 1)))
+    if session.restaurant_id is not None:
+        parts.append(f"restaurant #{session.restaurant_id}")
+    booking = {k: v for k, v in session.booking.items() if k in ("seats", "datetime", "cuisine")}
+    if booking:
+        parts.append("booking " + " ".join(f"{k}={v}" for k, v in booking.items()))
+    if session.reservation_id is not None:
+        parts.append(f"reservation #{session.reservation_id}")
+    return "Context: " + "; ".join(parts)
+
+
+def _remember_booking(session: Session, rid: int, dt: datetime, seats: int, params: Dict[str, Any]):
+    session.restaurant_id = rid
+    session.booking = {"seats": seats, "datetime": dt.isoformat()}
+    session.booking.update({k: params[k] for k in ("name", "phone", "email") if params.get(k)})
+
+
+# Read-only tools that can start as soon as the streamed intent name is
+# known, before its params have finished arriving.
+SPECULATIVE_READS = {
+    "list_reservations": list_reservations_page,
+}
+
+
+class _IntentStream:
+    """
+    Incremental parse of a streamed completion, shared by stream_intent and
+    stream_intent_async, which only differ in how they read the stream.
+    Parsing is interleaved with waiting for tokens; the two are timed apart.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.parse_seconds = 0.0
+        self.parser = IncrementalIntentParser()
+
+    def feed(self, delta: str) -> Optional[Dict[str, Any]]:
+        """The intent once it and its params are complete, else None."""
+        t0 = time.perf_counter()
+        parsed = self.parser.feed(delta)
+        self.parse_seconds += time.perf_counter() - t0
+        return parsed
+
+    def closed(self):
+        if metrics.ENABLED:
+            _STAGE_LLM.observe(time.perf_counter() - self.started - self.parse_seconds)
+            _STAGE_PARSE.observe(self.parse_seconds)
+
+    def result(self) -> Dict[str, Any]:
+        # The stream ended without a complete intent: parse what arrived.
+        t = time.perf_counter()
+        parsed = parse_llm_response(self.parser.buffer)
+        lap(_STAGE_PARSE, t)
+        return parsed
+
+
+def stream_intent(system_prompt: str, user_text: str) -> Dict[str, Any]:
+    """Stream the completion and stop reading once intent and params are complete."""
+    state = _IntentStream()
+    stream = stream_llm_json(system_prompt, user_text)
+    try:
+        for delta in stream:
+            parsed = state.feed(delta)
+            if parsed is not None:
+                return parsed
+    finally:
+        stream.close()
+        state.closed()
+    return state.result()
+
+
+async def stream_intent_async(
+    system_prompt: str,
+    user_text: str,
+    speculative: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    import asyncio
+    state = _IntentStream()
+    stream = stream_llm_json_async(system_prompt, user_text)
+    try:
+        async for delta in stream:
+            parsed = state.feed(delta)
+            intent = state.parser.intent
+            if speculative is not None and intent in SPECULATIVE_READS and intent not in speculative:
+                speculative[intent] = asyncio.ensure_future(run_in_db_thread(SPECULATIVE_READS[intent]))
+            if parsed is not None:
+                return parsed
+    finally:
+        await stream.aclose()
+        state.closed()
+    return state.result()
+
+
+def _parse_completion(text: str, started: float) -> Dict[str, Any]:
+    t = lap(_STAGE_LLM, started)
+    parsed = parse_llm_response(text)
+    lap(_STAGE_PARSE, t)
+    return parsed
+
+
+def _ask_llm(system_prompt: str, llm_text: str) -> Dict[str, Any]:
+    if LLM_STREAMING:
+        return stream_intent(system_prompt, llm_text)
+    started = time.perf_counter()
+    return _parse_completion(call_llm_json(system_prompt, llm_text), started)
+
+
+async def _ask_llm_async(system_prompt: str, llm_text: str, speculative: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if LLM_STREAMING:
+        return await stream_intent_async(system_prompt, llm_text, speculative)
+    started = time.perf_counter()
+    return _parse_completion(await call_llm_json_async(system_prompt, llm_text), started)
+
+
+def _route(user_text: str, session: Optional[Session]):
+    """(parsed or None, source) from the session's state or the local router."""
+    if session is not None and session.has_context():
+        parsed = route_followup(user_text, session)
+        if parsed is not None:
+            return parsed, "session"
+    return route_locally(user_text), "router"
+
+
+def _resolve_steps(user_text: str, session: Optional[Session], weight: float):
+    """
+    Every step of resolving an intent except the model call, as a generator
+    shared by resolve_intent and resolve_intent_async: when the model must
+    be asked it yields (system_prompt, llm_text) and is sent back the parsed
+    answer. Its return value is the intent.
+
+    Follow-ups and unambiguous messages are parsed locally; everything else
+    goes to the LLM, with the session's state summarised ahead of the
+    message. The route stage and intent count are only recorded with a
+    non-zero sample `weight` (see metrics.sample_message).
+    """
+    t = time.perf_counter()
+    parsed, source = _route(user_text, session)
+    t = lap(_STAGE_ROUTE, t) if weight else time.perf_counter()
+    if parsed is None:
+        system_prompt = build_system_prompt()
+        context = context_summary(session)
+        # An answer that depends on the context must not be cached by text alone.
+        llm_text = f"{context}\n{user_text}" if context else user_text
+        t = lap(_STAGE_PROMPT, t)
+        parsed = None if context else get_cached_intent(system_prompt, user_text)
+        lap(_STAGE_CACHE, t)
+        source = "cache"
+        if parsed is None:
+            source = "llm"
+            parsed = yield system_prompt, llm_text
+            if not context:
+                cache_intent(system_prompt, user_text, parsed)
+    if weight and metrics.ENABLED:
+        INTENTS.labels(str(parsed.get("intent")), source).inc(weight)
+    return parsed
+
+
+def resolve_intent(user_text: str, session: Optional[Session] = None, weight: float = 1.0) -> Dict[str, Any]:
+    """The intent for a message (see _resolve_steps), asking the model if needed."""
+    steps = _resolve_steps(user_text, session, weight)
+    try:
+        request = next(steps)
+        steps.send(_ask_llm(*request))
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("_resolve_steps asked the model twice")
+
+
+async def resolve_intent_async(
+    user_text: str,
+    speculative: Optional[Dict[str, Any]] = None,
+    session: Optional[Session] = None,
+    weight: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    Like resolve_intent, with the model called through the async client.
+    When streaming, read-only tools named in SPECULATIVE_READS are started
+    on the DB pool as soon as the intent is known and their pending results
+    are put in `speculative`.
+    """
+    steps = _resolve_steps(user_text, session, weight)
+    try:
+        request = next(steps)
+        steps.send(await _ask_llm_async(*request, speculative))
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("_resolve_steps asked the model twice")
+
+
+def execute_intent(
+    user_text: str,
+    parsed: Dict[str, Any],
+    prefetched: Optional[Dict[str, Any]] = None,
+    session: Optional[Session] = None,
+    weight: float = 1.0,
+) -> str:
+    """
+    Run the tool chosen for a message and format the reply (blocking DB work).
+    `prefetched` maps a read-only tool name to a result already fetched for it.
+    The session, if any, is updated with what the tool found and saved.
+
+    Timed as two stages: "db" (the data-layer queries, see metrics.timed_db)
+    and "format" (everything else: choosing arguments, building the reply).
+    With a zero sample `weight` neither stage nor the queries are timed.
+    """
+    if not weight or not metrics.ENABLED:
+        return _run_intent(user_text, parsed, prefetched, session)
+    started = time.perf_counter()
+    with metrics.timed_queries():
+        db_before = metrics.db_seconds()
+        try:
+            return _run_intent(user_text, parsed, prefetched, session)
+        finally:
+            db_seconds = metrics.db_seconds() - db_before
+            _STAGE_DB.observe(db_seconds)
+            _STAGE_FORMAT.observe(time.perf_counter() - started - db_seconds)
+
+
+def _run_intent(
+    user_text: str,
+    parsed: Dict[str, Any],
+    prefetched: Optional[Dict[str, Any]],
+    session: Optional[Session],
+) -> str:
+    reply = _execute_intent(user_text, parsed, prefetched, session)
+    if session is not None:
+        SESSIONS.save(session)
+    return reply
+
+
+def _execute_intent(
+    user_text: str,
+    parsed: Dict[str, Any],
+    prefetched: Optional[Dict[str, Any]] = None,
+    session: Optional[Session] = None,
+) -> str:
+    prefetched = prefetched or {}
+    intent = parsed.get("intent")
+    params = parsed.get("params", {}) or {}
+
+    if log.isEnabledFor(logging.DEBUG):
+        event(log, "tool_call", logging.DEBUG, intent=intent, params=params)
+
+    if intent not in TOOL_SPECS:
+        return (
+            "I couldn't match your request to a known action. "
+            "Please try again with a clearer request."
+        )
 
-        if intent not in TOOL_SPECS:
+    if intent == "search_restaurants":
+        cuisine = params.get("cuisine")
+        seats = params.get("seats")
+        features = params.get("features")
+        results = search_restaurants(
+            cuisine=cuisine, seats=seats, feature_filters=features
+        )
+        if not results:
             return (
-                "I couldn't match your request to a known action. "
-                "Please try again with a clearer request."
+                "No restaurants match your filters. "
+                "Try removing constraints or asking for general suggestions."
             )
-
-        if intent == "search_restaurants":
-            cuisine = params.get("cuisine")
-            seats = params.get("seats")
-            features = params.get("features")
-            results = search_restaurants(
-                cuisine=cuisine, seats=seats, feature_filters=features
+        if session is not None:
+            session.results = [r.id for r in results[:10]]
+            session.booking.update({k: params[k] for k in ("seats", "cuisine") if params.get(k)})
+        lines = [
+            f"{r.id}: {r.name} — {r.cuisine} — capacity {r.capacity} — "
+            f"features: {', '.join(r.features) or 'none'}"
+            for r in results[:10]
+        ]
+        return "Here are some options:\n" + "\n".join(lines)
+
+    if intent == "find_nearby_restaurants":
+        try:
+            lat = float(params["lat"])
+            lon = float(params["lon"])
+        except (KeyError, TypeError, ValueError):
+            return "Please share your location (latitude and longitude) so I can find places near you."
+        radius_km = params.get("radius_km")
+        results = find_nearby_restaurants(
+            lat,
+            lon,
+            radius_km=float(radius_km) if radius_km else None,
+            cuisine=params.get("cuisine"),
+            seats=params.get("seats"),
+            feature_filters=params.get("features"),
+            limit=int(params.get("limit") or 5),
+        )
+        if not results:
+            return (
+                "No restaurants near you match your filters. "
+                "Try a larger radius or fewer constraints."
             )
-            if not results:
-                return (
-                    "No restaurants match your filters. "
-                    "Try removing constraints or asking for general suggestions."
-                )
-            lines = [
-                f"{r.id}: {r.name} — {r.cuisine} — capacity {r.capacity} — "
-                f"features: {', '.join(r.features) or 'none'}"
-                for r in results[:10]
-            ]
-            return "Here are some options:\n" + "\n".join(lines)
-
-        # ==============================
-        # UPDATED create_reservation LOGIC
-        # ==============================
-        if intent == "create_reservation":
-            seats = int(params.get("seats", 2))
-            cuisine = params.get("cuisine")
+        if session is not None:
+            session.results = [r.id for r, _ in results]
+            session.booking.update({k: params[k] for k in ("seats", "cuisine") if params.get(k)})
+        lines = [
+            f"{r.id}: {r.name} — {r.cuisine} — {dist:.1f} km away — capacity {r.capacity} — "
+            f"features: {', '.join(r.features) or 'none'}"
+            for r, dist in results
+        ]
+        return "Closest options:\n" + "\n".join(lines)
+
+    # ==============================
+    # UPDATED create_reservation LOGIC
+    # ==============================
+    if intent == "create_reservation":
+        seats = int(params.get("seats", 2))
+        if seats < 1:
+            return "How many guests should I book for? The party needs at least one person."
+        cuisine = params.get("cuisine")
+        followup = parsed.get("followup", False)
+        replaces = parsed.get("replaces")
+        from reservations import RESTAURANTS
+
+        if followup:
+            # Resolved from the session: restaurant and datetime are exact.
+            rid = int(params["restaurant_id"])
+        else:
             # Always try catch restaurant name first even if LLM provides restaurant_id
-            from reservations import RESTAURANTS
-            lowered = user_text.lower()
+            name_match = find_restaurants_by_name(user_text, limit=1)
 
-            name_matches = [
-                r for r in RESTAURANTS.values()
-                if r.name.lower() in lowered
-            ]
-
-            if name_matches:
-                rid = name_matches[0].id
+            if name_match:
+                rid = name_match[0][0]
             else:
                 # fallback to provided restaurant_id
                 if params.get("restaurant_id") is not None:
@@ -176,105 +497,237 @@ def handle_user_message(user_text: str) -> str:
                     rid = candidates[0].id
 
 
-            dt_text = params.get("datetime")
+        dt_text = params.get("datetime")
+        if followup and dt_text:
+            dt = datetime.fromisoformat(dt_text)
+        else:
             dt = resolve_reservation_datetime(user_text, dt_text)
-            name = params.get("name", "Guest")
-            phone = params.get("phone")
-            email = params.get("email")
-
-            if not check_availability(rid, dt, seats):
-                return "That time is fully booked. Would you like alternate times or restaurants?"
-
-            res = create_reservation(rid, dt, seats, name, phone, email)
-            from reservations import RESTAURANTS
-            rest = RESTAURANTS[rid]
+        name = params.get("name", "Guest")
+        phone = params.get("phone")
+        email = params.get("email")
+
+        if session is not None:
+            # Remembered even if the slot is taken, so "make it 9pm instead" works.
+            _remember_booking(session, rid, dt, seats, params)
+            if not followup:
+                session.reservation_id = None
+        unchanged = f" Your reservation #{replaces} is unchanged." if replaces else ""
+
+        if not check_availability(rid, dt, seats):
+            return format_alternatives(rid, dt, seats, "That time is fully booked." + unchanged)
+
+        res = create_reservation(rid, dt, seats, name, phone, email)
+        if res is None:
+            return format_alternatives(rid, dt, seats, "That time was just booked by someone else." + unchanged)
+        if session is not None:
+            session.reservation_id = res.id
+        # A change is booked before the old table is released, so a failed
+        # change never leaves the guest without a reservation.
+        replaced = ""
+        if replaces and cancel_reservation(replaces):
+            replaced = f"**Replaces:** reservation #{replaces} (now cancelled)\n\n"
+        rest = RESTAURANTS[rid]
+
+        formatted_date = dt.strftime('%A, %d %B %Y at %I:%M %p')
+        return (
+            "🎉 **Reservation Confirmed!**\n\n"
+            f"**Restaurant ID (Code):** {rest.id}\n\n"
+            f"**Restaurant:** {rest.name} ({rest.cuisine})\n\n"
+            f"**Address:** {rest.address}\n\n"
+            f"**Date & Time:** {formatted_date}\n\n"
+            f"**Seats Reserved:** {seats}\n\n"
+            f"{replaced}"
+            "🍽 Thank you for choosing **GoodFoods**!"
+        )
 
-            formatted_date = dt.strftime('%A, %d %B %Y at %I:%M %p')
-            return (
-                "🎉 **Reservation Confirmed!**\n\n"
-                f"**Restaurant ID (Code):** {rest.id}\n\n"
-                f"**Restaurant:** {rest.name} ({rest.cuisine})\n\n"
-                f"**Address:** {rest.address}\n\n"
-                f"**Date & Time:** {formatted_date}\n\n"
-                f"**Seats Reserved:** {seats}\n\n"
-                "🍽 Thank you for choosing **GoodFoods**!"
-            )
+    if intent == "create_reservations_batch":
+        items = params.get("reservations") or []
+        bookings = []
+        for item in items:
+            if not isinstance(item, dict) or item.get("restaurant_id") is None:
+                return "Please tell me which restaurant each table should be booked at."
+            bookings.append({
+                "restaurant_id": int(item["restaurant_id"]),
+                # Each table carries its own time, so the message's relative
+                # phrases ("tomorrow") are not applied to all of them.
+                "datetime": resolve_reservation_datetime("", item.get("datetime")),
+                "seats": int(item.get("seats", 2)),
+                "name": item.get("name", "Guest"),
+                "phone": item.get("phone"),
+                "email": item.get("email"),
+            })
+        if not bookings:
+            return "How many tables would you like, and where and when?"
+
+        mode = params.get("mode") or "all_or_nothing"
+        if mode not in BATCH_MODES:
+            mode = "all_or_nothing"
+        results = create_reservations_batch(bookings, mode)
+        booked = [r for r in results if r["status"] == "confirmed"]
+        lines = []
+        for r, b in zip(results, bookings):
+            when = b["datetime"].strftime('%a %d %b %I:%M %p')
+            if r["reservation"] is not None:
+                lines.append(f"- ✅ Restaurant {b['restaurant_id']} — {when} — {b['seats']} seats "
+                             f"(Reservation ID #{r['reservation'].id})")
+            else:
+                reason = r["status"].replace("_", " ")
+                lines.append(f"- ❌ Restaurant {b['restaurant_id']} — {when} — {b['seats']} seats ({reason})")
+        if not booked:
+            headline = "❌ **None of the tables were booked.**"
+            if mode == "all_or_nothing" and any(r["status"] == "not_booked" for r in results):
+                headline += " Some of them didn't fit, so nothing was reserved."
+        else:
+            headline = f"🎉 **{len(booked)} of {len(results)} tables booked!**"
+        return headline + "\n\n" + "\n".join(lines)
+
+    if intent == "cancel_reservation":
+        rest_code = params.get("reservation_id")
+        if not rest_code and user_text:
+            match = re.search(r'(?:id[=: ]*|#)?(\d+)', user_text)
+            if match:
+                rest_code = match.group(1)
+
+        if not rest_code:
+            reservations = list_reservations(status="confirmed", limit=20)
+            if reservations:
+                reservations_list = "\n".join(
+                    [
+                        f"- Restaurant Code: {r['restaurant_id']} | Reservation ID: {r['id']} | "
+                        f"{r['datetime']} | {r['seats']} seats | {r['status']}"
+                        for r in reservations
+                    ]
+                )
+                return (
+                    "Please provide a Restaurant Code to cancel.\n\n"
+                    "Your current reservations:\n" + reservations_list
+                )
+            else:
+                return "You don't have any active reservations to cancel."
 
-        if intent == "cancel_reservation":
-            rest_code = params.get("reservation_id")
-            if not rest_code and user_text:
-                match = re.search(r'(?:id[=: ]*|#)?(\d+)', user_text)
-                if match:
-                    rest_code = match.group(1)
-
-            if not rest_code:
-                reservations = list_reservations()
-                if reservations:
-                    reservations_list = "\n".join(
-                        [
-                            f"- Restaurant Code: {r['restaurant_id']} | Reservation ID: {r['id']} | "
-                            f"{r['datetime']} | {r['seats']} seats | {r['status']}"
-                            for r in reservations
-                        ]
-                    )
-                    return (
-                        "Please provide a Restaurant Code to cancel.\n\n"
-                        "Your current reservations:\n" + reservations_list
-                    )
-                else:
-                    return "You don't have any active reservations to cancel."
+        try:
+            rest_code = int(rest_code)
+            target = latest_reservation(rest_code, "confirmed")
 
-            try:
-                rest_code = int(rest_code)
-                reservations = list_reservations()
-
-                target = None
-                for r in reversed(reservations):
-                    if r["restaurant_id"] == rest_code and r["status"] == "confirmed":
-                        target = r
-                        break
-
-                if not target:
-                    return (
-                        f"❌ No active reservations found for Restaurant Code {rest_code}. "
-                        "Please check and try again."
-                    )
-
-                success = cancel_reservation(target["id"])
-                if success:
-                    return (
-                        f"🗑 Successfully cancelled reservation at restaurant code {rest_code}.\n"
-                        f"(Reservation ID #{target['id']})"
-                    )
-                else:
-                    return (
-                        f"❌ Could not cancel reservation for restaurant code {rest_code}. "
-                        "Please try again."
-                    )
+            if not target:
+                return (
+                    f"❌ No active reservations found for Restaurant Code {rest_code}. "
+                    "Please check and try again."
+                )
 
-            except ValueError:
-                return "❌ Invalid code. Please say something like: cancel reservation 16"
-
-        if intent == "list_reservations":
-            rows = list_reservations()
-            if not rows:
-                return "No reservations yet."
-            lines = [
-                f"#{r['id']} | Rest {r['restaurant_id']} | {r['datetime']} | "
-                f"{r['seats']} seats | {r['name']} | {r['status']}"
-                for r in rows
-            ]
-            return "\n".join(lines)
-
-        if intent == "clarify":
-            q = params.get("question", "Could you clarify your request?")
-            return q
+            success = cancel_reservation(target["id"])
+            if success and session is not None and session.reservation_id == target["id"]:
+                session.reservation_id = None
+            if success:
+                return (
+                    f"🗑 Successfully cancelled reservation at restaurant code {rest_code}.\n"
+                    f"(Reservation ID #{target['id']})"
+                )
+            else:
+                return (
+                    f"❌ Could not cancel reservation for restaurant code {rest_code}. "
+                    "Please try again."
+                )
 
-        return (
-            "I understood your message but couldn't map it to a supported action. "
-            "Please try again, for example: 'Book a table for 4 at 7pm tomorrow'."
-        )
+        except ValueError:
+            return "❌ Invalid code. Please say something like: cancel reservation 16"
 
+    if intent == "list_reservations":
+        filters = listing_filters(params)
+        # The speculative read was started before params arrived, so it is
+        # only the right answer for an unfiltered first page.
+        if not filters and "list_reservations" in prefetched:
+            page = prefetched["list_reservations"]
+        else:
+            page = list_reservations_page(**filters)
+        rows = page["reservations"]
+        if not rows:
+            return "No reservations match." if filters else "No reservations yet."
+        lines = [
+            f"#{r['id']} | Rest {r['restaurant_id']} | {r['datetime']} | "
+            f"{r['seats']} seats | {r['name']} | {r['status']}"
+            for r in rows
+        ]
+        if page["next_cursor"] is not None:
+            lines.append(f"… more: ask for reservations before #{page['next_cursor']}")
+        return "\n".join(lines)
+
+    if intent == "clarify":
+        q = params.get("question", "Could you clarify your request?")
+        return q
+
+    return (
+        "I understood your message but couldn't map it to a supported action. "
+        "Please try again, for example: 'Book a table for 4 at 7pm tomorrow'."
+    )
+
+
+def startup():
+    """
+    Do all deferred initialization now (DB, catalog and indexes, LLM client,
+    system prompt) instead of on the first message. Safe to call repeatedly.
+    """
+    import reservations
+    from llm_clients import get_provider
+    setup_logging()
+    reservations.startup()
+    get_provider()
+    build_system_prompt()
+
+
+def _finish_message(started: float, parsed: Optional[Dict[str, Any]], weight: float):
+    if weight:
+        _STAGE_TOTAL.observe(time.perf_counter() - started)
+    if sampled():
+        event(log, "message", rate=1.0, intent=(parsed or {}).get("intent"),
+              ms=round((time.perf_counter() - started) * 1e3, 3))
+
+
+def handle_user_message(user_text: str, session_id: Optional[str] = None) -> str:
+    """
+    Answer one message. Messages sharing a `session_id` are one conversation:
+    follow-ups are resolved against what earlier turns found (see sessions.py).
+    """
+    started = time.perf_counter()
+    weight = metrics.sample_message()
+    parsed = None
+    try:
+        session = SESSIONS.get(session_id) if session_id else None
+        parsed = resolve_intent(user_text, session, weight)
+        return execute_intent(user_text, parsed, session=session, weight=weight)
+    except Exception as e:
+        log.exception("handle_user_message failed")
+        return f"Error handling message: {str(e)}"
+    finally:
+        _finish_message(started, parsed, weight)
+
+
+async def handle_user_message_async(user_text: str, session_id: Optional[str] = None) -> str:
+    """
+    Non-blocking handle_user_message: the LLM call goes through the async
+    Groq client and tool execution runs on the DB thread pool, so one event
+    loop can serve many conversations while each waits on the network.
+    """
+    started = time.perf_counter()
+    weight = metrics.sample_message()
+    speculative: Dict[str, Any] = {}
+    parsed = None
+    try:
+        session = None
+        if session_id:
+            session = await run_in_db_thread(SESSIONS.get, session_id) if SESSIONS.persistent else SESSIONS.get(session_id)
+        parsed = await resolve_intent_async(user_text, speculative, session, weight)
+        prefetched = {}
+        for tool, future in speculative.items():
+            if tool == parsed.get("intent"):
+                prefetched[tool] = await future
+            else:
+                future.cancel()
+        return await run_in_db_thread(execute_intent, user_text, parsed, prefetched, session, weight)
     except Exception as e:
-        traceback.print_exc()
+        for future in speculative.values():
+            future.cancel()
+        log.exception("handle_user_message_async failed")
         return f"Error handling message: {str(e)}"
+    finally:
+        _finish_message(started, parsed, weight)
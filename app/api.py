@@ -0,0 +1,296 @@
+# api.py
+"""
+HTTP API for the GoodFoods reservation agent.
+
+    POST /chat                 natural-language message -> agent reply;
+                               pass a session_id to keep conversation state
+    POST /tools/{tool_name}    call a tool from TOOL_SPECS directly (no LLM)
+    GET  /health               liveness + DB/schema check
+    GET  /metrics              per-process metrics, Prometheus text format
+    GET  /stats                the same counters as JSON, for humans
+
+Run with several workers; all booking state lives in SQLite (WAL), and each
+worker keeps its occupancy index in step through the occupancy_log table:
+
+    uvicorn api:app --app-dir app --host 0.0.0.0 --port 8000 --workers 4
+
+Conversation sessions are shared state too: a follow-up ("make it 4
+people") can land on a different worker than the message before it. So
+unless GOODFOODS_SESSIONS says otherwise, the API keeps sessions in SQLite
+rather than the in-memory default the agent uses on its own.
+GOODFOODS_SESSIONS=memory is only safe with a single worker.
+"""
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Body, FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+import db
+import reservations
+from agent import handle_user_message_async, startup
+from intent_router import STATS as ROUTER_STATS
+from llm_clients import INTENT_CACHE, TOKEN_USAGE, get_provider
+from metrics import HTTP_REQUESTS, register_collector, render_prometheus, timed_queries
+from sessions import SESSIONS
+from reservations import (
+    DEFAULT_PAGE_SIZE,
+    cancel_reservation,
+    create_reservation,
+    create_reservations_batch,
+    find_nearby_restaurants,
+    list_reservations_page,
+    search_restaurants,
+)
+from suggestions import suggest_alternatives
+from tools import TOOL_SPECS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sessions every worker can see, unless explicitly configured (see above).
+    if "GOODFOODS_SESSIONS" not in os.environ:
+        SESSIONS.persistent = True
+    # Load the DB, catalog, indexes and LLM client before accepting traffic
+    # rather than on the first request each worker receives.
+    await db.run_in_db_thread(startup)
+    # Pick up restaurants.json edits without a restart (GOODFOODS_CATALOG_POLL=0 turns it off).
+    reservations.watch_catalog()
+    yield
+    reservations.stop_watching_catalog()
+
+
+app = FastAPI(title="GoodFoods Reservation API", lifespan=lifespan)
+
+_started_at = time.time()
+
+
+@register_collector
+def _app_stats():
+    # Stats kept by other modules, exported alongside the registry metrics.
+    router = ROUTER_STATS.snapshot()
+    tokens = TOKEN_USAGE.snapshot()
+    yield "# TYPE goodfoods_router_total counter"
+    yield f'goodfoods_router_total{{result="hit"}} {router["hits"]}'
+    yield f'goodfoods_router_total{{result="miss"}} {router["misses"]}'
+    yield "# TYPE goodfoods_intent_cache_total counter"
+    yield f'goodfoods_intent_cache_total{{result="hit"}} {INTENT_CACHE.hits}'
+    yield f'goodfoods_intent_cache_total{{result="miss"}} {INTENT_CACHE.misses}'
+    yield "# TYPE goodfoods_llm_tokens_total counter"
+    for kind in ("prompt_tokens", "completion_tokens", "cached_prompt_tokens"):
+        yield f'goodfoods_llm_tokens_total{{kind="{kind}"}} {tokens[kind]}'
+    yield "# TYPE goodfoods_catalog_version gauge"
+    yield f"goodfoods_catalog_version {reservations.CATALOG_VERSION}"
+    yield "# TYPE goodfoods_uptime_seconds gauge"
+    yield f"goodfoods_uptime_seconds {time.time() - _started_at:.1f}"
+
+
+class ChatRequest(BaseModel):
+    message: str
+    # Any client-chosen id (e.g. a UUID); messages that share it are one
+    # conversation, so follow-ups like "book the second one" work.
+    session_id: Optional[str] = None
+
+
+class ChatResponse(BaseModel):
+    reply: str
+    session_id: Optional[str] = None
+
+
+def _restaurant_json(r, distance_km=None) -> Dict[str, Any]:
+    out = r.model_dump()
+    if distance_km is not None:
+        out["distance_km"] = round(distance_km, 3)
+    return out
+
+
+def _parse_datetime(value: Any) -> datetime:
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="datetime must be ISO 8601, e.g. 2025-11-26T19:00:00")
+
+
+def _tool_search_restaurants(p: Dict[str, Any]):
+    results = search_restaurants(cuisine=p.get("cuisine"), seats=p.get("seats"), feature_filters=p.get("features"))
+    return {"restaurants": [_restaurant_json(r) for r in results]}
+
+
+def _tool_find_nearby_restaurants(p: Dict[str, Any]):
+    limit = int(p["limit"]) if p.get("limit") is not None else 5
+    if limit < 1:
+        raise HTTPException(status_code=422, detail="limit must be at least 1")
+    radius_km = float(p["radius_km"]) if p.get("radius_km") is not None else None
+    if radius_km is not None and radius_km <= 0:
+        raise HTTPException(status_code=422, detail="radius_km must be positive")
+    results = find_nearby_restaurants(
+        float(p["lat"]),
+        float(p["lon"]),
+        radius_km=radius_km,
+        cuisine=p.get("cuisine"),
+        seats=p.get("seats"),
+        feature_filters=p.get("features"),
+        limit=limit,
+    )
+    return {"restaurants": [_restaurant_json(r, d) for r, d in results]}
+
+
+def _tool_create_reservation(p: Dict[str, Any]):
+    rid = p.get("restaurant_id")
+    if rid is None:
+        raise HTTPException(status_code=422, detail="restaurant_id is required for direct bookings")
+    rid = int(rid)
+    if rid not in reservations.snapshot().restaurants:
+        raise HTTPException(status_code=404, detail=f"Unknown restaurant_id {rid}")
+    seats = int(p["seats"])
+    if seats < 1:
+        raise HTTPException(status_code=422, detail="seats must be at least 1")
+    dt = _parse_datetime(p["datetime"])
+    res = create_reservation(rid, dt, seats, p.get("name", "Guest"), p.get("phone"), p.get("email"))
+    if res is None:
+        alt = suggest_alternatives(rid, dt, seats)
+        raise HTTPException(status_code=409, detail={
+            "error": "fully_booked",
+            "alternative_times": [t.isoformat() for t in alt["times"]],
+            "alternative_restaurants": [
+                _restaurant_json(a["restaurant"], a["distance_km"]) for a in alt["restaurants"]
+            ],
+        })
+    return {"reservation": res.model_dump(mode="json")}
+
+
+def _tool_create_reservations_batch(p: Dict[str, Any]):
+    items = p["reservations"]
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=422, detail="reservations must be a non-empty list")
+    for i, item in enumerate(items):
+        missing = [k for k in ("restaurant_id", "seats", "datetime") if not isinstance(item, dict) or item.get(k) is None]
+        if missing:
+            raise HTTPException(status_code=422, detail=f"reservations[{i}] is missing: {', '.join(missing)}")
+    mode = p.get("mode") or "all_or_nothing"
+    bookings = [
+        {
+            "restaurant_id": int(item["restaurant_id"]),
+            "datetime": _parse_datetime(item["datetime"]),
+            "seats": int(item["seats"]),
+            "name": item.get("name", "Guest"),
+            "phone": item.get("phone"),
+            "email": item.get("email"),
+        }
+        for item in items
+    ]
+    results = [
+        {
+            "index": r["index"],
+            "status": r["status"],
+            "reservation": r["reservation"].model_dump(mode="json") if r["reservation"] else None,
+        }
+        for r in create_reservations_batch(bookings, mode)
+    ]
+    booked = sum(r["status"] == "confirmed" for r in results)
+    if mode == "all_or_nothing" and booked < len(results):
+        raise HTTPException(status_code=409, detail={"error": "batch_not_booked", "results": results})
+    return {"mode": mode, "booked": booked, "results": results}
+
+
+def _tool_cancel_reservation(p: Dict[str, Any]):
+    reservation_id = int(p["reservation_id"])
+    if not cancel_reservation(reservation_id):
+        raise HTTPException(status_code=404, detail=f"Unknown reservation_id {reservation_id}")
+    return {"cancelled": reservation_id}
+
+
+def _tool_list_reservations(p: Dict[str, Any]):
+    filters = {k: p[k] for k in ("restaurant_id", "status", "name", "phone", "before_id") if p.get(k) is not None}
+    for key in ("date_from", "date_to"):
+        if p.get(key) is not None:
+            filters[key] = _parse_datetime(p[key])
+    return list_reservations_page(limit=int(p.get("limit") or DEFAULT_PAGE_SIZE), **filters)
+
+
+def _tool_clarify(p: Dict[str, Any]):
+    return {"question": p["question"]}
+
+
+TOOL_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "search_restaurants": _tool_search_restaurants,
+    "find_nearby_restaurants": _tool_find_nearby_restaurants,
+    "create_reservation": _tool_create_reservation,
+    "create_reservations_batch": _tool_create_reservations_batch,
+    "cancel_reservation": _tool_cancel_reservation,
+    "list_reservations": _tool_list_reservations,
+    "clarify": _tool_clarify,
+}
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest):
+    HTTP_REQUESTS.inc("chat")
+    reply = await handle_user_message_async(req.message, req.session_id)
+    return ChatResponse(reply=reply, session_id=req.session_id)
+
+
+def _run_tool(handler: Callable[[Dict[str, Any]], Dict[str, Any]], params: Dict[str, Any]):
+    # Over HTTP the query timings cost nothing worth sampling away.
+    with timed_queries():
+        return handler(params)
+
+
+@app.post("/tools/{tool_name}")
+async def call_tool(tool_name: str, params: Dict[str, Any] = Body(default_factory=dict)):
+    spec = TOOL_SPECS.get(tool_name)
+    handler = TOOL_HANDLERS.get(tool_name)
+    if spec is None or handler is None:
+        raise HTTPException(status_code=404, detail=f"Unknown tool {tool_name!r}")
+    schema = spec["inputSchema"]
+    missing = [k for k in schema.get("required", []) if params.get(k) is None]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Missing required params: {', '.join(missing)}")
+    unknown = set(params) - set(schema.get("properties", {}))
+    if unknown and not schema.get("additionalProperties", True):
+        raise HTTPException(status_code=422, detail=f"Unknown params: {', '.join(sorted(unknown))}")
+    HTTP_REQUESTS.inc(f"tool:{tool_name}")
+    try:
+        return await db.run_in_db_thread(_run_tool, handler, params)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.get("/health")
+async def health():
+    def check():
+        conn = db.get_conn()
+        conn.execute("SELECT 1").fetchone()
+        return db.schema_version(conn)
+
+    version = await db.run_in_db_thread(check)
+    snapshot = reservations.snapshot()
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "schema_version": version,
+        "restaurants": len(snapshot.restaurants),
+        "catalog_version": snapshot.version,
+        "uptime_seconds": round(time.time() - _started_at, 1),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "pid": os.getpid(),
+        "requests": {labels[0]: int(v) for labels, v in HTTP_REQUESTS.items()},
+        "intent_router": ROUTER_STATS.snapshot(),
+        "llm_cache": {"hits": INTENT_CACHE.hits, "misses": INTENT_CACHE.misses},
+        "llm_provider": get_provider().name,
+        "llm_tokens": TOKEN_USAGE.snapshot(),
+    }
@@ -0,0 +1,379 @@
+"""
+Columnar restaurant catalog backed by a memory-mappable binary snapshot.
+
+Instead of one pydantic Restaurant per row, the catalog keeps one NumPy
+array per field (id, lat, lon, capacity and the seating rules
+dining_minutes and slot_minutes), interned cuisine codes, a feature
+bitmask per restaurant, and names/addresses as UTF-8 blobs with offset
+arrays. Rows are ordered by id, so a lookup is one searchsorted.
+
+restaurants.json is converted once into a snapshot next to it (a small JSON
+header followed by 64-byte aligned raw arrays). Every process maps the same
+file read-only, so worker processes share one copy of the pages through the
+OS page cache, and a Restaurant model is only built when a caller asks for
+one. The snapshot records the JSON's size and mtime and is rebuilt when
+they change.
+
+    python app/catalog.py            # (re)build data/restaurants.catalog
+    python app/catalog.py other.json # (re)build other.catalog
+"""
+import json
+import mmap
+import os
+import threading
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from logs import get_logger
+from occupancy import DEFAULT_DINING_MINUTES, DEFAULT_SLOT_MINUTES, MAX_DINING_MINUTES, SLOT_CHOICES
+
+if TYPE_CHECKING:
+    from schema import Restaurant
+
+MAGIC = b'GFCATLG1'
+FORMAT_VERSION = 2
+ALIGN = 64
+
+# Numeric columns and their on-disk dtypes (little-endian).
+NUMERIC_COLUMNS = {
+    'id': '<i8',
+    'lat': '<f8',
+    'lon': '<f8',
+    'capacity': '<i4',
+    'cuisine': '<i2',
+    'features': '<u8',
+    'dining_minutes': '<i2',
+    'slot_minutes': '<i2',
+}
+TEXT_COLUMNS = ('name', 'address')
+# Restaurant models kept per catalog for rows that are asked for repeatedly
+# (search results, popular bookings); everything else is built on demand.
+MODEL_CACHE_SIZE = 4096
+
+log = get_logger('catalog')
+
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+
+def _text_column(values: List[str]):
+    encoded = [v.encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+class Catalog:
+    def __init__(self, columns: Dict[str, np.ndarray], cuisines: List[str], features: List[str],
+                 source: Optional[Dict[str, int]] = None, mapped: Optional[mmap.mmap] = None):
+        self.ids = columns['id']
+        self.lat = columns['lat']
+        self.lon = columns['lon']
+        self.capacity = columns['capacity']
+        self.cuisine = columns['cuisine']
+        self.features = columns['features']
+        self.dining_minutes = columns['dining_minutes']
+        self.slot_minutes = columns['slot_minutes']
+        self._text = {
+            name: (columns[f'{name}_offsets'], memoryview(columns[f'{name}_blob']))
+            for name in TEXT_COLUMNS
+        }
+        self._columns = columns
+        # Display names in code order; lookups are case-insensitive.
+        self.cuisine_names = cuisines
+        self.feature_names = features
+        self.cuisine_codes = {c.lower(): i for i, c in enumerate(cuisines)}
+        self.feature_bits = {f: 1 << i for i, f in enumerate(features)}
+        self.source = source or {}
+        self._mapped = mapped
+        self._names: Optional[List[str]] = None
+        self._feature_lists: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+        self.restaurant = lru_cache(maxsize=MODEL_CACHE_SIZE)(self._build_restaurant)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._columns.values())
+
+    # -- building -------------------------------------------------------
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'Catalog':
+        rows = sorted(records, key=lambda r: r['id'])
+        cuisines: Dict[str, int] = {}
+        cuisine_names: List[str] = []
+        features: Dict[str, int] = {}
+        cuisine_col = np.empty(len(rows), dtype='<i2')
+        feature_col = np.zeros(len(rows), dtype='<u8')
+        for i, r in enumerate(rows):
+            key = r['cuisine'].lower()
+            if key not in cuisines:
+                cuisines[key] = len(cuisine_names)
+                cuisine_names.append(r['cuisine'])
+            cuisine_col[i] = cuisines[key]
+            mask = 0
+            for f in r.get('features') or ():
+                if f not in features:
+                    if len(features) == 64:
+                        raise ValueError('catalog supports at most 64 distinct features')
+                    features[f] = len(features)
+                mask |= 1 << features[f]
+            feature_col[i] = mask
+
+        columns = {
+            'id': np.array([r['id'] for r in rows], dtype='<i8'),
+            'lat': np.array([r['lat'] for r in rows], dtype='<f8'),
+            'lon': np.array([r['lon'] for r in rows], dtype='<f8'),
+            'capacity': np.array([r['capacity'] for r in rows], dtype='<i4'),
+            'cuisine': cuisine_col,
+            'features': feature_col,
+            'dining_minutes': np.array([r.get('dining_minutes') or DEFAULT_DINING_MINUTES for r in rows], dtype='<i2'),
+            'slot_minutes': np.array([r.get('slot_minutes') or DEFAULT_SLOT_MINUTES for r in rows], dtype='<i2'),
+        }
+        if len(np.unique(columns['id'])) != len(rows):
+            raise ValueError('restaurant ids must be unique')
+        if not np.isin(columns['slot_minutes'], SLOT_CHOICES).all():
+            raise ValueError(f"slot_minutes must be one of {', '.join(map(str, SLOT_CHOICES))}")
+        if not ((columns['dining_minutes'] > 0) & (columns['dining_minutes'] <= MAX_DINING_MINUTES)).all():
+            raise ValueError(f'dining_minutes must be between 1 and {MAX_DINING_MINUTES}')
+        for name in TEXT_COLUMNS:
+            columns[f'{name}_offsets'], columns[f'{name}_blob'] = _text_column([r[name] for r in rows])
+        return cls(columns, cuisine_names, list(features))
+
+    @classmethod
+    def from_json(cls, path) -> 'Catalog':
+        path = Path(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            catalog = cls.from_records(json.load(f))
+        catalog.source = source_stamp(path)
+        return catalog
+
+    # -- snapshot -------------------------------------------------------
+
+    def save(self, path):
+        """Write the snapshot atomically (readers never see a partial file)."""
+        path = Path(path)
+        layout = {}
+        offset = 0
+        for name, arr in self._columns.items():
+            layout[name] = {'dtype': arr.dtype.str, 'offset': offset, 'length': len(arr)}
+            offset += arr.nbytes + _pad(arr.nbytes)
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'count': len(self),
+            'source': self.source,
+            'cuisines': self.cuisine_names,
+            'features': self.feature_names,
+            'columns': layout,
+        }).encode('utf-8')
+        prefix = len(MAGIC) + 4 + len(header)
+        data_start = prefix + _pad(prefix)
+
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            f.write(b'\0' * (data_start - prefix))
+            for arr in self._columns.values():
+                f.write(np.ascontiguousarray(arr).tobytes())
+                f.write(b'\0' * _pad(arr.nbytes))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> 'Catalog':
+        """Map a snapshot read-only; the arrays are views onto the shared pages."""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(MAGIC)] != MAGIC:
+            mapped.close()
+            raise ValueError(f'{path} is not a catalog snapshot')
+        header_len = int.from_bytes(mapped[len(MAGIC):len(MAGIC) + 4], 'little')
+        start = len(MAGIC) + 4
+        header = json.loads(mapped[start:start + header_len])
+        if header.get('version') != FORMAT_VERSION:
+            mapped.close()
+            raise ValueError(f'{path} has snapshot version {header.get("version")}, expected {FORMAT_VERSION}')
+        data_start = start + header_len + _pad(start + header_len)
+        columns = {
+            name: np.frombuffer(mapped, dtype=np.dtype(col['dtype']), count=col['length'],
+                                offset=data_start + col['offset'])
+            for name, col in header['columns'].items()
+        }
+        return cls(columns, header['cuisines'], header['features'], header.get('source'), mapped)
+
+    def same_columns(self, other: 'Catalog', columns: Optional[Iterable[str]] = None) -> bool:
+        """
+        True if `other` holds the same data in `columns` (default: every
+        column, plus the cuisine and feature names). The source stamp is
+        not compared.
+        """
+        if columns is None:
+            if (self.cuisine_names, self.feature_names) != (other.cuisine_names, other.feature_names):
+                return False
+            if self._columns.keys() != other._columns.keys():
+                return False
+            columns = self._columns
+        return all(np.array_equal(self._columns[c], other._columns[c]) for c in columns)
+
+    # -- lookups --------------------------------------------------------
+
+    def position(self, restaurant_id: int) -> Optional[int]:
+        pos = int(np.searchsorted(self.ids, restaurant_id))
+        if pos < len(self.ids) and self.ids[pos] == restaurant_id:
+            return pos
+        return None
+
+    def cuisine_code(self, name: str) -> int:
+        return self.cuisine_codes.get(name.lower(), -1)
+
+    def feature_mask(self, names: Iterable[str]) -> int:
+        """Bitmask for the given features, or -1 if any is unknown."""
+        mask = 0
+        for f in names:
+            bit = self.feature_bits.get(f)
+            if bit is None:
+                return -1
+            mask |= bit
+        return mask
+
+    def _string(self, column: str, pos: int) -> str:
+        offsets, blob = self._text[column]
+        return str(blob[offsets.item(pos):offsets.item(pos + 1)], 'utf-8')
+
+    def name(self, pos: int) -> str:
+        return self._string('name', pos)
+
+    def address(self, pos: int) -> str:
+        return self._string('address', pos)
+
+    def names(self) -> List[str]:
+        """All names in catalog order, decoded once on first use."""
+        if self._names is None:
+            with self._lock:
+                if self._names is None:
+                    offsets, blob = self._text['name']
+                    raw = bytes(blob)
+                    bounds = offsets.tolist()
+                    self._names = [raw[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(self))]
+        return self._names
+
+    def features_of(self, pos: int) -> List[str]:
+        mask = self.features.item(pos)
+        names = self._feature_lists.get(mask)
+        if names is None:
+            # Few distinct combinations exist, so decode each mask once.
+            names = self._feature_lists[mask] = [f for i, f in enumerate(self.feature_names) if mask >> i & 1]
+        return list(names)
+
+    def _build_restaurant(self, pos: int) -> 'Restaurant':
+        """
+        The pydantic model for one row; exposed as self.restaurant(pos)
+        behind an LRU cache, so treat returned models as read-only.
+        """
+        return _restaurant_model()(
+            id=self.ids.item(pos),
+            name=self.name(pos),
+            address=self.address(pos),
+            lat=self.lat.item(pos),
+            lon=self.lon.item(pos),
+            capacity=self.capacity.item(pos),
+            cuisine=self.cuisine_names[self.cuisine.item(pos)],
+            features=self.features_of(pos),
+            dining_minutes=self.dining_minutes.item(pos),
+            slot_minutes=self.slot_minutes.item(pos),
+        )
+
+
+@lru_cache(maxsize=None)
+def _restaurant_model():
+    # pydantic is only imported once a model is actually needed.
+    from schema import Restaurant
+    return Restaurant
+
+
+class RestaurantMap(Mapping):
+    """
+    Read-only {id: Restaurant} view over a Catalog. Models are built on
+    access, so membership, len() and capacity checks never create them.
+    """
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+
+    def __getitem__(self, restaurant_id) -> 'Restaurant':
+        pos = self.catalog.position(restaurant_id)
+        if pos is None:
+            raise KeyError(restaurant_id)
+        return self.catalog.restaurant(pos)
+
+    def __contains__(self, restaurant_id) -> bool:
+        try:
+            return self.catalog.position(restaurant_id) is not None
+        except TypeError:
+            return False
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.catalog.ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+
+def source_stamp(path: Path) -> Dict[str, int]:
+    st = path.stat()
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def snapshot_path(json_path) -> Path:
+    return Path(json_path).with_suffix('.catalog')
+
+
+def snapshot_is_current(json_path, snapshot: Optional[Path] = None) -> bool:
+    """True if the snapshot exists and was built from json_path as it is now."""
+    snapshot = Path(snapshot) if snapshot else snapshot_path(json_path)
+    try:
+        return Catalog.load(snapshot).source == source_stamp(Path(json_path))
+    except (OSError, ValueError):
+        return False
+
+
+def load_catalog(json_path, snapshot: Optional[Path] = None) -> Catalog:
+    """
+    Map the snapshot for json_path, (re)building it first if it is missing,
+    unreadable or older than the JSON. If the snapshot can't be written
+    (read-only deploy), the catalog is served from memory instead.
+    """
+    json_path = Path(json_path)
+    snapshot = Path(snapshot) if snapshot else snapshot_path(json_path)
+    stamp = source_stamp(json_path)
+    if snapshot.exists():
+        try:
+            catalog = Catalog.load(snapshot)
+            if catalog.source == stamp:
+                return catalog
+        except (OSError, ValueError):
+            pass
+    catalog = Catalog.from_json(json_path)
+    try:
+        catalog.save(snapshot)
+    except OSError:
+        log.warning('could not write catalog snapshot %s; using the in-memory catalog', snapshot)
+        return catalog
+    return Catalog.load(snapshot)
+
+
+if __name__ == '__main__':
+    import sys
+    from db import RESTAURANTS_JSON
+    json_path = Path(sys.argv[1]) if len(sys.argv) > 1 else RESTAURANTS_JSON
+    cat = load_catalog(json_path)
+    print(f'{snapshot_path(json_path)}: {len(cat)} restaurants, {cat.nbytes / 1024:.1f} KiB of columns')
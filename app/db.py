@@ -1,17 +1,133 @@
+import calendar
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 
 DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
-DB_PATH = DATA_DIR / 'reservations.db'
-RESTAURANTS_JSON = DATA_DIR / 'restaurants.json'
+DB_PATH = Path(os.getenv('GOODFOODS_DB_PATH', DATA_DIR / 'reservations.db'))
+RESTAURANTS_JSON = Path(os.getenv('GOODFOODS_RESTAURANTS_JSON', DATA_DIR / 'restaurants.json'))
 
-def init_db():
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
+# Per-connection tuning applied once when a pooled connection is opened.
+# WAL lets readers run alongside a writer, NORMAL sync is durable across
+# application crashes in WAL mode, and busy_timeout makes writers wait for
+# the lock instead of failing with "database is locked".
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA foreign_keys=ON',
+)
+# Size of sqlite3's per-connection prepared statement cache.
+STATEMENT_CACHE_SIZE = 256
+
+# Threads that run blocking DB work for async callers; each keeps its own
+# pooled connection, so this also bounds the number of open connections.
+DB_EXECUTOR_WORKERS = int(os.getenv('GOODFOODS_DB_WORKERS', '8'))
+
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _connect(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=5.0,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        # Autocommit: transactions are opened explicitly via transaction().
+        isolation_level=None,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_conn():
+    """
+    Return this thread's pooled connection to DB_PATH, opening it on first use.
+
+    Connections are kept per thread (sqlite3 connections must not be shared
+    across threads) and reused for the life of the thread, so the prepared
+    statement cache stays warm between calls. Callers must not close it.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = _connect(DB_PATH)
+        _local.conn = conn
+        _local.path = DB_PATH
+    return conn
+
+
+@contextmanager
+def transaction(immediate=True):
+    """
+    Run a block in one transaction on this thread's pooled connection.
+
+    BEGIN IMMEDIATE takes the database write lock up front, so a read made
+    inside the block cannot be invalidated by another writer before COMMIT.
+    """
+    conn = get_conn()
+    conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def _db_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix='goodfoods-db')
+    return _executor
+
+
+async def run_in_db_thread(fn, *args, **kwargs):
+    """Run a blocking DB function on the dedicated DB thread pool and await it."""
+    # Imported here so sync-only callers never pay for asyncio; with a loop
+    # running it is already loaded.
+    import asyncio
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor(), partial(fn, *args, **kwargs))
+
+
+def close_conn():
+    """Close this thread's pooled connection, if any."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def to_epoch(dt: datetime) -> int:
+    """
+    Encode a reservation datetime as sortable integer seconds.
+
+    Reservation times are naive wall-clock values, so they are encoded as if
+    they were UTC; this matches SQLite's strftime('%s', ...) on the ISO text.
+    """
+    return calendar.timegm(dt.timetuple())
+
+
+def from_epoch(ts: int) -> datetime:
+    return datetime(1970, 1, 1) + timedelta(seconds=ts)
+
+
+def _m1_create_reservations(conn):
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS reservations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             restaurant_id INTEGER,
@@ -23,8 +139,181 @@ def init_db():
             status TEXT
         )
     ''')
-    conn.commit()
-    conn.close()
+
+
+def _m2_epoch_start_ts(conn):
+    # Integer start time next to the ISO text (kept for display), plus a
+    # covering index for the capacity query so it never touches table rows.
+    conn.execute('ALTER TABLE reservations ADD COLUMN start_ts INTEGER')
+    conn.execute("UPDATE reservations SET start_ts = CAST(strftime('%s', datetime) AS INTEGER)")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reservations_capacity
+        ON reservations (restaurant_id, status, start_ts, seats)
+    ''')
+
+
+def _m3_occupancy_log(conn):
+    # Append-only log of seat changes, written by triggers so every writer
+    # (any worker process, or manual SQL) is captured. Each process tails it
+    # to keep its in-memory OccupancyIndex in step with the others.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS occupancy_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            restaurant_id INTEGER NOT NULL,
+            start_ts INTEGER NOT NULL,
+            seats INTEGER NOT NULL,
+            logged_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_booked
+        AFTER INSERT ON reservations WHEN NEW.status = 'confirmed'
+        BEGIN
+            INSERT INTO occupancy_log (restaurant_id, start_ts, seats)
+            VALUES (NEW.restaurant_id, NEW.start_ts, NEW.seats);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_released
+        AFTER UPDATE OF status ON reservations
+        WHEN OLD.status = 'confirmed' AND NEW.status != 'confirmed'
+        BEGIN
+            INSERT INTO occupancy_log (restaurant_id, start_ts, seats)
+            VALUES (OLD.restaurant_id, OLD.start_ts, -OLD.seats);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_reconfirmed
+        AFTER UPDATE OF status ON reservations
+        WHEN OLD.status != 'confirmed' AND NEW.status = 'confirmed'
+        BEGIN
+            INSERT INTO occupancy_log (restaurant_id, start_ts, seats)
+            VALUES (NEW.restaurant_id, NEW.start_ts, NEW.seats);
+        END
+    ''')
+
+
+def _m4_listing_indexes(conn):
+    # Indexes for the filtered, keyset-paginated listing (newest id first).
+    # Every secondary index implicitly ends in the rowid, so equality
+    # filters come back already in id order. (restaurant_id, status, id)
+    # also answers "latest confirmed booking at restaurant X" with one seek.
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reservations_restaurant_status
+        ON reservations (restaurant_id, status, id)
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_reservations_start_ts ON reservations (start_ts)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_reservations_phone ON reservations (phone)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_reservations_name ON reservations (name COLLATE NOCASE)')
+
+
+def _m5_sessions(conn):
+    # Conversation state for the optional SQLite-backed session store, so
+    # every worker process sees the same conversation (see sessions.py).
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)')
+
+
+def _m6_seating_end_ts(conn):
+    # When each booking's table frees up, so capacity is checked against
+    # the guests actually seated (see occupancy.py). Existing rows get the
+    # two hours the old capacity rule assumed, as do rows inserted without
+    # an end_ts. The covering index answers the overlap query, and the log
+    # carries end_ts so every process can apply the whole interval.
+    conn.execute('ALTER TABLE reservations ADD COLUMN end_ts INTEGER')
+    conn.execute('UPDATE reservations SET end_ts = start_ts + 7200')
+    conn.execute('DROP INDEX IF EXISTS idx_reservations_capacity')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reservations_seating
+        ON reservations (restaurant_id, status, start_ts, end_ts, seats)
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_reservations_end_ts
+        AFTER INSERT ON reservations WHEN NEW.end_ts IS NULL
+        BEGIN
+            UPDATE reservations SET end_ts = NEW.start_ts + 7200 WHERE id = NEW.id;
+        END
+    ''')
+    conn.execute('ALTER TABLE occupancy_log ADD COLUMN end_ts INTEGER')
+    conn.execute('UPDATE occupancy_log SET end_ts = start_ts + 7200')
+    for name in ('booked', 'released', 'reconfirmed'):
+        conn.execute(f'DROP TRIGGER IF EXISTS trg_reservations_{name}')
+    conn.execute('''
+        CREATE TRIGGER trg_reservations_booked
+        AFTER INSERT ON reservations WHEN NEW.status = 'confirmed'
+        BEGIN
+            INSERT INTO occupancy_log (restaurant_id, start_ts, end_ts, seats)
+            VALUES (NEW.restaurant_id, NEW.start_ts, COALESCE(NEW.end_ts, NEW.start_ts + 7200), NEW.seats);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER trg_reservations_released
+        AFTER UPDATE OF status ON reservations
+        WHEN OLD.status = 'confirmed' AND NEW.status != 'confirmed'
+        BEGIN
+            INSERT INTO occupancy_log (restaurant_id, start_ts, end_ts, seats)
+            VALUES (OLD.restaurant_id, OLD.start_ts, OLD.end_ts, -OLD.seats);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER trg_reservations_reconfirmed
+        AFTER UPDATE OF status ON reservations
+        WHEN OLD.status != 'confirmed' AND NEW.status = 'confirmed'
+        BEGIN
+            INSERT INTO occupancy_log (restaurant_id, start_ts, end_ts, seats)
+            VALUES (NEW.restaurant_id, NEW.start_ts, NEW.end_ts, NEW.seats);
+        END
+    ''')
+
+
+# Ordered schema migrations; the applied version lives in PRAGMA user_version.
+# Append new steps at the end and never edit or reorder released ones.
+MIGRATIONS = [
+    (1, _m1_create_reservations),
+    (2, _m2_epoch_start_ts),
+    (3, _m3_occupancy_log),
+    (4, _m4_listing_indexes),
+    (5, _m5_sessions),
+    (6, _m6_seating_end_ts),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn=None) -> int:
+    conn = conn or get_conn()
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate():
+    """Apply every pending migration, each in its own write transaction."""
+    conn = get_conn()
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return
+    for version, step in MIGRATIONS:
+        with transaction() as conn:
+            # Re-read under the write lock: another process may have migrated.
+            if schema_version(conn) >= version:
+                continue
+            step(conn)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+
+
+def prune_occupancy_log(max_age_seconds: int):
+    get_conn().execute(
+        "DELETE FROM occupancy_log WHERE logged_at < CAST(strftime('%s', 'now') AS INTEGER) - ?",
+        (max_age_seconds,),
+    )
+
+
+def init_db():
+    Path(DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+    migrate()
 
 def load_restaurants():
     with open(RESTAURANTS_JSON, 'r', encoding='utf-8') as f:
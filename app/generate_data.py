@@ -0,0 +1,348 @@
+"""
+Synthetic restaurants and reservations for load fixtures, at scale.
+
+Columns are sampled with NumPy a chunk at a time, chunks are generated in
+worker processes, and output is streamed as it comes back: restaurants to
+JSON (one object per line inside the array, loadable like
+data/restaurants.json) or JSON Lines, reservations to JSON Lines or straight
+into a reservations database with bulk inserts. The same --seed gives the
+same rows whatever --workers is.
+
+    python app/generate_data.py restaurants -n 1000000 -o /tmp/restaurants.json
+    python app/generate_data.py reservations -n 10000000 --days 90 --db /tmp/reservations.db
+    python app/generate_data.py reservations -n 100000 --start 2030-01-01 -o /tmp/reservations.jsonl
+
+Bookings follow a lunch and a bigger dinner peak, lean towards Friday and
+Saturday, and favour a skewed set of popular venues, so the busy slots bunch
+up the way real ones do. Each venue gets a dining duration (90, 120 or 150
+minutes on a 15-minute slot grid) and admits at most capacity / k seats per
+hour, where k is the number of hours one seating can overlap, so loaded
+fixtures never seat more guests at once than create_reservation allows.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from faker.providers.address.en_US import Provider as _Address
+from faker.providers.lorem.en_US import Provider as _Lorem
+from faker.providers.person.en_US import Provider as _Person
+
+import db
+from generate_restaurants import CAPACITIES, CUISINES, FEATURES
+from occupancy import DEFAULT_DINING_MINUTES, DEFAULT_SLOT_MINUTES
+from suggestions import FIRST_SEATING_HOUR, LAST_SEATING_HOUR
+
+CHUNK_ROWS = 100_000
+
+# Faker's word lists, sampled with NumPy instead of one Faker call per field.
+_FIRST_NAMES = np.array(list(_Person.first_names))
+_LAST_NAMES = np.array(list(_Person.last_names))
+_WORDS = np.char.title(np.array(list(_Lorem.word_list)))
+_STREET_SUFFIXES = np.array(list(_Address.street_suffixes))
+_CITY_SUFFIXES = np.array(list(_Address.city_suffixes))
+_STATES = np.array(list(_Address.states_abbr))
+
+# Bookable slots every 15 minutes through the seating hours, weighted by a
+# lunch peak around 12:45 and a dinner peak around 19:45 that takes about
+# two thirds of the covers, over a small all-day floor.
+SLOT_MINUTES = np.arange(FIRST_SEATING_HOUR * 60, (LAST_SEATING_HOUR + 1) * 60, 15)
+_slot_weights = (
+    0.35 * np.exp(-0.5 * ((SLOT_MINUTES - 12.75 * 60) / 45) ** 2)
+    + 0.65 * np.exp(-0.5 * ((SLOT_MINUTES - 19.75 * 60) / 70) ** 2)
+    + 0.02
+)
+SLOT_P = _slot_weights / _slot_weights.sum()
+# Monday .. Sunday
+WEEKDAY_WEIGHTS = np.array([0.9, 0.95, 1.0, 1.1, 1.5, 1.6, 1.2])
+PARTY_SIZES = np.arange(1, 9)
+PARTY_P = np.array([0.05, 0.40, 0.12, 0.23, 0.06, 0.08, 0.02, 0.04])
+# How long a table is held (quick lunch spots to tasting menus), and the slot grid.
+DINING_MINUTES = np.array([90, 120, 150])
+DINING_P = np.array([0.3, 0.5, 0.2])
+RESTAURANT_SLOT_MINUTES = 15
+CONFIRMED_SHARE = 0.9
+# Spread of venue popularity (lognormal sigma); bookings go to venues in
+# proportion to capacity x popularity.
+POPULARITY_SIGMA = 0.8
+
+
+def _chunks(total, size=CHUNK_ROWS):
+    return [(i, lo, min(size, total - lo)) for i, lo in enumerate(range(0, total, size))]
+
+
+def _pool(workers, initializer=None, initargs=()):
+    if workers <= 1:
+        return None
+    import multiprocessing
+    return multiprocessing.Pool(workers, initializer=initializer, initargs=initargs)
+
+
+def _imap(pool, fn, tasks):
+    return pool.imap(fn, tasks) if pool else map(fn, tasks)
+
+
+# -- restaurants -------------------------------------------------------------
+
+def _restaurant_chunk(task):
+    """JSON text for n restaurants starting at first_id, one object per line."""
+    seed, index, first_id, n = task
+    rng = np.random.default_rng([seed, 0, index])
+    last = _LAST_NAMES[rng.integers(len(_LAST_NAMES), size=n)]
+    word = _WORDS[rng.integers(len(_WORDS), size=n)]
+    # Same mix as gen_restaurant: 70% "GoodFoods <surname>", 30% "<Word> Bistro".
+    names = np.where(rng.random(n) > 0.3, np.char.add('GoodFoods ', last), np.char.add(word, ' Bistro'))
+    street = np.char.add(np.char.add(rng.integers(100, 100_000, size=n).astype(str), ' '),
+                         np.char.add(np.char.add(_LAST_NAMES[rng.integers(len(_LAST_NAMES), size=n)], ' '),
+                                     _STREET_SUFFIXES[rng.integers(len(_STREET_SUFFIXES), size=n)]))
+    city = np.char.add(_FIRST_NAMES[rng.integers(len(_FIRST_NAMES), size=n)],
+                       _CITY_SUFFIXES[rng.integers(len(_CITY_SUFFIXES), size=n)])
+    lat = np.round(12.9 + rng.random(n) * 0.3, 6)
+    lon = np.round(77.45 + rng.random(n) * 0.3, 6)
+    capacity = np.array(CAPACITIES)[rng.integers(len(CAPACITIES), size=n)]
+    cuisine = np.array(CUISINES)[rng.integers(len(CUISINES), size=n)]
+    # 0-2 distinct features each: the first k of a random permutation.
+    n_features = rng.integers(0, 3, size=n)
+    perm = np.argsort(rng.random((n, len(FEATURES))), axis=1)[:, :2].tolist()
+    states = _STATES[rng.integers(len(_STATES), size=n)]
+    postcodes = rng.integers(10_000, 100_000, size=n)
+    dining = rng.choice(DINING_MINUTES, size=n, p=DINING_P)
+    lines = []
+    for i, (name, st, ct, state, zipcode, la, lo, cap, cu, k, p, dm) in enumerate(zip(
+            names.tolist(), street.tolist(), city.tolist(), states.tolist(), postcodes.tolist(),
+            lat.tolist(), lon.tolist(), capacity.tolist(), cuisine.tolist(), n_features.tolist(), perm,
+            dining.tolist())):
+        lines.append(json.dumps({
+            'id': first_id + i,
+            'name': name,
+            'address': f'{st}, {ct}, {state} {zipcode}',
+            'lat': la,
+            'lon': lo,
+            'capacity': cap,
+            'cuisine': cu,
+            'features': [FEATURES[j] for j in p[:k]],
+            'dining_minutes': dm,
+            'slot_minutes': RESTAURANT_SLOT_MINUTES,
+        }, ensure_ascii=False))
+    return '\n'.join(lines)
+
+
+def generate_restaurants(count, out, seed=0, workers=1):
+    """Write count restaurants (ids 1..count) to out: .jsonl for JSON Lines, else a JSON array."""
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    json_lines = out.suffix == '.jsonl'
+    tasks = [(seed, i, lo + 1, n) for i, lo, n in _chunks(count)]
+    pool = _pool(workers)
+    tmp = out.with_name(out.name + '.tmp')
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            if not json_lines:
+                f.write('[\n')
+            for i, text in enumerate(_imap(pool, _restaurant_chunk, tasks)):
+                if i:
+                    f.write('\n' if json_lines else ',\n')
+                f.write(text if json_lines else text.replace('\n', ',\n'))
+            f.write('\n' if json_lines else '\n]\n')
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    tmp.replace(out)
+    return count
+
+
+# -- reservations ------------------------------------------------------------
+
+# Set in every process before reservation chunks are generated (see _init_reservations).
+_IDS = _CAPACITY = _DINING = _SLOT = _HOUR_SHARE = _POPULARITY_CDF = _DAY_WEIGHTS = None
+_START_TS = 0
+
+
+def _seating_end(start_ts, dining, slot):
+    """Vectorized occupancy.seating_interval: end of the slot the guests leave in (seconds)."""
+    end = start_ts + dining * 60
+    return end - end % -(slot * 60)
+
+
+def _init_reservations(ids, capacity, dining, slot, popularity_cdf, day_weights, start_ts):
+    global _IDS, _CAPACITY, _DINING, _SLOT, _HOUR_SHARE, _POPULARITY_CDF, _DAY_WEIGHTS, _START_TS
+    _IDS, _CAPACITY, _DINING, _SLOT = ids, capacity, dining, slot
+    _POPULARITY_CDF, _DAY_WEIGHTS, _START_TS = popularity_cdf, day_weights, start_ts
+    # Longest seating a bookable start can get at each venue, and from it the
+    # number of distinct hours whose bookings can be at the tables at once.
+    starts = np.unique(SLOT_MINUTES % 60) * 60
+    longest = np.max([_seating_end(s, dining, slot) - (s - s % (slot * 60)) for s in starts], axis=0)
+    _HOUR_SHARE = -(-longest // 3600) + 1
+
+
+def _admit(pos, hour_key, seats, confirmed):
+    """
+    Mask of rows to keep: cancelled rows always, confirmed rows while the
+    seats booked at that venue in that hour stay within capacity divided by
+    the hours one seating can overlap (so no moment is ever over capacity).
+    """
+    idx = np.flatnonzero(confirmed)
+    order = idx[np.argsort(hour_key[idx], kind='stable')]
+    keys, s = hour_key[order], seats[order]
+    booked = np.cumsum(s)
+    first = np.r_[True, keys[1:] != keys[:-1]]
+    # Running total within each (venue, hour) group.
+    booked -= np.maximum.accumulate(np.where(first, booked - s, 0))
+    keep = ~confirmed
+    keep[order[booked <= _CAPACITY[pos[order]] // _HOUR_SHARE[pos[order]]]] = True
+    return keep
+
+
+def _reservation_chunk(task):
+    """n bookings on days [first_day, first_day + days), ordered by time."""
+    seed, index, first_day, days, n, as_rows = task
+    rng = np.random.default_rng([seed, 1, index])
+    weights = _DAY_WEIGHTS[first_day:first_day + days]
+    day = rng.choice(days, size=n, p=weights / weights.sum())
+    slot = rng.choice(len(SLOT_MINUTES), size=n, p=SLOT_P)
+    pos = np.minimum(np.searchsorted(_POPULARITY_CDF, rng.random(n), side='right'), len(_IDS) - 1)
+    seats = rng.choice(PARTY_SIZES, size=n, p=PARTY_P)
+    confirmed = rng.random(n) < CONFIRMED_SHARE
+    hour_key = pos * (days * 24) + day * 24 + SLOT_MINUTES[slot] // 60
+    keep = _admit(pos, hour_key, seats, confirmed)
+
+    start_ts = _START_TS + (first_day + day) * 86400 + SLOT_MINUTES[slot] * 60
+    order = np.flatnonzero(keep)
+    order = order[np.argsort(start_ts[order], kind='stable')]
+    start_ts, pos, seats, confirmed = start_ts[order], pos[order], seats[order], confirmed[order]
+    end_ts = _seating_end(start_ts, _DINING[pos], _SLOT[pos])
+    m = len(order)
+    when = np.datetime_as_string(start_ts.astype('datetime64[s]'), unit='s')
+    names = np.char.add(np.char.add(_FIRST_NAMES[rng.integers(len(_FIRST_NAMES), size=m)], ' '),
+                        _LAST_NAMES[rng.integers(len(_LAST_NAMES), size=m)])
+    phones = rng.integers(2_000_000_000, 10_000_000_000, size=m).astype(str)
+    status = np.where(confirmed, 'confirmed', 'cancelled')
+    columns = (_IDS[pos].tolist(), when.tolist(), start_ts.tolist(), end_ts.tolist(), seats.tolist(),
+               names.tolist(), phones.tolist(), status.tolist())
+    if as_rows:
+        return n, [(rid, dt, ts, end, s, name, phone, None, st)
+                   for rid, dt, ts, end, s, name, phone, st in zip(*columns)]
+    return n, [
+        json.dumps({'restaurant_id': rid, 'datetime': dt, 'seats': s, 'name': name,
+                    'phone': phone, 'email': None, 'status': st}, ensure_ascii=False)
+        for rid, dt, ts, end, s, name, phone, st in zip(*columns)
+    ]
+
+
+def load_restaurant_columns(path):
+    """
+    (ids, capacities, dining minutes, slot minutes) from a restaurants file
+    in either format generate_restaurants writes (or data/restaurants.json).
+    """
+    path = Path(path)
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()] if path.suffix == '.jsonl' else json.load(f)
+    return (np.array([r['id'] for r in records], dtype=np.int64),
+            np.array([r['capacity'] for r in records], dtype=np.int64),
+            np.array([r.get('dining_minutes') or DEFAULT_DINING_MINUTES for r in records], dtype=np.int64),
+            np.array([r.get('slot_minutes') or DEFAULT_SLOT_MINUTES for r in records], dtype=np.int64))
+
+
+def generate_reservations(count, restaurants_path, start, days, seed=0, workers=1, out=None, db_path=None):
+    """
+    Generate about `count` bookings over `days` days from `start` (fewer if
+    venues fill up) and write them to `out` (JSON Lines) or insert them into
+    the database at `db_path`. Returns (requested, written).
+    """
+    ids, capacity, dining, slot = load_restaurant_columns(restaurants_path)
+    rng = np.random.default_rng([seed, 2])
+    popularity = capacity * rng.lognormal(0.0, POPULARITY_SIGMA, size=len(ids))
+    cdf = np.cumsum(popularity)
+    cdf /= cdf[-1]
+    day_weights = WEEKDAY_WEIGHTS[(start.weekday() + np.arange(days)) % 7]
+    start_ts = db.to_epoch(datetime.combine(start, datetime.min.time()))
+    _init_reservations(ids, capacity, dining, slot, cdf, day_weights, start_ts)
+
+    # Split the days so each chunk holds about CHUNK_ROWS bookings.
+    span = max(1, min(days, int(days * CHUNK_ROWS / max(count, 1))))
+    spans = [(d, min(span, days - d)) for d in range(0, days, span)]
+    per_span = rng.multinomial(count, np.array([day_weights[d:d + k].sum() for d, k in spans]) / day_weights.sum())
+    as_rows = db_path is not None
+    tasks = [(seed, i, d, k, int(n), as_rows) for i, ((d, k), n) in enumerate(zip(spans, per_span)) if n]
+
+    pool = _pool(workers, _init_reservations, (ids, capacity, dining, slot, cdf, day_weights, start_ts))
+    written = 0
+    try:
+        chunks = _imap(pool, _reservation_chunk, tasks)
+        if as_rows:
+            written = _insert_reservations(chunks, db_path)
+        else:
+            out = Path(out)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            with open(out, 'w', encoding='utf-8') as f:
+                for _, lines in chunks:
+                    for line in lines:
+                        written += 1
+                        f.write(f'{{"id": {written}, {line[1:]}\n')
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return count, written
+
+
+def _insert_reservations(chunks, db_path):
+    """
+    Bulk-insert into the reservations table, one transaction per chunk.
+    The occupancy_log rows the insert trigger writes are dropped again: a
+    fixture is loaded before the app starts, and startup reads the table.
+    """
+    db.DB_PATH = Path(db_path)
+    db.init_db()
+    sql = '''
+        INSERT INTO reservations (restaurant_id, datetime, start_ts, end_ts, seats, name, phone, email, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    written = 0
+    for _, rows in chunks:
+        with db.transaction() as c:
+            log_seq = c.execute('SELECT COALESCE(MAX(seq), 0) FROM occupancy_log').fetchone()[0]
+            c.executemany(sql, rows)
+            c.execute('DELETE FROM occupancy_log WHERE seq > ?', (log_seq,))
+        written += len(rows)
+    return written
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Generate synthetic GoodFoods fixtures.')
+    sub = ap.add_subparsers(dest='kind', required=True)
+    for name in ('restaurants', 'reservations'):
+        p = sub.add_parser(name)
+        p.add_argument('-n', '--count', type=int, required=True)
+        p.add_argument('--seed', type=int, default=0)
+        p.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    r = sub.choices['restaurants']
+    r.add_argument('-o', '--out', default=str(db.RESTAURANTS_JSON), help='.json (array) or .jsonl')
+    b = sub.choices['reservations']
+    b.add_argument('--restaurants', default=str(db.RESTAURANTS_JSON), help='restaurants file to book into')
+    b.add_argument('--start', type=date.fromisoformat, default=date.today() + timedelta(days=1),
+                   help='first booking day, YYYY-MM-DD (default tomorrow; fix it for identical output)')
+    b.add_argument('--days', type=int, default=90)
+    target = b.add_mutually_exclusive_group(required=True)
+    target.add_argument('-o', '--out', help='JSON Lines file')
+    target.add_argument('--db', help='SQLite database to insert into (created and migrated if needed)')
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if args.kind == 'restaurants':
+        generate_restaurants(args.count, args.out, args.seed, args.workers)
+        print(f'Wrote {args.count} restaurants to {args.out} in {time.perf_counter() - t0:.1f}s')
+    else:
+        requested, written = generate_reservations(args.count, args.restaurants, args.start, args.days,
+                                                   args.seed, args.workers, args.out, args.db)
+        print(f'Wrote {written} reservations to {args.out or args.db} in {time.perf_counter() - t0:.1f}s'
+              f' ({requested - written} turned away by capacity)')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
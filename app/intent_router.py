@@ -0,0 +1,349 @@
+"""
+Rule-based fast path for messages that don't need the LLM.
+
+route_locally() recognises the common, unambiguous phrasings ("list
+reservations", "cancel reservation 16", "book a table for 4 tomorrow at
+7pm", "find Italian for 6") and returns the same {"intent", "params"} dict
+the LLM would. Every word in the message must be accounted for by a pattern,
+a known filler word or a restaurant name mentioned in full; anything else
+returns None so the caller falls back to the LLM.
+
+route_followup() does the same for follow-ups in a conversation ("book the
+second one", "make it 8pm instead"), resolved against the session's state.
+"""
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set, Tuple
+
+from suggestions import FIRST_SEATING_HOUR, LAST_SEATING_HOUR
+
+if TYPE_CHECKING:
+    from sessions import Session
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+FEATURE_PHRASES = {
+    "outdoor seating": "outdoor", "outdoor": "outdoor", "outside": "outdoor",
+    "private room": "private_room", "private dining": "private_room",
+    "rooftop": "rooftop", "roof top": "rooftop",
+    "live music": "live_music",
+    "parking": "parking",
+    "pet friendly": "pet_friendly", "pet-friendly": "pet_friendly", "dog friendly": "pet_friendly",
+}
+FILLER_WORDS = {
+    "a", "an", "the", "for", "at", "me", "please", "pls", "i", "we", "us", "to", "would", "like",
+    "want", "need", "can", "could", "you", "some", "any", "with", "and", "in", "of", "that",
+    "have", "has", "my", "our", "all", "get", "is", "are", "there", "place", "places",
+    "restaurant", "restaurants", "table", "tables", "food", "cuisine", "people", "persons",
+    "guests", "pax", "seats", "seat", "party", "options", "spot", "spots", "somewhere", "good",
+}
+READ_VERBS = r"(?:show|list|view|see|display|get|what are)"
+ORDINALS = {
+    "first": 1, "1st": 1, "second": 2, "2nd": 2, "third": 3, "3rd": 3,
+    "fourth": 4, "4th": 4, "fifth": 5, "5th": 5, "last": -1,
+}
+# Words a follow-up may use on top of FILLER_WORDS.
+FOLLOWUP_WORDS = {
+    "one", "option", "it", "instead", "actually", "rather", "make", "change", "move", "switch",
+    "then", "ok", "okay", "yes", "sure", "so", "just", "time", "booking", "reservation", "same",
+    "but", "no", "sorry", "oh", "book", "reserve",
+}
+
+_LIST_RE = re.compile(
+    rf"^(?:(?:please\s+)?{READ_VERBS}\s+)?(?:me\s+)?(?:all\s+)?(?:my\s+|the\s+|our\s+)?"
+    r"(?:current\s+|recent\s+)?(?:reservations|bookings)(?:\s+please)?$"
+)
+_CANCEL_RE = re.compile(
+    r"^(?:please\s+)?cancel\s+(?:my\s+|the\s+)?(?:reservation|booking)?\s*"
+    r"(?:at\s+)?(?:restaurant\s+)?(?:code\s+|id\s*[=:]?\s*|#|number\s+|no\.?\s*)?(\d+)(?:\s+please)?$"
+)
+_BOOK_RE = re.compile(r"\b(?:book|reserve|reservation)\b")
+_SEARCH_RE = re.compile(r"\b(?:find|search|suggest|recommend|show|looking)\b")
+_SEATS_RE = re.compile(
+    r"\b(?:for|party of|table of)\s+(\d{1,2}|" + "|".join(NUMBER_WORDS) + r")\b"
+    r"|\b(\d{1,2}|" + "|".join(NUMBER_WORDS) + r")\s+(?:people|persons|guests|pax|seats)\b"
+)
+_TIME_HHMM_RE = re.compile(r"(\d{1,2})\s*[:\.]\s*(\d{2})\s*(am|pm)?")
+_TIME_AMPM_RE = re.compile(r"\b(\d{1,2})\s*(am|pm)\b")
+_TIME_AT_RE = re.compile(r"\bat\s+(\d{1,2})\b")
+_DAY_RE = re.compile(r"\b(today|tomorrow|tonight)\b")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_PICK_RE = re.compile(
+    r"^(?:(?:ok|okay|yes|great|perfect|sure)\s+)?"
+    r"(?:(?:please\s+)?(?:book|reserve|take|choose|pick|select|go with|i'll take|i'll go with|let's do|lets do)\s+)?"
+    r"(?:the\s+)?(?:(" + "|".join(ORDINALS) + r")(?:\s+(?:one|option|place|restaurant))?"
+    r"|(?:option|number|no\.?)\s*(\d{1,2}))\b"
+)
+_CHANGE_RE = re.compile(r"\b(?:make it|change|move it|switch it|instead|actually|rather)\b")
+# Time of a booking when the message gives none.
+DEFAULT_BOOKING_HOUR = 19
+
+
+def _read_hour(hour: int, near_hour: int) -> int:
+    # "7" is 7am or 7pm: take the reading inside seating hours, and failing
+    # that (or if both are) the one nearer near_hour.
+    if not 1 <= hour <= 12:
+        return hour
+    readings = (hour % 12, hour % 12 + 12)
+    return min(readings, key=lambda h: (not FIRST_SEATING_HOUR <= h <= LAST_SEATING_HOUR, abs(h - near_hour)))
+
+
+def extract_time(text: str, near_hour: int = DEFAULT_BOOKING_HOUR) -> Optional[Tuple[int, int, Tuple[int, int]]]:
+    """
+    Find a time of day in lowercased text.
+
+    Returns (hour, minute, span) where span is the matched character range,
+    or None. "7:30pm", "7.30", "7 pm" and a bare "at 7" are understood; a
+    time without am/pm is read as in seating hours, closest to near_hour
+    (the booking being changed), so "7:30" is 19:30.
+    """
+    m = _TIME_HHMM_RE.search(text)
+    if m:
+        hour, minute, ampm = int(m.group(1)), int(m.group(2)), m.group(3)
+        if ampm == "pm" and hour < 12:
+            hour += 12
+        elif ampm == "am" and hour == 12:
+            hour = 0
+        elif ampm is None:
+            hour = _read_hour(hour, near_hour)
+        return hour, minute, m.span()
+    m = _TIME_AMPM_RE.search(text)
+    if m:
+        hour, ampm = int(m.group(1)), m.group(2)
+        if ampm == "pm" and hour < 12:
+            hour += 12
+        elif ampm == "am" and hour == 12:
+            hour = 0
+        return hour, 0, m.span()
+    m = _TIME_AT_RE.search(text)
+    if m and 0 < int(m.group(1)) < 24:
+        return _read_hour(int(m.group(1)), near_hour), 0, m.span()
+    return None
+
+
+def resolve_relative_datetime(text: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Resolve "today"/"tonight"/"tomorrow" plus an optional time (default 7pm)."""
+    now = now or datetime.now()
+    if not _DAY_RE.search(text):
+        return None
+    base = now + timedelta(days=1) if "tomorrow" in text else now
+    hour, minute = DEFAULT_BOOKING_HOUR, 0
+    found = extract_time(text)
+    if found:
+        hour, minute, _ = found
+    return base.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+class RouterStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.by_intent: Dict[str, int] = {}
+
+    def record(self, intent: Optional[str]):
+        with self._lock:
+            if intent is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "by_intent": dict(self.by_intent),
+            }
+
+
+STATS = RouterStats()
+
+# (catalog snapshot version, vocab) for the catalog it was built from.
+_catalog_vocab: Optional[Tuple[int, Dict[str, Any]]] = None
+
+
+def _vocab() -> Dict[str, Any]:
+    global _catalog_vocab
+    import reservations
+    snapshot = reservations.snapshot()
+    if _catalog_vocab is None or _catalog_vocab[0] != snapshot.version:
+        _catalog_vocab = (snapshot.version, {
+            "cuisines": {c.lower(): c for c in snapshot.catalog.cuisine_names},
+        })
+    return _catalog_vocab[1]
+
+
+def _blank(text: str, span: Tuple[int, int]) -> str:
+    return text[:span[0]] + " " * (span[1] - span[0]) + text[span[1]:]
+
+
+def _leftover_words(text: str) -> Set[str]:
+    return {w for w in _WORD_RE.findall(text) if w not in FILLER_WORDS}
+
+
+def _parse_seats(text: str) -> Tuple[Optional[int], str]:
+    m = _SEATS_RE.search(text)
+    if not m:
+        return None, text
+    raw = m.group(1) or m.group(2)
+    seats = NUMBER_WORDS.get(raw) or int(raw)
+    return seats, _blank(text, m.span())
+
+
+def _parse_filters(text: str) -> Tuple[Dict[str, Any], str]:
+    params: Dict[str, Any] = {}
+    vocab = _vocab()
+    for key, cuisine in vocab["cuisines"].items():
+        m = re.search(rf"\b{re.escape(key)}\b", text)
+        if m:
+            if "cuisine" in params:
+                return {"ambiguous": True}, text
+            params["cuisine"] = cuisine
+            text = _blank(text, m.span())
+    features = []
+    for phrase, feature in FEATURE_PHRASES.items():
+        m = re.search(rf"\b{re.escape(phrase)}\b", text)
+        if m:
+            if feature not in features:
+                features.append(feature)
+            text = _blank(text, m.span())
+    if features:
+        params["features"] = features
+    return params, text
+
+
+def _route_booking(text: str, now: Optional[datetime]) -> Optional[Dict[str, Any]]:
+    dt = resolve_relative_datetime(text, now)
+    if dt is None:
+        return None
+    rest = _blank(text, _DAY_RE.search(text).span())
+    found = extract_time(rest)
+    if found:
+        rest = _blank(rest, found[2])
+    seats, rest = _parse_seats(rest)
+    if seats is None:
+        return None
+    rest = re.sub(r"\b(?:book|reserve|reservation|make)\b", " ", rest)
+
+    # A restaurant named in full is fine (the agent resolves it by name);
+    # any other unexplained word means the LLM should take this one.
+    from reservations import name_index
+    name = name_index().mentioned(rest)
+    if name and name in rest:
+        rest = rest.replace(name, " ")
+    filters, rest = _parse_filters(rest)
+    if filters.get("ambiguous") or filters.get("features") or _leftover_words(rest):
+        return None
+
+    params: Dict[str, Any] = {"seats": seats, "datetime": dt.isoformat()}
+    if "cuisine" in filters:
+        params["cuisine"] = filters["cuisine"]
+    return {"intent": "create_reservation", "params": params}
+
+
+def _route_search(text: str) -> Optional[Dict[str, Any]]:
+    rest = _SEARCH_RE.sub(" ", text)
+    seats, rest = _parse_seats(rest)
+    filters, rest = _parse_filters(rest)
+    if filters.get("ambiguous") or _leftover_words(rest):
+        return None
+    params: Dict[str, Any] = dict(filters)
+    if seats is not None:
+        params["seats"] = seats
+    if not params:
+        return None
+    return {"intent": "search_restaurants", "params": params}
+
+
+def _parse_changes(text: str, booking: Dict[str, Any], now: Optional[datetime]) -> Optional[Dict[str, Any]]:
+    """
+    Party size and date/time in a follow-up, applied on top of the booking
+    so far ("8pm" keeps the day, "tomorrow" keeps the time). None if any
+    word is left unexplained.
+    """
+    day = _DAY_RE.search(text)
+    previous = datetime.fromisoformat(booking["datetime"]) if booking.get("datetime") else None
+    found = extract_time(text, previous.hour if previous else DEFAULT_BOOKING_HOUR)
+    if found:
+        text = _blank(text, found[2])
+    if day:
+        text = _blank(text, day.span())
+    seats, text = _parse_seats(text)
+    if _leftover_words(text) - FOLLOWUP_WORDS:
+        return None
+    changes: Dict[str, Any] = {}
+    if seats is not None:
+        changes["seats"] = seats
+    if day or found:
+        now = now or datetime.now()
+        if day:
+            date = (now + timedelta(days=1)).date() if day.group(1) == "tomorrow" else now.date()
+        else:
+            date = previous.date() if previous else now.date()
+        if found:
+            hour, minute = found[0], found[1]
+        elif previous:
+            hour, minute = previous.hour, previous.minute
+        else:
+            hour, minute = DEFAULT_BOOKING_HOUR, 0
+        changes["datetime"] = datetime(date.year, date.month, date.day, hour, minute).isoformat()
+    return changes
+
+
+def _normalize(user_text: str) -> str:
+    return " ".join(user_text.lower().replace("?", " ").replace("!", " ").split()).rstrip(".")
+
+
+def route_followup(user_text: str, session: "Session", now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a follow-up against the session: picking one of the last
+    results ("book the second one for 4") or changing the booking just made
+    or attempted ("make it 8pm instead", "for 6 people instead"). Returns a
+    create_reservation intent marked "followup" (and "replaces" with the
+    reservation it supersedes), or None.
+    """
+    text = _normalize(user_text.replace(",", " "))
+    booking = {k: v for k, v in session.booking.items() if k != "cuisine"}
+    result = None
+    m = _PICK_RE.match(text) if session.results else None
+    if m:
+        n = ORDINALS[m.group(1)] if m.group(1) else int(m.group(2))
+        changes = _parse_changes(text[m.end():], booking, now)
+        if changes is not None and (n == -1 or 1 <= n <= len(session.results)):
+            pick = session.results[-1] if n == -1 else session.results[n - 1]
+            params = {**booking, **changes, "restaurant_id": pick}
+            result = {"intent": "create_reservation", "params": params, "followup": True}
+    elif session.restaurant_id is not None and _CHANGE_RE.search(text):
+        changes = _parse_changes(_CHANGE_RE.sub(" ", text), booking, now)
+        if changes:
+            params = {**booking, **changes, "restaurant_id": session.restaurant_id}
+            result = {"intent": "create_reservation", "params": params, "followup": True,
+                      "replaces": session.reservation_id}
+    if result is not None:
+        STATS.record(result["intent"])
+    return result
+
+
+def route_locally(user_text: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """Return an intent dict when the message is unambiguous, else None."""
+    text = _normalize(user_text)
+    result = None
+    if _LIST_RE.match(text):
+        result = {"intent": "list_reservations", "params": {}}
+    elif text.startswith(("cancel", "please cancel")):
+        m = _CANCEL_RE.match(text)
+        if m:
+            result = {"intent": "cancel_reservation", "params": {"reservation_id": int(m.group(1))}}
+    elif _BOOK_RE.search(text):
+        result = _route_booking(text, now)
+    elif _SEARCH_RE.search(text):
+        result = _route_search(text)
+    STATS.record(result["intent"] if result else None)
+    return result
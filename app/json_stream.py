@@ -0,0 +1,122 @@
+"""
+Incremental parser for streamed {"intent": ..., "params": {...}} responses.
+
+Feed it text chunks as they arrive from the LLM. It scans each character
+once, tracking string/escape state and nesting depth, and records the
+top-level "intent" and "params" values the moment each one is closed, so
+the caller can start work before the completion (or even the top-level
+object) has finished streaming.
+"""
+import json
+from typing import Any, Dict, Optional
+
+
+class IncrementalIntentParser:
+    def __init__(self):
+        self.buffer = ""
+        self.intent: Optional[str] = None
+        self.params: Optional[Dict[str, Any]] = None
+        self.closed = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        # Top-level key/value tracking (only meaningful at depth 1).
+        self._expect_key = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once intent and params are both complete."""
+        return self.intent is not None and (self.params is not None or self.closed)
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        if not self.ready:
+            return None
+        return {"intent": self.intent, "params": self.params or {}}
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """Consume a chunk; returns the intent dict as soon as it is ready."""
+        self.buffer += chunk
+        buf = self.buffer
+        i = self._pos
+        n = len(buf)
+        while i < n and not self.closed:
+            ch = buf[i]
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._expect_key = True
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._string_closed(i)
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._expect_key:
+                        self._key_start = i
+                    elif self._value_start is None:
+                        self._value_start = i
+            elif ch in "{[":
+                if self._depth == 1 and self._value_start is None and not self._expect_key:
+                    self._value_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._value_closed(i + 1)
+                elif self._depth == 0:
+                    if self._value_start is not None:
+                        self._value_closed(i)
+                    self.closed = True
+            elif self._depth == 1:
+                if ch == ":":
+                    self._expect_key = False
+                elif ch == ",":
+                    if self._value_start is not None:
+                        self._value_closed(i)
+                    self._expect_key = True
+                elif not ch.isspace() and self._value_start is None and not self._expect_key:
+                    self._value_start = i
+            i += 1
+        self._pos = i
+        return self.result()
+
+    def _string_closed(self, end: int):
+        if self._key_start is not None and self._expect_key:
+            self._key = json.loads(self.buffer[self._key_start:end + 1])
+            self._key_start = None
+        elif self._value_start is not None:
+            self._value_closed(end + 1)
+
+    def _value_closed(self, end: int):
+        raw = self.buffer[self._value_start:end].strip()
+        key = self._key
+        self._value_start = None
+        self._key = None
+        if not raw:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        if key == "intent" and isinstance(value, str):
+            self.intent = value
+        elif key == "params" and isinstance(value, dict):
+            self.params = value
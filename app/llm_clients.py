@@ -1,51 +1,321 @@
 import os
+import re
 import json
-import traceback
+import time
+import atexit
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
 from dotenv import load_dotenv
-from groq import Groq
+
+from llm_providers import LLMProvider, provider_from_env
+from logs import event, get_logger
+from metrics import LLM_ERRORS
 
 load_dotenv()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+log = get_logger("llm")
+
+# Stream completions so the agent can act before the last token arrives.
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") != "0"
+
+_provider: Optional[LLMProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> LLMProvider:
+    """The configured LLM backend, created on first use (see llm_providers)."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = provider_from_env()
+    return _provider
+
+
+def set_provider(provider: Optional[LLMProvider]):
+    """Swap the backend at runtime (benchmarks); None re-reads the environment."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough offline token count (words + punctuation) for comparing prompt sizes."""
+    return len(_TOKEN_RE.findall(text))
+
+
+class TokenUsage:
+    """Running totals of the token usage the provider reports on each completion."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
+
+    def record(self, usage):
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+            self.cached_prompt_tokens += cached
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self.requests or 1
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cached_prompt_tokens": self.cached_prompt_tokens,
+                "prompt_tokens_per_request": self.prompt_tokens / n,
+                "completion_tokens_per_request": self.completion_tokens / n,
+            }
+
+
+TOKEN_USAGE = TokenUsage()
 
-if not GROQ_API_KEY:
-    print("⚠️ GROQ_API_KEY is missing. Add it in .env (local) or Streamlit secrets (cloud).")
 
-client = Groq(api_key=GROQ_API_KEY)
+def _fallback_response() -> str:
+    # fallback response (so your app never hard-crashes)
+    return json.dumps({
+        "intent": "clarify",
+        "params": {
+            "question": "I couldn't reach the AI service. Please try again in a moment."
+        }
+    })
 
 
 def call_llm_json(system_prompt: str, user_text: str) -> str:
     """
-    Calls Groq API and returns ONLY JSON text (string).
+    Calls the configured LLM and returns ONLY JSON text (string).
     This matches your agent.py pipeline which expects a JSON string.
     """
-    print(f"\n=== USER MESSAGE: {user_text} ===")
+    try:
+        content, usage = get_provider().complete(system_prompt, user_text)
+        TOKEN_USAGE.record(usage)
+        event(log, "llm_completion", logging.DEBUG, user_text=user_text, response=content)
+        return content
+
+    except Exception:
+        LLM_ERRORS.inc()
+        log.exception("LLM call failed")
+        return _fallback_response()
+
 
+def stream_llm_json(system_prompt: str, user_text: str) -> Iterator[str]:
+    """
+    Stream the completion as text deltas. Stop iterating (or close the
+    generator) to abandon the rest of the response.
+    """
+    yielded = False
+    stream = None
     try:
-        resp = client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_text},
-            ],
-            temperature=0,
-            # This forces the output to be valid JSON
-            response_format={"type": "json_object"},
-        )
-
-        content = resp.choices[0].message.content.strip()
-        print(f"LLM Response: {content}")
+        stream = get_provider().stream(system_prompt, user_text)
+        for delta, usage in stream:
+            TOKEN_USAGE.record(usage)
+            if delta:
+                yielded = True
+                yield delta
+    except Exception:
+        LLM_ERRORS.inc()
+        log.exception("LLM streaming call failed")
+        if not yielded:
+            yield _fallback_response()
+    finally:
+        if stream is not None:
+            stream.close()
+
+
+async def call_llm_json_async(system_prompt: str, user_text: str) -> str:
+    """Async variant of call_llm_json."""
+    try:
+        content, usage = await get_provider().complete_async(system_prompt, user_text)
+        TOKEN_USAGE.record(usage)
+        event(log, "llm_completion", logging.DEBUG, user_text=user_text, response=content)
         return content
 
-    except Exception as e:
-        print("❌ Groq API call failed.")
-        traceback.print_exc()
+    except Exception:
+        LLM_ERRORS.inc()
+        log.exception("LLM call failed")
+        return _fallback_response()
+
+
+async def stream_llm_json_async(system_prompt: str, user_text: str) -> AsyncIterator[str]:
+    """Async variant of stream_llm_json."""
+    yielded = False
+    stream = None
+    try:
+        stream = get_provider().stream_async(system_prompt, user_text)
+        async for delta, usage in stream:
+            TOKEN_USAGE.record(usage)
+            if delta:
+                yielded = True
+                yield delta
+    except Exception:
+        LLM_ERRORS.inc()
+        log.exception("LLM streaming call failed")
+        if not yielded:
+            yield _fallback_response()
+    finally:
+        if stream is not None:
+            await stream.aclose()
+
+
+# Relative dates the agent re-resolves from the user's text on every request
+# (see resolve_reservation_datetime), so a cached answer stays correct as long
+# as the LLM's absolute datetime is dropped. Any other message may carry a
+# date the LLM resolved against today ("book 4 at 7pm at X"), so its key is
+# tied to the current date instead.
+RESOLVED_RELATIVE_DATES = ("today", "tonight", "tomorrow")
+# Relative dates only the LLM resolves; answers for these are never cached.
+_UNCACHEABLE_DATES = re.compile(
+    r"\b(?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:day)?\b"
+    r"|\b(?:next|this|coming|last|weekend|week|month|yesterday|day after|days?)\b"
+    r"|\bin\s+\d+\s+(?:days?|weeks?|hours?)\b"
+)
+_CACHE_PUNCT = re.compile(r"[^\w\s:#@.+-]")
+
+
+def normalize_for_cache(user_text: str) -> Optional[str]:
+    """
+    Canonical form of a message for cache lookups, or None if it must not be cached.
+
+    Case, punctuation and whitespace are folded, and today/tonight/tomorrow
+    become placeholders so those answers can be reused on any day.
+    """
+    text = _CACHE_PUNCT.sub(" ", user_text.lower())
+    text = " ".join(text.split()).strip(" .")
+    if not text or _UNCACHEABLE_DATES.search(text):
+        return None
+    for word in RESOLVED_RELATIVE_DATES:
+        text = re.sub(rf"\b{word}\b", f"<{word}>", text)
+    return text
+
+
+@lru_cache(maxsize=8)
+def _prompt_hash(system_prompt: str) -> str:
+    # The prompt is built once and reused, so this is hashed once per version.
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class IntentCache:
+    """
+    Bounded LRU cache of parsed LLM intents with per-entry TTL.
+
+    Keys combine a hash of the system prompt with the normalized user text,
+    so changing the prompt or tool list naturally misses old entries, and
+    with today's date unless the text has a re-resolved relative date. When
+    `path` is set the cache is loaded from that JSON file on startup and
+    written back on save() and at interpreter exit.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 6 * 3600, path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path:
+            self.load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def key(system_prompt: str, user_text: str) -> Optional[str]:
+        normalized = normalize_for_cache(user_text)
+        if normalized is None:
+            return None
+        if not any(f"<{w}>" in normalized for w in RESOLVED_RELATIVE_DATES):
+            normalized = f"{time.strftime('%Y-%m-%d')}:{normalized}"
+        return f"{_prompt_hash(system_prompt)}:{normalized}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            log.warning("ignoring unreadable LLM cache file %s", self.path)
+            return
+        now = time.time()
+        with self._lock:
+            for key, expires_at, value in data.get("entries", []):
+                if expires_at > now:
+                    self._entries[key] = (expires_at, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            entries = [[k, exp, v] for k, (exp, v) in self._entries.items()]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"entries": entries}), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+INTENT_CACHE = IntentCache(
+    max_entries=int(os.getenv("LLM_CACHE_SIZE", "2048")),
+    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", str(6 * 3600))),
+    path=os.getenv("LLM_CACHE_PATH") or None,
+)
+
+
+def get_cached_intent(system_prompt: str, user_text: str) -> Optional[Dict[str, Any]]:
+    key = IntentCache.key(system_prompt, user_text)
+    return INTENT_CACHE.get(key) if key else None
+
+
+def cache_intent(system_prompt: str, user_text: str, parsed: Dict[str, Any]):
+    """Remember a parsed intent; clarifications and failures are not cached."""
+    if parsed.get("intent") in (None, "clarify"):
+        return
+    key = IntentCache.key(system_prompt, user_text)
+    if key is None:
+        return
+    if any(f"<{w}>" in key for w in RESOLVED_RELATIVE_DATES):
+        parsed = copy.deepcopy(parsed)
+        (parsed.get("params") or {}).pop("datetime", None)
+    INTENT_CACHE.put(key, parsed)
 
-        # fallback response (so your app never hard-crashes)
-        return json.dumps({
-            "intent": "clarify",
-            "params": {
-                "question": "I couldn't reach the AI service. Please try again in a moment."
-            }
-        })
@@ -0,0 +1,397 @@
+"""
+LLM backends behind one small interface, selected with LLM_PROVIDER:
+
+    groq     Groq cloud API (default; GROQ_API_KEY, GROQ_MODEL)
+    openai   any OpenAI-compatible endpoint, e.g. vLLM, llama.cpp or Ollama
+             (LLM_BASE_URL, LLM_API_KEY, LLM_MODEL)
+    stub     deterministic in-process replay of recorded intents, for offline
+             benchmarks (LLM_STUB_PATH, LLM_STUB_LATENCY, LLM_STUB_TOKEN_DELAY)
+
+Set LLM_RECORD_PATH to append every completion from any provider to a JSONL
+file the stub can replay later.
+
+SDKs (groq, httpx) and asyncio are imported on first use, not at import.
+
+Each provider returns the raw completion text; the usage it reports (an
+object with prompt_tokens/completion_tokens attributes, or None) comes back
+alongside so llm_clients can keep its token counters. Errors propagate:
+llm_clients decides how to fall back.
+"""
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from logs import get_logger
+
+log = get_logger("llm")
+
+# (text, usage) for a whole completion; streams yield (delta, usage) where
+# usage is only set on the final chunk, if the backend reports it at all.
+Completion = Tuple[str, Any]
+
+
+class LLMProvider:
+    name = "base"
+
+    def complete(self, system_prompt: str, user_text: str) -> Completion:
+        raise NotImplementedError
+
+    async def complete_async(self, system_prompt: str, user_text: str) -> Completion:
+        raise NotImplementedError
+
+    def stream(self, system_prompt: str, user_text: str) -> Iterator[Completion]:
+        raise NotImplementedError
+
+    def stream_async(self, system_prompt: str, user_text: str) -> AsyncIterator[Completion]:
+        raise NotImplementedError
+
+
+def _messages(system_prompt: str, user_text: str):
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_text},
+    ]
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, api_key: Optional[str], model: str, base_url: Optional[str] = None):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self._client = None
+        self._lock = threading.Lock()
+        # The async client's connection pool belongs to the event loop it was
+        # first used on, so keep one client per running loop.
+        self._async_clients: Dict[int, Any] = {}
+
+    def _sync_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from groq import Groq
+                    self._client = Groq(api_key=self.api_key, base_url=self.base_url)
+        return self._client
+
+    def _async_client(self):
+        import asyncio
+        loop_id = id(asyncio.get_running_loop())
+        c = self._async_clients.get(loop_id)
+        if c is None:
+            from groq import AsyncGroq
+            c = self._async_clients[loop_id] = AsyncGroq(api_key=self.api_key, base_url=self.base_url)
+        return c
+
+    def _request(self, system_prompt: str, user_text: str, stream: bool = False) -> Dict[str, Any]:
+        req = dict(model=self.model, messages=_messages(system_prompt, user_text), temperature=0)
+        if stream:
+            # JSON mode isn't available with streaming; the system prompt
+            # already demands a bare JSON object and the incremental parser
+            # skips stray text.
+            req["stream"] = True
+        else:
+            # This forces the output to be valid JSON
+            req["response_format"] = {"type": "json_object"}
+        return req
+
+    def complete(self, system_prompt, user_text):
+        resp = self._sync_client().chat.completions.create(**self._request(system_prompt, user_text))
+        return resp.choices[0].message.content.strip(), getattr(resp, "usage", None)
+
+    async def complete_async(self, system_prompt, user_text):
+        resp = await self._async_client().chat.completions.create(**self._request(system_prompt, user_text))
+        return resp.choices[0].message.content.strip(), getattr(resp, "usage", None)
+
+    @staticmethod
+    def _chunk(chunk) -> Completion:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        x_groq = getattr(chunk, "x_groq", None)
+        return delta or "", getattr(x_groq, "usage", None)
+
+    def stream(self, system_prompt, user_text):
+        stream = self._sync_client().chat.completions.create(**self._request(system_prompt, user_text, stream=True))
+        try:
+            for chunk in stream:
+                yield self._chunk(chunk)
+        finally:
+            stream.close()
+
+    async def stream_async(self, system_prompt, user_text):
+        stream = await self._async_client().chat.completions.create(
+            **self._request(system_prompt, user_text, stream=True)
+        )
+        try:
+            async for chunk in stream:
+                yield self._chunk(chunk)
+        finally:
+            await stream.close()
+
+
+def _usage(data: Optional[Dict[str, Any]]):
+    """OpenAI-style usage dict -> the attribute shape TokenUsage.record reads."""
+    if not data:
+        return None
+    details = data.get("prompt_tokens_details") or {}
+    return SimpleNamespace(
+        prompt_tokens=data.get("prompt_tokens", 0),
+        completion_tokens=data.get("completion_tokens", 0),
+        prompt_tokens_details=SimpleNamespace(cached_tokens=details.get("cached_tokens", 0)),
+    )
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Plain httpx client for /chat/completions on a self-hosted or third-party server."""
+
+    name = "openai"
+
+    def __init__(self, base_url: str, model: str, api_key: Optional[str] = None,
+                 json_mode: bool = True, timeout: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.json_mode = json_mode
+        self.timeout = timeout
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = None
+        self._lock = threading.Lock()
+        self._async_clients: Dict[int, Any] = {}
+
+    def _sync_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    self._client = httpx.Client(base_url=self.base_url, headers=self.headers, timeout=self.timeout)
+        return self._client
+
+    def _async_client(self):
+        import asyncio
+        import httpx
+        loop_id = id(asyncio.get_running_loop())
+        c = self._async_clients.get(loop_id)
+        if c is None:
+            c = self._async_clients[loop_id] = httpx.AsyncClient(
+                base_url=self.base_url, headers=self.headers, timeout=self.timeout
+            )
+        return c
+
+    def _body(self, system_prompt: str, user_text: str, stream: bool = False) -> Dict[str, Any]:
+        body = {"model": self.model, "messages": _messages(system_prompt, user_text), "temperature": 0}
+        if stream:
+            body["stream"] = True
+        elif self.json_mode:
+            body["response_format"] = {"type": "json_object"}
+        return body
+
+    @staticmethod
+    def _completion(data: Dict[str, Any]) -> Completion:
+        return data["choices"][0]["message"]["content"].strip(), _usage(data.get("usage"))
+
+    @staticmethod
+    def _event(line: str) -> Optional[Completion]:
+        if not line.startswith("data:"):
+            return None
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            return None
+        data = json.loads(payload)
+        choices = data.get("choices") or [{}]
+        delta = (choices[0].get("delta") or {}).get("content") or ""
+        usage = data.get("usage") or (data.get("x_groq") or {}).get("usage")
+        return delta, _usage(usage)
+
+    def complete(self, system_prompt, user_text):
+        resp = self._sync_client().post("/chat/completions", json=self._body(system_prompt, user_text))
+        resp.raise_for_status()
+        return self._completion(resp.json())
+
+    async def complete_async(self, system_prompt, user_text):
+        resp = await self._async_client().post("/chat/completions", json=self._body(system_prompt, user_text))
+        resp.raise_for_status()
+        return self._completion(resp.json())
+
+    def stream(self, system_prompt, user_text):
+        body = self._body(system_prompt, user_text, stream=True)
+        with self._sync_client().stream("POST", "/chat/completions", json=body) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                event = self._event(line)
+                if event is not None:
+                    yield event
+
+    async def stream_async(self, system_prompt, user_text):
+        body = self._body(system_prompt, user_text, stream=True)
+        async with self._async_client().stream("POST", "/chat/completions", json=body) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                event = self._event(line)
+                if event is not None:
+                    yield event
+
+
+# Roughly how a llama tokenizer splits a short JSON object, so streamed
+# replays arrive in realistic pieces.
+_STUB_TOKEN_RE = re.compile(r"\s*[A-Za-z_]+|\s*\d+|\s*[^\sA-Za-z_\d]")
+
+
+def _stub_key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic offline model: replays recorded completions by user text.
+
+    Recordings are JSONL lines with "text" and either "response" (the raw
+    completion, as written by LLM_RECORD_PATH) or "intent" and "params".
+    Unknown messages get `default`. Every call sleeps `latency` seconds;
+    streamed replies then spend `token_delay` seconds per token.
+    """
+
+    name = "stub"
+
+    def __init__(self, responses: Optional[Dict[str, str]] = None, latency: float = 0.0,
+                 token_delay: float = 0.0, default: Optional[str] = None):
+        self.responses = {_stub_key(k): v for k, v in (responses or {}).items()}
+        self.latency = latency
+        self.token_delay = token_delay
+        self.default = default or json.dumps({
+            "intent": "clarify",
+            "params": {"question": "Could you tell me a bit more about what you'd like to do?"},
+        })
+        self.calls = 0
+
+    @classmethod
+    def from_jsonl(cls, path, **kwargs) -> "StubProvider":
+        responses = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                if "response" in rec:
+                    responses[rec["text"]] = rec["response"]
+                else:
+                    responses[rec["text"]] = json.dumps({"intent": rec["intent"], "params": rec.get("params", {})})
+        return cls(responses, **kwargs)
+
+    def _reply(self, user_text: str) -> Completion:
+        self.calls += 1
+        text = self.responses.get(_stub_key(user_text), self.default)
+        n = len(_STUB_TOKEN_RE.findall(text))
+        return text, SimpleNamespace(prompt_tokens=0, completion_tokens=n, prompt_tokens_details=None)
+
+    def complete(self, system_prompt, user_text):
+        text, usage = self._reply(user_text)
+        time.sleep(self.latency + self.token_delay * usage.completion_tokens)
+        return text, usage
+
+    async def complete_async(self, system_prompt, user_text):
+        import asyncio
+        text, usage = self._reply(user_text)
+        await asyncio.sleep(self.latency + self.token_delay * usage.completion_tokens)
+        return text, usage
+
+    def stream(self, system_prompt, user_text):
+        text, usage = self._reply(user_text)
+        time.sleep(self.latency)
+        tokens = _STUB_TOKEN_RE.findall(text)
+        for i, tok in enumerate(tokens):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield tok, usage if i == len(tokens) - 1 else None
+
+    async def stream_async(self, system_prompt, user_text):
+        import asyncio
+        text, usage = self._reply(user_text)
+        await asyncio.sleep(self.latency)
+        tokens = _STUB_TOKEN_RE.findall(text)
+        for i, tok in enumerate(tokens):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield tok, usage if i == len(tokens) - 1 else None
+
+
+class RecordingProvider(LLMProvider):
+    """Wraps another provider and appends each completion to a JSONL file."""
+
+    def __init__(self, inner: LLMProvider, path):
+        self.inner = inner
+        self.name = inner.name
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _record(self, user_text: str, text: str):
+        line = json.dumps({"text": user_text, "response": text}) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+
+    def complete(self, system_prompt, user_text):
+        text, usage = self.inner.complete(system_prompt, user_text)
+        self._record(user_text, text)
+        return text, usage
+
+    async def complete_async(self, system_prompt, user_text):
+        text, usage = await self.inner.complete_async(system_prompt, user_text)
+        self._record(user_text, text)
+        return text, usage
+
+    def stream(self, system_prompt, user_text):
+        parts = []
+        try:
+            for delta, usage in self.inner.stream(system_prompt, user_text):
+                parts.append(delta)
+                yield delta, usage
+        finally:
+            # The agent may stop reading early; record what was streamed.
+            self._record(user_text, "".join(parts))
+
+    async def stream_async(self, system_prompt, user_text):
+        parts = []
+        try:
+            async for delta, usage in self.inner.stream_async(system_prompt, user_text):
+                parts.append(delta)
+                yield delta, usage
+        finally:
+            self._record(user_text, "".join(parts))
+
+
+def provider_from_env() -> LLMProvider:
+    kind = os.getenv("LLM_PROVIDER", "groq").lower()
+    if kind == "groq":
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            log.warning("GROQ_API_KEY is missing. Add it in .env (local) or Streamlit secrets (cloud).")
+        provider = GroqProvider(
+            api_key,
+            os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
+            base_url=os.getenv("GROQ_BASE_URL") or None,
+        )
+    elif kind == "openai":
+        provider = OpenAICompatibleProvider(
+            os.getenv("LLM_BASE_URL", "http://127.0.0.1:8080/v1"),
+            os.getenv("LLM_MODEL", "local-model"),
+            api_key=os.getenv("LLM_API_KEY") or None,
+            json_mode=os.getenv("LLM_JSON_MODE", "1") != "0",
+        )
+    elif kind == "stub":
+        path = os.getenv("LLM_STUB_PATH")
+        kwargs = dict(
+            latency=float(os.getenv("LLM_STUB_LATENCY", "0")),
+            token_delay=float(os.getenv("LLM_STUB_TOKEN_DELAY", "0")),
+        )
+        provider = StubProvider.from_jsonl(path, **kwargs) if path else StubProvider(**kwargs)
+    else:
+        raise ValueError(f"Unknown LLM_PROVIDER {kind!r}; expected groq, openai or stub")
+
+    record_path = os.getenv("LLM_RECORD_PATH")
+    if record_path:
+        provider = RecordingProvider(provider, record_path)
+    return provider
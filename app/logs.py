@@ -0,0 +1,97 @@
+"""
+Structured, non-blocking logging for the GoodFoods app.
+
+Records are formatted as one JSON object per line and written by a
+background thread: request threads only put the record on a queue
+(QueueHandler), so a slow stderr or log shipper never stalls a request.
+
+Per-request events go through event(), which is sampled: only
+GOODFOODS_LOG_SAMPLE of them (default 1%) are logged, and the sampling
+decision is made before a LogRecord is even created. Warnings and errors
+use the logger directly and are never sampled.
+
+    GOODFOODS_LOG_LEVEL=DEBUG GOODFOODS_LOG_SAMPLE=1 streamlit run app/streamlit_app.py
+"""
+import atexit
+import json
+import logging
+import os
+import random
+import sys
+import threading
+from typing import Any, Optional
+
+LOG_LEVEL = os.getenv("GOODFOODS_LOG_LEVEL", "INFO").upper()
+SAMPLE_RATE = float(os.getenv("GOODFOODS_LOG_SAMPLE", "0.01"))
+
+_ROOT = "goodfoods"
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            out.update(fields)
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+def setup_logging(stream=None):
+    """Attach the queue handler and start the writer thread. Idempotent."""
+    global _listener
+    if _listener is not None:
+        return
+    with _setup_lock:
+        if _listener is not None:
+            return
+        # Only needed once logging is actually set up.
+        import queue
+        from logging.handlers import QueueHandler, QueueListener
+        q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        root = logging.getLogger(_ROOT)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(QueueHandler(q))
+        root.propagate = False
+        _listener = QueueListener(q, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            root = logging.getLogger(_ROOT)
+            for h in list(root.handlers):
+                root.removeHandler(h)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{_ROOT}.{name}")
+
+
+def sampled(rate: Optional[float] = None) -> bool:
+    rate = SAMPLE_RATE if rate is None else rate
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def event(logger: logging.Logger, name: str, level: int = logging.INFO, rate: Optional[float] = None, **fields: Any):
+    """Log a per-request event with structured fields, subject to sampling."""
+    if not sampled(rate) or not logger.isEnabledFor(level):
+        return
+    setup_logging()
+    logger.log(level, name, extra={"fields": fields})
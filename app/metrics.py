@@ -0,0 +1,348 @@
+"""
+In-process metrics for the request hot path, exported in Prometheus text format.
+
+    from metrics import STAGE_SECONDS, timer
+    with timer(STAGE_SECONDS.labels("llm")):
+        ...
+
+Counters and histograms are plain Python objects. Each thread updates its
+own shard without taking a lock (lock acquisition alone would cost more
+than the rest of an observation); a scrape adds the shards up. Set
+GOODFOODS_METRICS=0, or call set_enabled(False), to turn the timers into
+no-ops. render_prometheus() produces the body for GET /metrics.
+
+A message the local router answers takes tens of microseconds, so even a
+few observations per message would add a sizeable fraction on top.
+Messages are therefore sampled (sample_message): a DETAIL_SAMPLE_RATE
+fraction of them (GOODFOODS_METRICS_DETAIL, default 0.01) records its
+route, db, format and total stages, its timed_db queries and its intent,
+counted with weight 1 / DETAIL_SAMPLE_RATE so the intent counters estimate
+the true totals. The rest record nothing, except the LLM stages of the
+messages that call the model.
+"""
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from threading import get_ident
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+ENABLED = os.getenv("GOODFOODS_METRICS", "1") != "0"
+DETAIL_SAMPLE_RATE = float(os.getenv("GOODFOODS_METRICS_DETAIL", "0.01"))
+
+# Seconds; covers a cached router hit (~50us) up to a slow LLM call.
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+REGISTRY: List = []
+# Extra exporters for stats kept elsewhere (router, intent cache, tokens);
+# each returns complete Prometheus lines.
+COLLECTORS: List[Callable[[], Iterable[str]]] = []
+
+
+def set_enabled(flag: bool):
+    global ENABLED
+    ENABLED = bool(flag)
+
+
+def sample_message(_random=random.random) -> float:
+    """
+    Weight a message's metrics are recorded with: 0.0 for a message left
+    out of the sample (and always when disabled), else 1 / DETAIL_SAMPLE_RATE.
+    """
+    rate = DETAIL_SAMPLE_RATE
+    if not ENABLED or rate <= 0.0:
+        return 0.0
+    if rate >= 1.0:
+        return 1.0
+    return 1.0 / rate if _random() < rate else 0.0
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """
+    A metric family: one child per label combination. Children are cached,
+    so hot paths can bind one up front (STAGE_SECONDS.labels("route")) and
+    skip the label lookup on every observation.
+    """
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+
+# Each child keeps one slot per thread ({thread id: value}) and a thread only
+# ever writes its own, so updates need no lock. Reading adds the slots up;
+# list() of a dict is a single C call, so it never sees one mid-resize.
+
+class _CounterChild:
+    __slots__ = ("_values",)
+
+    def __init__(self):
+        self._values: Dict[int, float] = {}
+
+    def inc(self, amount: float = 1.0, _get_ident=get_ident):
+        values = self._values
+        ident = _get_ident()
+        values[ident] = values.get(ident, 0.0) + amount
+
+    def get(self) -> float:
+        return sum(list(self._values.values()))
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_series")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # thread id -> per-bucket counts (+Inf last), then sum, then count
+        self._series: Dict[int, list] = {}
+
+    def observe(self, value: float, _get_ident=get_ident, _bisect=bisect_left):
+        series = self._series.get(_get_ident())
+        if series is None:
+            series = self._series.setdefault(_get_ident(), [0] * (len(self._buckets) + 1) + [0.0, 0])
+        series[_bisect(self._buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def get(self) -> list:
+        total = [0] * (len(self._buckets) + 1) + [0.0, 0]
+        for series in list(self._series.values()):
+            for i, v in enumerate(series):
+                total[i] += v
+        return total
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.labels(*labels).inc(amount)
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        return [(labels, child.get()) for labels, child in self._items()]
+
+    def value(self, *labels: str) -> float:
+        child = self._children.get(labels)
+        return child.get() if child else 0.0
+
+    def render(self) -> List[str]:
+        items = self.items()
+        if not items and not self.labelnames:
+            # An unlabelled counter is exported as 0 before its first increment.
+            items = [((), 0.0)]
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {v:g}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; one observation is a bisect and three adds."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, *labels: str):
+        self.labels(*labels).observe(value)
+
+    def series(self) -> List[Tuple[Tuple[str, ...], list]]:
+        return [(labels, child.get()) for labels, child in self._items()]
+
+    def count(self, *labels: str) -> int:
+        child = self._children.get(labels)
+        return child.get()[-1] if child else 0
+
+    def sum(self, *labels: str) -> float:
+        child = self._children.get(labels)
+        return child.get()[-2] if child else 0.0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        bounds = [f'le="{b:g}"' for b in self.buckets] + ['le="+Inf"']
+        for labels, series in self.series():
+            cumulative = 0
+            for le, c in zip(bounds, series):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-2]:.9g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class timer:
+    """
+    Context manager that observes the elapsed seconds into a histogram
+    child. Cheaper than a @contextmanager generator, and a no-op when disabled.
+    """
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter() if ENABLED else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _ThreadState(threading.local):
+    """
+    Per-thread timed_db bookkeeping, so callers can split a block's time
+    into DB work and everything else. The class attributes are every
+    thread's starting values.
+    """
+    timed = 0  # timed_queries nesting; timed_db only times inside one
+    depth = 0  # timed_db nesting
+    seconds = 0.0  # spent inside outermost timed_db calls
+
+
+_thread = _ThreadState()
+
+
+class timed_queries:
+    """
+    Context manager: timed_db calls this thread makes inside it are timed.
+    Outside one they run untimed, so a message left out of the sample pays
+    a single attribute check per query and nothing to set up.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        _thread.timed += 1
+        return self
+
+    def __exit__(self, *exc):
+        _thread.timed -= 1
+        return False
+
+
+def db_seconds() -> float:
+    """Seconds this thread has spent inside timed_db() calls so far."""
+    return _thread.seconds
+
+
+def timed_db(op: str) -> Callable:
+    """
+    Decorator: time a data-layer query into DB_SECONDS{op=...} when it
+    runs inside timed_queries(). Nested timed calls are observed under
+    their own op but only the outermost one adds to db_seconds(), so time
+    is never counted twice.
+    """
+    def wrap(fn):
+        observe = DB_SECONDS.labels(op).observe
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            state = _thread
+            if not state.timed or not ENABLED:
+                return fn(*args, **kwargs)
+            state.depth += 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                state.depth -= 1
+                if not state.depth:
+                    state.seconds += elapsed
+                observe(elapsed)
+        return wrapper
+    return wrap
+
+
+def lap(child: _HistogramChild, since: float) -> float:
+    """
+    Observe the time since `since` and return the current time, to chain
+    back-to-back stages with one clock read per boundary.
+    """
+    now = time.perf_counter()
+    if ENABLED:
+        child.observe(now - since)
+    return now
+
+
+def register_collector(fn: Callable[[], Iterable[str]]):
+    COLLECTORS.append(fn)
+    return fn
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for collect in COLLECTORS:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "goodfoods_stage_seconds",
+    "Time spent in each stage of handling a message (the LLM stages for every LLM call, the rest for a sample of messages).",
+    ("stage",),
+)
+DB_SECONDS = Histogram(
+    "goodfoods_db_seconds",
+    "Time spent in each data-layer query (SQLite or the in-memory catalog indexes), for sampled messages and tool calls.",
+    ("op",),
+)
+INTENTS = Counter(
+    "goodfoods_intents_total",
+    "Messages handled, by resolved intent and where the intent came from (session, router, cache, llm); estimated from a sample.",
+    ("intent", "source"),
+)
+LLM_ERRORS = Counter(
+    "goodfoods_llm_errors_total",
+    "LLM calls that failed and fell back to a clarify reply.",
+)
+HTTP_REQUESTS = Counter(
+    "goodfoods_http_requests_total",
+    "HTTP API requests, by route.",
+    ("route",),
+)
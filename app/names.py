@@ -0,0 +1,190 @@
+"""
+Restaurant name matching for free-text booking requests.
+
+Names are normalized (lowercase, punctuation to spaces, whitespace
+collapsed) and deduplicated once per catalog. Mentions are found with a
+token trie, stored as the set of every name's token prefixes: each word of
+the message starts a walk that extends one word at a time while the words
+so far are a prefix of some name. A message costs O(words x longest name)
+set lookups whatever the catalog size, matches only on word boundaries
+("roma" is not found in "aroma"), and the longest name wins when one
+contains another.
+
+Typos are handled per word. Message words that appear in no name are
+looked up in a character trigram index over the distinct name words (CSR
+arrays; one np.bincount scores every word), the closest few are verified
+with difflib, and the trie walk is repeated with those corrections in
+place. Corrections are cached, so the words every booking repeats
+("tomorrow", "table") cost one dict lookup after the first time.
+"""
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from catalog import Catalog
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+# Words shorter than this are never corrected (too many near neighbours).
+MIN_FUZZY_CHARS = 4
+# A name word is a candidate correction when it shares this Dice share of
+# trigrams with the typed word...
+MIN_OVERLAP = 0.2
+# ...and it is accepted when difflib rates the two at least this similar.
+MIN_SIMILARITY = 0.8
+# How many of the best candidates are verified with difflib, and kept.
+FUZZY_CANDIDATES = 24
+MAX_CORRECTIONS = 3
+CORRECTION_CACHE_SIZE = 10_000
+
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _trigrams(word: str) -> set:
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        key_of: Dict[str, int] = {}
+        key_ids = np.empty(len(catalog), dtype=np.int32)
+        for pos, name in enumerate(catalog.names()):
+            key_ids[pos] = key_of.setdefault(normalize(name), len(key_of))
+        self.keys = list(key_of)
+        self.key_of = key_of
+        self.key_lengths = [len(key.split()) for key in self.keys]
+        # Catalog positions of each distinct name, in catalog order.
+        order = np.argsort(key_ids, kind='stable')
+        self.positions = order.astype(np.int32)
+        self.offsets = np.searchsorted(key_ids[order], np.arange(len(self.keys) + 1)).astype(np.int32)
+
+        self.prefixes = set()
+        self.vocab = set()
+        for key in self.keys:
+            tokens = key.split()
+            self.vocab.update(tokens)
+            for i in range(1, len(tokens)):
+                self.prefixes.add(" ".join(tokens[:i]))
+        self.max_tokens = max(self.key_lengths, default=0)
+        self._build_trigrams(sorted(w for w in self.vocab if len(w) >= MIN_FUZZY_CHARS))
+        self._corrections: Dict[str, List[Tuple[str, float]]] = {}
+
+    def _build_trigrams(self, words: List[str]):
+        self.words = words
+        grams_per_word = [_trigrams(w) for w in words]
+        gram_ids: Dict[str, int] = {}
+        postings: List[List[int]] = []
+        for word_id, grams in enumerate(grams_per_word):
+            for g in grams:
+                gid = gram_ids.setdefault(g, len(gram_ids))
+                if gid == len(postings):
+                    postings.append([])
+                postings[gid].append(word_id)
+        self.gram_ids = gram_ids
+        self.gram_counts = np.array([len(g) for g in grams_per_word], dtype=np.int32)
+        self.gram_offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in postings], out=self.gram_offsets[1:])
+        self.gram_postings = np.fromiter((w for p in postings for w in p), dtype=np.int32,
+                                         count=int(self.gram_offsets[-1]))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    # -- lookups --------------------------------------------------------
+
+    def match(self, text: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """
+        Catalog positions of the restaurants named in `text`, best first,
+        with a score: 1.0 for exact mentions (longest name first), the mean
+        word similarity for misspelled ones. Restaurants sharing a name are
+        returned in catalog order.
+        """
+        tokens = normalize(text).split()
+        ranked = [(key_id, 1.0) for key_id in self._exact(tokens)]
+        if not ranked:
+            alternatives = [[(t, 1.0)] if t in self.vocab else self.corrections(t) for t in tokens]
+            if any(alts and alts[0][1] < 1.0 for alts in alternatives):
+                ranked = self._walk(alternatives)
+        results: List[Tuple[int, float]] = []
+        for key_id, score in ranked:
+            for pos in self.positions[self.offsets[key_id]:self.offsets[key_id + 1]].tolist():
+                results.append((pos, score))
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def mentioned(self, text: str) -> Optional[str]:
+        """The longest name mentioned exactly in `text`, normalized, or None."""
+        found = self._exact(normalize(text).split())
+        return self.keys[found[0]] if found else None
+
+    def _exact(self, tokens: List[str]) -> List[int]:
+        """Key ids of the names spelled out in `tokens`, longest first."""
+        key_of, prefixes = self.key_of, self.prefixes
+        found = []
+        for i in range(len(tokens)):
+            words, j, end = tokens[i], i + 1, min(len(tokens), i + self.max_tokens)
+            while True:
+                if words in key_of:
+                    found.append(key_of[words])
+                if j >= end or words not in prefixes:
+                    break
+                words = f"{words} {tokens[j]}"
+                j += 1
+        if len(found) > 1:
+            found = sorted(set(found), key=lambda k: (-self.key_lengths[k], -len(self.keys[k]), k))
+        return found
+
+    def _walk(self, alternatives: List[List[Tuple[str, float]]]) -> List[Tuple[int, float]]:
+        """Trie walk over each position's candidate words; (key id, mean word score), best first."""
+        found: Dict[int, float] = {}
+        for i in range(len(alternatives)):
+            frontier = [("", 0.0)]
+            for j in range(i, min(len(alternatives), i + self.max_tokens)):
+                extended = []
+                for prefix, total in frontier:
+                    for word, score in alternatives[j]:
+                        words = f"{prefix} {word}" if prefix else word
+                        key_id = self.key_of.get(words)
+                        if key_id is not None:
+                            found[key_id] = max(found.get(key_id, 0.0), (total + score) / (j - i + 1))
+                        if words in self.prefixes:
+                            extended.append((words, total + score))
+                frontier = extended
+                if not frontier:
+                    break
+        return sorted(found.items(),
+                      key=lambda item: (-item[1], -self.key_lengths[item[0]], -len(self.keys[item[0]]), item[0]))
+
+    def corrections(self, word: str) -> List[Tuple[str, float]]:
+        """Name words within MIN_SIMILARITY of `word`, closest first (at most MAX_CORRECTIONS)."""
+        cached = self._corrections.get(word)
+        if cached is not None:
+            return cached
+        found: List[Tuple[str, float]] = []
+        gids = [gid for gid in map(self.gram_ids.get, _trigrams(word)) if gid is not None]
+        if len(word) >= MIN_FUZZY_CHARS and gids:
+            postings = np.concatenate([self.gram_postings[self.gram_offsets[g]:self.gram_offsets[g + 1]] for g in gids])
+            shared = np.bincount(postings, minlength=len(self.words))
+            dice = 2 * shared / (self.gram_counts + len(word) + 2)
+            candidates = np.flatnonzero(dice >= MIN_OVERLAP)
+            if len(candidates) > FUZZY_CANDIDATES:
+                candidates = candidates[np.argpartition(-dice[candidates], FUZZY_CANDIDATES)[:FUZZY_CANDIDATES]]
+            matcher = SequenceMatcher(None, b=word, autojunk=False)
+            for word_id in candidates.tolist():
+                matcher.set_seq1(self.words[word_id])
+                score = matcher.ratio()
+                if score >= MIN_SIMILARITY:
+                    found.append((self.words[word_id], score))
+            found.sort(key=lambda item: (-item[1], item[0]))
+            del found[MAX_CORRECTIONS:]
+        if len(self._corrections) >= CORRECTION_CACHE_SIZE:
+            self._corrections.clear()
+        self._corrections[word] = found
+        return found
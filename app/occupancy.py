@@ -0,0 +1,176 @@
+"""
+In-process index of seated guests per restaurant over time.
+
+A reservation holds its seats for the restaurant's dining duration: from
+the start of the slot it begins in to the slot boundary after its guests
+are due to leave (see seating_interval). Capacity is the most guests seated
+at any one moment of a new booking's interval, so a table booked at 18:30
+still counts against one at 19:50 (the old rule only summed bookings
+starting within two hours of 19:00).
+
+Each (restaurant_id, day) pair owns a difference array with one slot per
+slot_minutes of the day: +seats where a seating starts, -seats where it
+ends (a seating past midnight continues from slot 0 of the next day). The
+seats present in a slot are a prefix sum, so the peak over an interval is
+one itertools.accumulate over a day's array instead of a SQLite query. The
+database remains the source of truth: the index is loaded from it at
+startup and kept in step by tailing the trigger-maintained occupancy_log
+table, which also picks up bookings made by other worker processes.
+"""
+import threading
+from array import array
+from functools import lru_cache
+from itertools import accumulate, islice
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+SECONDS_PER_DAY = 24 * 3600
+
+# Seating rules for restaurants whose catalog record doesn't set them.
+DEFAULT_DINING_MINUTES = 120
+DEFAULT_SLOT_MINUTES = 15
+# Bounds checked when the catalog is built. Slots must divide the day;
+# a seating never outlasts MAX_SEATING_SECONDS, which bounds how far back
+# the capacity query looks for reservations still at their table.
+SLOT_CHOICES = (5, 10, 15, 20, 30, 60)
+MAX_DINING_MINUTES = 360
+MAX_SEATING_SECONDS = (MAX_DINING_MINUTES + max(SLOT_CHOICES)) * 60
+
+
+def seating_interval(start_ts: int, dining_seconds: int, slot_seconds: int) -> Tuple[int, int]:
+    """[lo, hi) a booking starting at start_ts holds its table for, on the restaurant's slot grid."""
+    lo = start_ts - start_ts % slot_seconds
+    hi = start_ts + dining_seconds
+    return lo, hi - hi % -slot_seconds
+
+
+def peak_seats(intervals: Iterable[Tuple[int, int, int]], lo: int, hi: int) -> int:
+    """Most seats held at once during [lo, hi) by (start, end, seats) intervals: a sweep line."""
+    events = []
+    for start, end, seats in intervals:
+        start, end = max(start, lo), min(end, hi)
+        if start < end:
+            events.append((start, seats))
+            events.append((end, -seats))
+    # At equal times ends (negative) sort first: [a, b) and [b, c) never overlap.
+    events.sort()
+    peak = seated = 0
+    for _, delta in events:
+        seated += delta
+        if seated > peak:
+            peak = seated
+    return peak
+
+
+@lru_cache(maxsize=None)
+def _zero_day(slot_seconds: int) -> array:
+    # Template copied ([:]) for each new day array; faster than building one.
+    return array('i', bytes(4 * (SECONDS_PER_DAY // slot_seconds)))
+
+
+class OccupancyIndex:
+    def __init__(self, slot_seconds: Callable[[int], int] = lambda restaurant_id: DEFAULT_SLOT_MINUTES * 60):
+        # Slot length for a restaurant's new day arrays; an existing array
+        # keeps the length it was built with (86400 / len(array)).
+        self.slot_seconds = slot_seconds
+        self._days: Dict[Tuple[int, int], array] = {}
+        self._lock = threading.Lock()
+        self.last_seq = 0
+
+    def load(self, conn):
+        """Rebuild the index from every confirmed reservation in the DB."""
+        days: Dict[Tuple[int, int], array] = {}
+        slots: Dict[int, int] = {}
+
+        def slot_seconds(restaurant_id: int) -> int:
+            # Looked up once per restaurant rather than once per day array.
+            slot = slots.get(restaurant_id)
+            if slot is None:
+                slot = slots[restaurant_id] = self.slot_seconds(restaurant_id)
+            return slot
+
+        with self._lock:
+            # One read transaction so the rows and the log position agree.
+            conn.execute('BEGIN')
+            try:
+                last_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM occupancy_log').fetchone()[0]
+                rows = conn.execute(
+                    "SELECT restaurant_id, start_ts, end_ts, seats FROM reservations WHERE status='confirmed'"
+                )
+                get = days.get
+                for restaurant_id, start_ts, end_ts, seats in rows:
+                    # Inlined _add for the common case, a seating that ends the day it starts.
+                    day, offset = divmod(start_ts, SECONDS_PER_DAY)
+                    end = end_ts - day * SECONDS_PER_DAY
+                    if end >= SECONDS_PER_DAY:
+                        self._add(days, restaurant_id, start_ts, end_ts, seats, slot_seconds)
+                        continue
+                    deltas = get((restaurant_id, day))
+                    if deltas is None:
+                        deltas = days[(restaurant_id, day)] = _zero_day(slot_seconds(restaurant_id))[:]
+                    slot = SECONDS_PER_DAY // len(deltas)
+                    deltas[offset // slot] += seats
+                    last = -(-end // slot)
+                    if last < len(deltas):
+                        deltas[last] -= seats
+            finally:
+                conn.execute('COMMIT')
+            self._days = days
+            self.last_seq = last_seq
+
+    def sync(self, conn):
+        """Apply seat changes logged since the last load/sync, from any process."""
+        with self._lock:
+            rows = conn.execute(
+                'SELECT seq, restaurant_id, start_ts, end_ts, seats FROM occupancy_log WHERE seq > ? ORDER BY seq',
+                (self.last_seq,),
+            ).fetchall()
+            if not rows:
+                return
+            if rows[0][0] != self.last_seq + 1:
+                # The entries we needed were pruned; fall back to a full load.
+                gap = True
+            else:
+                gap = False
+                for seq, restaurant_id, start_ts, end_ts, seats in rows:
+                    self._add(self._days, restaurant_id, start_ts, end_ts, seats)
+                self.last_seq = rows[-1][0]
+        if gap:
+            self.load(conn)
+
+    def _add(self, days: Dict[Tuple[int, int], array], restaurant_id: int, start_ts: int, end_ts: int, seats: int,
+             slot_seconds: Optional[Callable[[int], int]] = None):
+        while start_ts < end_ts:
+            day, offset = divmod(start_ts, SECONDS_PER_DAY)
+            deltas = days.get((restaurant_id, day))
+            if deltas is None:
+                deltas = days[(restaurant_id, day)] = _zero_day((slot_seconds or self.slot_seconds)(restaurant_id))[:]
+            slot = SECONDS_PER_DAY // len(deltas)
+            deltas[offset // slot] += seats
+            end = end_ts - day * SECONDS_PER_DAY
+            if end < SECONDS_PER_DAY:
+                last = -(-end // slot)
+                if last < len(deltas):
+                    deltas[last] -= seats
+                return
+            start_ts = (day + 1) * SECONDS_PER_DAY
+
+    def add(self, restaurant_id: int, start_ts: int, end_ts: int, seats: int):
+        with self._lock:
+            self._add(self._days, restaurant_id, start_ts, end_ts, seats)
+
+    def remove(self, restaurant_id: int, start_ts: int, end_ts: int, seats: int):
+        self.add(restaurant_id, start_ts, end_ts, -seats)
+
+    def peak(self, restaurant_id: int, lo: int, hi: int) -> int:
+        """Most seats held at once by confirmed reservations during [lo, hi)."""
+        peak = 0
+        for day in range(lo // SECONDS_PER_DAY, (hi - 1) // SECONDS_PER_DAY + 1):
+            deltas = self._days.get((restaurant_id, day))
+            if deltas is None:
+                continue
+            slot = SECONDS_PER_DAY // len(deltas)
+            base = day * SECONDS_PER_DAY
+            first = max(lo - base, 0) // slot
+            last = -(-min(hi - base, SECONDS_PER_DAY) // slot)
+            peak = max(peak, max(islice(accumulate(deltas[:last]), first, None), default=0))
+        return peak
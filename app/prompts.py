@@ -1,7 +1,12 @@
+from typing import Optional, Tuple
+
+import tools
 from tools import list_tools_for_prompt
 
-SYSTEM_PROMPT_BASE = """
-You are the GoodFoods AI Reservation Agent.
+# Everything in the system prompt is static (no dates, no user data), so it
+# is byte-identical on every request and the provider can reuse the cached
+# prefix; per-request content only ever goes in the user message.
+SYSTEM_PROMPT_BASE = """You are the GoodFoods AI Reservation Agent.
 
 You MUST respond with ONLY a single valid JSON object.
 No markdown.
@@ -19,12 +24,30 @@ Rules:
 - "params" MUST match the tool input schema.
 - If unclear, use intent "clarify" with:
   {"question": "..."}
+- The user message may start with a line "Context: ..." summarising the
+  conversation so far: numbered results last shown (with restaurant ids),
+  the chosen restaurant, the booking details and the reservation made. Use
+  it to resolve references like "the Italian one" or "same time tomorrow".
 """
 
+# (TOOL_SPECS_VERSION, prompt) for the last rendered prompt.
+_cached: Optional[Tuple[int, str]] = None
 
-def build_system_prompt() -> str:
+
+def render_system_prompt() -> str:
     """
     Combine the base prompt with MCP-style tool descriptions.
     """
     tools_block = list_tools_for_prompt()
-    return SYSTEM_PROMPT_BASE + "\n\n" + tools_block
+    return SYSTEM_PROMPT_BASE + "\n" + tools_block
+
+
+def build_system_prompt() -> str:
+    """
+    Return the system prompt, re-rendering only when the tool registry changed.
+    """
+    global _cached
+    version = tools.TOOL_SPECS_VERSION
+    if _cached is None or _cached[0] != version:
+        _cached = (version, render_system_prompt())
+    return _cached[1]
@@ -1,85 +1,571 @@
-from db import init_db, load_restaurants, DB_PATH
-from schema import Restaurant, Reservation
+from db import RESTAURANTS_JSON, init_db, get_conn, transaction, to_epoch, prune_occupancy_log
+from logs import event, get_logger
+from metrics import timed_db
+from occupancy import DEFAULT_SLOT_MINUTES, MAX_SEATING_SECONDS, OccupancyIndex, peak_seats, seating_interval
 from pathlib import Path
+import copy
+import os
 import sqlite3
-from datetime import datetime, timedelta
-from typing import List, Optional
+import subprocess
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
 import json
 
-init_db()
-RESTAURANTS = {r['id']: Restaurant(**r) for r in load_restaurants()}
+if TYPE_CHECKING:
+    from catalog import Catalog, RestaurantMap
+    from geo import GeoIndex
+    from schema import Restaurant, Reservation
 
+# How often watch_catalog() checks restaurants.json for changes (0 = never).
+CATALOG_POLL_SECONDS = float(os.getenv('GOODFOODS_CATALOG_POLL', '2'))
+
+# Occupancy log entries older than this are pruned at startup; a process that
+# falls further behind simply reloads its index.
+OCCUPANCY_LOG_RETENTION_SECONDS = 24 * 3600
+
+# check_availability() only tails the occupancy log when the index was last
+# synced longer ago than this. Bookings made in this process update the index
+# as they commit, so the lag only hides other workers' latest bookings, and
+# create_reservation() re-checks capacity in its write transaction anyway.
+OCCUPANCY_MAX_LAG_SECONDS = float(os.getenv('GOODFOODS_OCCUPANCY_LAG', '0.05'))
+
+def _slot_seconds(restaurant_id:int) -> int:
+    # Slot length for the occupancy index's new day arrays (see startup()).
+    catalog = _SNAPSHOT.catalog
+    pos = catalog.position(restaurant_id)
+    return catalog.slot_minutes.item(pos) * 60 if pos is not None else DEFAULT_SLOT_MINUTES * 60
+
+OCCUPANCY = OccupancyIndex(_slot_seconds)
+
+class CatalogSnapshot(NamedTuple):
+    """One catalog and everything built from it, published as a single object."""
+    catalog: 'Catalog'
+    restaurants: 'RestaurantMap'
+    search_index: 'RestaurantIndex'
+    geo_index: 'GeoIndex'
+    # Bumped on every catalog swap; caches derived from the catalog compare it.
+    version: int
+
+# The catalog (columnar, mapped from the binary snapshot), its {id:
+# Restaurant} view and the search and geo indexes are built by startup(),
+# which runs on first use so importing this module stays cheap (no DB, no
+# catalog, no pydantic/numpy).
+#
+# reload_catalog() replaces them copy-on-write: the new catalog and its
+# indexes are built off to the side while readers keep using the old ones,
+# then a new CatalogSnapshot is published with one assignment. Code that
+# needs more than one of them takes snapshot() once, so a single call never
+# mixes two catalogs. The module attributes CATALOG, RESTAURANTS,
+# SEARCH_INDEX, GEO_INDEX and CATALOG_VERSION read the current snapshot
+# (see __getattr__) for callers that only need one.
+_SNAPSHOT: Optional[CatalogSnapshot] = None
+_LAZY = {'CATALOG': 'catalog', 'RESTAURANTS': 'restaurants', 'SEARCH_INDEX': 'search_index', 'GEO_INDEX': 'geo_index'}
+_startup_lock = threading.Lock()
+_started = False
+
+log = get_logger('reservations')
+
+def startup():
+    """Open the DB, migrate it, load the catalog and build all indexes. Idempotent."""
+    global _started
+    if _started:
+        return
+    with _startup_lock:
+        if _started:
+            return
+        from catalog import load_catalog
+        init_db()
+        catalog = load_catalog(RESTAURANTS_JSON)
+        # Installed first: the occupancy index sizes its slots from the catalog.
+        _install(catalog, *_build_indexes(catalog))
+        OCCUPANCY.load(get_conn())
+        prune_occupancy_log(OCCUPANCY_LOG_RETENTION_SECONDS)
+        _started = True
+
+def _build_indexes(catalog):
+    from catalog import RestaurantMap
+    from geo import GeoIndex
+    return RestaurantIndex(catalog), GeoIndex(catalog), RestaurantMap(catalog)
+
+def snapshot() -> CatalogSnapshot:
+    """The current catalog and its indexes, all from the same catalog version."""
+    if not _started:
+        startup()
+    return _SNAPSHOT
+
+def _install(catalog, search_index, geo_index, restaurants):
+    global _SNAPSHOT
+    version = _SNAPSHOT.version + 1 if _SNAPSHOT is not None else 1
+    _SNAPSHOT = CatalogSnapshot(catalog, restaurants, search_index, geo_index, version)
+
+_reload_lock = threading.Lock()
+# Source stamp of the last restaurants.json that failed to load.
+_failed_source = None
+
+def reload_catalog(force: bool=False) -> bool:
+    """
+    Swap in the catalog from restaurants.json if the file changed since it
+    was loaded (or always, with force). Returns True if a new catalog was
+    installed. A file that doesn't load (e.g. caught mid-write) is logged
+    and skipped until it changes again; the current catalog stays.
+
+    Usually only one process parses the JSON: load_catalog() writes the
+    binary snapshot, and workers that notice the change later just map it.
+    """
+    global _failed_source
+    from catalog import load_catalog, source_stamp
+    startup()
+    with _reload_lock:
+        current = _SNAPSHOT.catalog
+        stamp = None
+        try:
+            stamp = source_stamp(RESTAURANTS_JSON)
+            if not force and stamp in (current.source, _failed_source):
+                return False
+            t0 = time.perf_counter()
+            _refresh_snapshot()
+            catalog = load_catalog(RESTAURANTS_JSON)
+        except (OSError, ValueError) as e:
+            # Warned once per version of the file (or missing-file error), not on every poll.
+            failed = stamp or {'error': str(e)}
+            if failed != _failed_source:
+                log.warning('catalog reload failed, keeping version %d: %s', _SNAPSHOT.version, e)
+            _failed_source = failed
+            return False
+        if catalog.same_columns(current):
+            # Touched but not changed: keep the catalog (and every cache built on it).
+            current.source = catalog.source
+            return False
+        indexes = _build_indexes(catalog)
+        _rebuild_name_index(current, catalog)
+        _install(catalog, *indexes)
+        if not catalog.same_columns(current, ('id', 'slot_minutes')):
+            # Day arrays keep the slot length they were built with; rebuild on the new grid.
+            OCCUPANCY.load(get_conn())
+        event(log, 'catalog_reloaded', rate=1.0, version=_SNAPSHOT.version, restaurants=len(catalog),
+              seconds=round(time.perf_counter() - t0, 3))
+        return True
+
+def _refresh_snapshot():
+    # Parse the JSON and write the snapshot in a child process: json.load of
+    # a large catalog holds the GIL for the whole parse, which would stall
+    # every request thread here. If the child fails (or the snapshot can't
+    # be written), load_catalog() falls back to parsing in process.
+    from catalog import snapshot_is_current
+    if not snapshot_is_current(RESTAURANTS_JSON):
+        subprocess.run([sys.executable, str(Path(__file__).with_name('catalog.py')), str(RESTAURANTS_JSON)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+_watch_stop = threading.Event()
+_watcher = None
+
+def watch_catalog(interval: float=CATALOG_POLL_SECONDS):
+    """
+    Poll restaurants.json every `interval` seconds from a daemon thread and
+    reload_catalog() when it changes, so catalog edits need no restart.
+    Idempotent; an interval <= 0 leaves the catalog fixed.
+    """
+    global _watcher
+    startup()
+    if interval <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return
+    _watch_stop.clear()
+
+    def poll():
+        while not _watch_stop.wait(interval):
+            try:
+                reload_catalog()
+            except Exception:
+                log.exception('catalog watcher error')
+
+    _watcher = threading.Thread(target=poll, name='goodfoods-catalog-watcher', daemon=True)
+    _watcher.start()
+
+def stop_watching_catalog():
+    _watch_stop.set()
+    if _watcher is not None:
+        _watcher.join()
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(snapshot(), _LAZY[name])
+    if name == 'CATALOG_VERSION':
+        # 0 until the first catalog is installed; reading it doesn't start up.
+        return _SNAPSHOT.version if _SNAPSHOT is not None else 0
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _bitset(mask) -> int:
+    """Python int with bit i set where the boolean array `mask` is true."""
+    import numpy as np
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+class RestaurantIndex:
+    """
+    Inverted indexes over the catalog for search_restaurants.
+
+    Restaurants are numbered by catalog position and every filter is a
+    bitset (a Python int with bit i set for position i): one per cuisine,
+    one per feature, and one per distinct capacity holding every restaurant
+    at least that large. A query ANDs the relevant bitsets and walks the
+    lowest set bits, so results keep catalog (id) order like the old linear
+    scan. Restaurant models are only built for the rows returned.
+    """
+
+    def __init__(self, catalog):
+        import numpy as np
+        self.catalog = catalog
+        n = len(catalog)
+        self.all_mask = (1 << n) - 1
+        self.by_cuisine = {name.lower(): _bitset(catalog.cuisine == code) for code, name in enumerate(catalog.cuisine_names)}
+        self.by_feature = {
+            name: _bitset((catalog.features & np.uint64(bit)) != 0)
+            for name, bit in catalog.feature_bits.items()
+        }
+
+        # capacity_masks[k] holds every restaurant with capacity >= capacities[k].
+        self.capacities = np.unique(catalog.capacity).tolist()
+        self.capacity_masks = [_bitset(catalog.capacity >= c) for c in self.capacities] + [0]
+
+    def mask(self, cuisine: Optional[str]=None, seats: Optional[int]=None, feature_filters: Optional[List[str]]=None) -> int:
+        mask = self.all_mask
+        if cuisine:
+            mask &= self.by_cuisine.get(cuisine.lower(), 0)
+        if seats and mask:
+            mask &= self.capacity_masks[bisect_left(self.capacities, seats)]
+        if feature_filters:
+            for f in feature_filters:
+                if not mask:
+                    break
+                mask &= self.by_feature.get(f, 0)
+        return mask
+
+    def query(self, cuisine: Optional[str]=None, seats: Optional[int]=None, feature_filters: Optional[List[str]]=None, limit:int=20) -> List['Restaurant']:
+        mask = self.mask(cuisine, seats, feature_filters)
+        results = []
+        while mask and len(results) < limit:
+            low = mask & -mask
+            results.append(self.catalog.restaurant(low.bit_length() - 1))
+            mask ^= low
+        return results
+
+@timed_db('search_restaurants')
 def search_restaurants(cuisine: Optional[str]=None, seats: Optional[int]=None, feature_filters: Optional[List[str]]=None, limit:int=20):
-    results = list(RESTAURANTS.values())
-    if cuisine:
-        results = [r for r in results if r.cuisine.lower() == cuisine.lower()]
-    if seats:
-        results = [r for r in results if r.capacity >= seats]
-    if feature_filters:
-        results = [r for r in results if all(f in r.features for f in feature_filters)]
-    return results[:limit]
+    return snapshot().search_index.query(cuisine, seats, feature_filters, limit)
+
+@timed_db('find_nearby_restaurants')
+def find_nearby_restaurants(lat: float, lon: float, radius_km: Optional[float]=None, cuisine: Optional[str]=None, seats: Optional[int]=None, feature_filters: Optional[List[str]]=None, limit:int=5) -> List[Tuple['Restaurant', float]]:
+    """Closest matching restaurants as (restaurant, distance_km), nearest first."""
+    geo_index = snapshot().geo_index
+    if radius_km:
+        return geo_index.within_radius(lat, lon, radius_km, cuisine, seats, feature_filters, limit)
+    return geo_index.nearest(lat, lon, limit, cuisine, seats, feature_filters)
+
+_name_index = None
+_name_index_lock = threading.Lock()
+
+def name_index():
+    """
+    NameIndex over the current catalog. Built on first use rather than in
+    startup() (only bookings need it) and rebuilt only if the catalog changes.
+    """
+    global _name_index
+    catalog = snapshot().catalog
+    index = _name_index
+    if index is None or index.catalog is not catalog:
+        with _name_index_lock:
+            if _name_index is None or _name_index.catalog is not catalog:
+                from names import NameIndex
+                _name_index = NameIndex(catalog)
+            index = _name_index
+    return index
+
+def _rebuild_name_index(old, new):
+    # Called by reload_catalog() before the swap, so bookings never build it
+    # themselves. Kept as is when no id or name changed (capacity edits).
+    global _name_index
+    if _name_index is None or _name_index.catalog is not old:
+        return
+    if new.same_columns(old, ('id', 'name_offsets', 'name_blob')):
+        index = copy.copy(_name_index)
+        index.catalog = new
+    else:
+        from names import NameIndex
+        index = NameIndex(new)
+    with _name_index_lock:
+        _name_index = index
+
+@timed_db('find_restaurants_by_name')
+def find_restaurants_by_name(text: str, limit: int=5) -> List[Tuple[int, float]]:
+    """(restaurant_id, score) for restaurants named in free text, best first; see names.NameIndex.match."""
+    index = name_index()
+    ids = index.catalog.ids
+    return [(int(ids[pos]), score) for pos, score in index.match(text, limit)]
 
 def _get_conn():
-    return sqlite3.connect(DB_PATH)
+    # Pooled per-thread connection; it stays open between calls.
+    startup()
+    return get_conn()
 
-def check_availability(restaurant_id:int, dt:datetime, seats:int) -> bool:
-    # Simple rule: count confirmed seats in a 2-hour window from dt hour-start
-    conn = _get_conn()
-    c = conn.cursor()
-    window_start = dt.replace(minute=0, second=0, microsecond=0)
-    window_end = window_start + timedelta(hours=2)
+# Striped per-restaurant locks: concurrent bookings for the same restaurant
+# queue here instead of spinning on the SQLite write lock, while bookings for
+# different restaurants only contend for the short BEGIN IMMEDIATE section.
+BOOKING_LOCK_STRIPES = 64
+_booking_locks = [threading.Lock() for _ in range(BOOKING_LOCK_STRIPES)]
+
+def _booking_lock(restaurant_id:int):
+    return _booking_locks[restaurant_id % BOOKING_LOCK_STRIPES]
+
+def _seating(restaurant_id:int) -> Tuple[int, int, int]:
+    # (capacity, dining seconds, slot seconds) straight from the catalog columns.
+    catalog = snapshot().catalog
+    pos = catalog.position(restaurant_id)
+    if pos is None:
+        raise KeyError(restaurant_id)
+    return catalog.capacity.item(pos), catalog.dining_minutes.item(pos) * 60, catalog.slot_minutes.item(pos) * 60
+
+def _seated_peak(c, restaurant_id:int, lo:int, hi:int, slot:int) -> int:
+    # Confirmed bookings overlapping [lo, hi), swept for the most seated at
+    # once. No seating lasts longer than MAX_SEATING_SECONDS, which turns
+    # the overlap test into a short range scan on the covering index.
     c.execute('''
-        SELECT COALESCE(SUM(seats),0) FROM reservations
-        WHERE restaurant_id=? AND status='confirmed' AND datetime>=? AND datetime<? 
-    ''', (restaurant_id, window_start.isoformat(), window_end.isoformat()))
-    booked = c.fetchone()[0] or 0
-    conn.close()
-    cap = RESTAURANTS[restaurant_id].capacity
+        SELECT start_ts, end_ts, seats FROM reservations
+        WHERE restaurant_id=? AND status='confirmed' AND start_ts>? AND start_ts<? AND end_ts>?
+    ''', (restaurant_id, lo - MAX_SEATING_SECONDS, hi, lo))
+    return peak_seats(((start - start % slot, end, seats) for start, end, seats in c.fetchall()), lo, hi)
+
+_last_sync = 0.0
+
+def sync_occupancy():
+    # Pick up bookings/cancellations committed by any process since last time.
+    global _last_sync
+    OCCUPANCY.sync(_get_conn())
+    _last_sync = time.monotonic()
+
+@timed_db('check_availability')
+def check_availability(restaurant_id:int, dt:datetime, seats:int) -> bool:
+    # Answered from the in-memory index; create_reservation re-checks in the DB.
+    if time.monotonic() - _last_sync > OCCUPANCY_MAX_LAG_SECONDS:
+        sync_occupancy()
+    cap, dining, slot = _seating(restaurant_id)
+    booked = OCCUPANCY.peak(restaurant_id, *seating_interval(to_epoch(dt), dining, slot))
     return (booked + seats) <= cap
 
+@timed_db('create_reservation')
 def create_reservation(restaurant_id:int, dt:datetime, seats:int, name:str, phone:Optional[str]=None, email:Optional[str]=None):
-    if not check_availability(restaurant_id, dt, seats):
-        return None
-    conn = _get_conn()
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO reservations (restaurant_id, datetime, seats, name, phone, email, status)
-        VALUES (?, ?, ?, ?, ?, ?, 'confirmed')
-    ''', (restaurant_id, dt.isoformat(), seats, name, phone, email))
-    conn.commit()
-    rid = c.lastrowid
-    conn.close()
+    # The capacity check and the INSERT share one write transaction, so two
+    # concurrent requests can never both pass the check and overbook.
+    from schema import Reservation
+    if seats < 1:
+        # A non-positive party would free seats for everyone else.
+        raise ValueError('seats must be at least 1')
+    startup()
+    cap, dining, slot = _seating(restaurant_id)
+    start_ts = to_epoch(dt)
+    lo, hi = seating_interval(start_ts, dining, slot)
+    with _booking_lock(restaurant_id), transaction() as conn:
+        c = conn.cursor()
+        if _seated_peak(c, restaurant_id, lo, hi, slot) + seats > cap:
+            return None
+        c.execute('''
+            INSERT INTO reservations (restaurant_id, datetime, start_ts, end_ts, seats, name, phone, email, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'confirmed')
+        ''', (restaurant_id, dt.isoformat(), start_ts, hi, seats, name, phone, email))
+        rid = c.lastrowid
+    sync_occupancy()
     return Reservation(id=rid, restaurant_id=restaurant_id, datetime=dt, seats=seats, name=name, phone=phone, email=email)
 
-def cancel_reservation(reservation_id:int) -> bool:
-    conn = _get_conn()
-    c = conn.cursor()
-    c.execute('SELECT id FROM reservations WHERE id=?', (reservation_id,))
-    row = c.fetchone()
-    if not row:
-        conn.close()
-        return False
-    c.execute('UPDATE reservations SET status="cancelled" WHERE id=?', (reservation_id,))
-    conn.commit()
-    conn.close()
-    return True
+BATCH_MODES = ('all_or_nothing', 'best_effort')
+# Distinct (restaurant, interval) pairs checked per capacity query; 4 bound
+# parameters each keeps a query well under SQLite's variable limit.
+BATCH_WINDOWS_PER_QUERY = 200
 
-def list_reservations():
-    conn = _get_conn()
-    c = conn.cursor()
-    c.execute('SELECT id, restaurant_id, datetime, seats, name, phone, email, status FROM reservations ORDER BY id DESC LIMIT 200')
-    rows = c.fetchall()
-    conn.close()
+def _seated_in_windows(c, windows:List[Tuple[int, int, int]]) -> Dict[Tuple[int, int, int], List[Tuple[int, int, int]]]:
+    """Confirmed (start_ts, end_ts, seats) overlapping each (restaurant_id, lo, hi), one query per chunk."""
+    seated = {w: [] for w in windows}
+    for i in range(0, len(windows), BATCH_WINDOWS_PER_QUERY):
+        chunk = windows[i:i + BATCH_WINDOWS_PER_QUERY]
+        values = ','.join(['(?,?,?,?)'] * len(chunk))
+        c.execute(f'''
+            WITH req(restaurant_id, lo, hi, since) AS (VALUES {values})
+            SELECT req.restaurant_id, req.lo, req.hi, r.start_ts, r.end_ts, r.seats
+            FROM req JOIN reservations r
+              ON r.restaurant_id=req.restaurant_id AND r.status='confirmed'
+             AND r.start_ts>req.since AND r.start_ts<req.hi AND r.end_ts>req.lo
+        ''', [v for rid, lo, hi in chunk for v in (rid, lo, hi, lo - MAX_SEATING_SECONDS)])
+        for rid, lo, hi, start, end, seats in c.fetchall():
+            seated[(rid, lo, hi)].append((start, end, seats))
+    return seated
+
+@timed_db('create_reservations_batch')
+def create_reservations_batch(items:List[Dict], mode:str='all_or_nothing') -> List[Dict]:
+    """
+    Book many tables in one write transaction.
+
+    Each item takes create_reservation's arguments as keys (restaurant_id,
+    datetime, seats, name, phone, email). Capacity for every requested slot
+    is read in one query, the items are checked in order against it (so
+    earlier items in the batch count against later ones, exactly as if
+    they had been booked one by one), and the accepted ones are written
+    in the same transaction with one COMMIT.
+
+    Returns one result per item, in order: {'index', 'status',
+    'reservation'}, where status is 'confirmed', 'fully_booked',
+    'unknown_restaurant', 'invalid_seats' or, in all_or_nothing mode when
+    any item failed, 'not_booked' for the items that would have fit.
+    """
+    if mode not in BATCH_MODES:
+        raise ValueError(f"mode must be one of {', '.join(BATCH_MODES)}")
+    from schema import Reservation
+    catalog = snapshot().catalog
     results = []
-    for r in rows:
-        results.append({
-            'id': r[0],
-            'restaurant_id': r[1],
-            'datetime': r[2],
-            'seats': r[3],
-            'name': r[4],
-            'phone': r[5],
-            'email': r[6],
-            'status': r[7]
-        })
+    pending = []
+    for i, item in enumerate(items):
+        rid, seats, dt = int(item['restaurant_id']), int(item['seats']), item['datetime']
+        result = {'index': i, 'status': 'confirmed', 'reservation': None}
+        results.append(result)
+        pos = catalog.position(rid)
+        if pos is None:
+            result['status'] = 'unknown_restaurant'
+        elif seats < 1:
+            result['status'] = 'invalid_seats'
+        else:
+            start_ts = to_epoch(dt)
+            slot = int(catalog.slot_minutes[pos]) * 60
+            window = seating_interval(start_ts, int(catalog.dining_minutes[pos]) * 60, slot)
+            pending.append((result, item, (rid, *window), start_ts, seats, int(catalog.capacity[pos]), slot))
+    if not pending or (mode == 'all_or_nothing' and len(pending) < len(items)):
+        for result, *_ in pending:
+            result['status'] = 'not_booked'
+        return results
+
+    stripes = sorted({key[0] % BOOKING_LOCK_STRIPES for _, _, key, *_ in pending})
+    booked_items = []
+    with ExitStack() as stack:
+        # Every stripe the batch touches, in a fixed order so two batches
+        # can't deadlock; single bookings still only take their own.
+        for stripe in stripes:
+            stack.enter_context(_booking_locks[stripe])
+        conn = stack.enter_context(transaction())
+        c = conn.cursor()
+        seated = _seated_in_windows(c, sorted({key for _, _, key, *_ in pending}))
+        accepted: Dict[int, List[Tuple[int, int, int]]] = {}
+        rows = []
+        for result, item, (rid, lo, hi), start_ts, seats, cap, slot in pending:
+            intervals = [(start - start % slot, end, n) for start, end, n in seated[(rid, lo, hi)]]
+            if peak_seats(intervals + accepted.get(rid, []), lo, hi) + seats > cap:
+                result['status'] = 'fully_booked'
+                continue
+            accepted.setdefault(rid, []).append((lo, hi, seats))
+            booked_items.append((result, item, rid, seats))
+            rows.append((rid, item['datetime'].isoformat(), start_ts, hi, seats,
+                         item.get('name') or 'Guest', item.get('phone'), item.get('email')))
+
+        if mode == 'all_or_nothing' and len(rows) < len(pending):
+            for result, *_ in booked_items:
+                result['status'] = 'not_booked'
+            return results
+        # One INSERT per row so each row's id is read back as it is written;
+        # the batch still commits once.
+        ids = []
+        for row in rows:
+            c.execute('''
+                INSERT INTO reservations (restaurant_id, datetime, start_ts, end_ts, seats, name, phone, email, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'confirmed')
+            ''', row)
+            ids.append(c.lastrowid)
+
+    for new_id, (result, item, rid, seats) in zip(ids, booked_items):
+        result['reservation'] = Reservation(id=new_id, restaurant_id=rid, datetime=item['datetime'], seats=seats,
+                                            name=item.get('name') or 'Guest', phone=item.get('phone'), email=item.get('email'))
+    if rows:
+        sync_occupancy()
     return results
+
+@timed_db('cancel_reservation')
+def cancel_reservation(reservation_id:int) -> bool:
+    startup()
+    with transaction() as conn:
+        c = conn.cursor()
+        c.execute('SELECT id FROM reservations WHERE id=?', (reservation_id,))
+        row = c.fetchone()
+        if not row:
+            return False
+        c.execute("UPDATE reservations SET status='cancelled' WHERE id=?", (reservation_id,))
+    sync_occupancy()
+    return True
+
+RESERVATION_COLUMNS = ('id', 'restaurant_id', 'datetime', 'seats', 'name', 'phone', 'email', 'status')
+_SELECT_RESERVATIONS = f"SELECT {', '.join(RESERVATION_COLUMNS)} FROM reservations"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def _like_prefix(text:str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+@timed_db('list_reservations_page')
+def list_reservations_page(restaurant_id:Optional[int]=None, status:Optional[str]=None,
+                           date_from:Optional[datetime]=None, date_to:Optional[datetime]=None,
+                           name:Optional[str]=None, phone:Optional[str]=None,
+                           before_id:Optional[int]=None, limit:int=DEFAULT_PAGE_SIZE) -> Dict:
+    """
+    One page of reservations, newest first, matching every filter given.
+
+    Pages are keyset-paginated on id: pass the returned next_cursor back
+    as before_id for the next page. Unlike OFFSET this costs the same on
+    page 1000 as on page 1 and never skips or repeats rows when bookings
+    arrive between requests. date_from/date_to bound the reservation time
+    (from inclusive, to exclusive), name matches case-insensitively by
+    prefix, phone exactly.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    where, args = [], []
+    if restaurant_id is not None:
+        where.append('restaurant_id=?')
+        args.append(int(restaurant_id))
+    if status:
+        where.append('status=?')
+        args.append(status)
+    if date_from is not None:
+        where.append('start_ts>=?')
+        args.append(to_epoch(date_from))
+    if date_to is not None:
+        where.append('start_ts<?')
+        args.append(to_epoch(date_to))
+    if name:
+        where.append("name LIKE ? ESCAPE '\\'")
+        args.append(_like_prefix(name))
+    if phone:
+        where.append('phone=?')
+        args.append(phone)
+    if before_id is not None:
+        where.append('id<?')
+        args.append(int(before_id))
+    sql = _SELECT_RESERVATIONS
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    # One extra row tells us whether another page exists.
+    rows = _get_conn().execute(sql + ' ORDER BY id DESC LIMIT ?', (*args, limit + 1)).fetchall()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'reservations': [dict(zip(RESERVATION_COLUMNS, r)) for r in rows],
+        'next_cursor': rows[-1][0] if more else None,
+    }
+
+def list_reservations(limit:int=MAX_PAGE_SIZE, **filters) -> List[Dict]:
+    """The newest reservations matching `filters` (see list_reservations_page), first page only."""
+    return list_reservations_page(limit=limit, **filters)['reservations']
+
+@timed_db('latest_reservation')
+def latest_reservation(restaurant_id:int, status:str='confirmed') -> Optional[Dict]:
+    """The most recent reservation at a restaurant with this status: one index seek."""
+    row = _get_conn().execute(
+        _SELECT_RESERVATIONS + ' WHERE restaurant_id=? AND status=? ORDER BY id DESC LIMIT 1',
+        (restaurant_id, status),
+    ).fetchone()
+    return dict(zip(RESERVATION_COLUMNS, row)) if row else None
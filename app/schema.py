@@ -11,6 +11,9 @@ class Restaurant(BaseModel):
     capacity: int
     cuisine: str
     features: List[str] = []
+    # How long a table is held per booking, and the booking grid it is held on.
+    dining_minutes: int = 120
+    slot_minutes: int = 15
 
 class Reservation(BaseModel):
     id: int
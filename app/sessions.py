@@ -0,0 +1,140 @@
+"""
+Per-conversation state for multi-turn chats.
+
+A Session remembers what the conversation has already established: the
+restaurants last shown (in the order shown), the restaurant chosen, the
+booking parameters so far and the reservation made. Follow-ups such as
+"book the second one" or "make it 8pm instead" are then answered from
+that state (see intent_router.route_followup) without an LLM call, a new
+search or a scan of restaurant names; anything else goes to the LLM with
+Session state condensed to one line (see agent.context_summary).
+
+The default store keeps sessions in memory, evicting the least recently
+used. GOODFOODS_SESSIONS=sqlite keeps them in the reservations database
+instead, so every worker process sees the same conversation and sessions
+survive restarts; the HTTP API (api.py) uses that unless told otherwise.
+"""
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+# A plain dataclass rather than a pydantic model: agent imports this module,
+# and pydantic stays unloaded until the API or the LLM path needs it.
+@dataclass
+class Session:
+    id: str
+    # Restaurant ids from the last search, in the order they were shown.
+    results: List[int] = field(default_factory=list)
+    restaurant_id: Optional[int] = None
+    # Booking parameters so far: seats, datetime (ISO), cuisine, name, phone, email.
+    booking: Dict[str, Any] = field(default_factory=dict)
+    # The confirmed reservation a change ("make it 8pm instead") replaces.
+    reservation_id: Optional[int] = None
+    updated_at: float = 0.0
+
+    def has_context(self) -> bool:
+        return bool(self.results or self.restaurant_id is not None or self.booking)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "Session":
+        return cls(**json.loads(text))
+
+
+class SessionStore:
+    """
+    Bounded LRU of sessions with an idle TTL. With persistent=True every
+    get/save goes to the sessions table instead (one primary-key lookup or
+    upsert), and expired rows are pruned every `prune_every` saves.
+    """
+
+    def __init__(self, max_sessions: int = 10_000, ttl_seconds: float = 2 * 3600,
+                 persistent: bool = False, prune_every: int = 1000):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.prune_every = prune_every
+        self._saves = 0
+        self._migrated = False
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _migrate(self):
+        # The sessions table comes from a DB migration. The API and Streamlit
+        # run them in reservations.startup(), but a script that goes straight
+        # to handle_user_message(text, session_id) reaches the store first.
+        if not self._migrated:
+            from db import init_db
+            init_db()
+            self._migrated = True
+
+    def get(self, session_id: str) -> Session:
+        """The session's state, or a fresh Session if it is unknown or expired."""
+        cutoff = time.time() - self.ttl_seconds
+        if self.persistent:
+            from db import get_conn
+            self._migrate()
+            row = get_conn().execute(
+                "SELECT state FROM sessions WHERE id=? AND updated_at>=?", (session_id, int(cutoff))
+            ).fetchone()
+            return Session.from_json(row[0]) if row else Session(id=session_id)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.updated_at < cutoff:
+                return Session(id=session_id)
+            self._sessions.move_to_end(session_id)
+            # A copy, so a message that fails halfway leaves the stored state alone.
+            return copy.deepcopy(session)
+
+    def save(self, session: Session):
+        session.updated_at = time.time()
+        if self.persistent:
+            from db import transaction
+            self._migrate()
+            with transaction() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (id, state, updated_at) VALUES (?, ?, ?)",
+                    (session.id, session.to_json(), int(session.updated_at)),
+                )
+                self._saves += 1
+                if self._saves % self.prune_every == 0:
+                    conn.execute("DELETE FROM sessions WHERE updated_at < ?", (int(time.time() - self.ttl_seconds),))
+            return
+        with self._lock:
+            self._sessions[session.id] = session
+            self._sessions.move_to_end(session.id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str):
+        if self.persistent:
+            from db import transaction
+            self._migrate()
+            with transaction() as conn:
+                conn.execute("DELETE FROM sessions WHERE id=?", (session_id,))
+            return
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        if self.persistent:
+            from db import get_conn
+            self._migrate()
+            return get_conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        with self._lock:
+            return len(self._sessions)
+
+
+SESSIONS = SessionStore(
+    max_sessions=int(os.getenv("GOODFOODS_SESSION_MAX", "10000")),
+    ttl_seconds=float(os.getenv("GOODFOODS_SESSION_TTL", str(2 * 3600))),
+    persistent=os.getenv("GOODFOODS_SESSIONS", "memory").lower() == "sqlite",
+)
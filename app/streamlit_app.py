@@ -1,8 +1,17 @@
+import uuid
+
 import streamlit as st
-from agent import handle_user_message
-from reservations import list_reservations
+from agent import handle_user_message, startup
+from reservations import list_reservations_page, watch_catalog
 from pathlib import Path
 
+# Idempotent; loads the DB and catalog once per server process, and the
+# watcher reloads the catalog when restaurants.json changes.
+startup()
+watch_catalog()
+
+ADMIN_PAGE_SIZE = 20
+
 st.set_page_config(page_title='GoodFoods Reservation Assistant', layout='wide')
 st.title("🧀 GoodFoods — Reservation Assistant")
 
@@ -11,6 +20,9 @@ if 'history' not in st.session_state:
     st.session_state.history = []
 if 'user_input' not in st.session_state:
     st.session_state.user_input = ""
+# One agent session per browser session, so follow-ups keep their context.
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 col1, col2 = st.columns([3,1])
 
@@ -26,7 +38,7 @@ with col1:
 
     if send and user_input.strip():
         st.session_state.history.append({"role":"user","text":user_input})
-        reply = handle_user_message(user_input)
+        reply = handle_user_message(user_input, st.session_state.session_id)
         st.session_state.history.append({"role":"assistant","text":reply})
         st.session_state.user_input = ""
         st.rerun()  # Rerun to clear the input
@@ -44,13 +56,37 @@ with col1:
 
 with col2:
     st.subheader("Admin")
-    if st.button("Show recent reservations"):
-        rows = list_reservations()
-        if not rows:
-            st.write("No reservations yet.")
-        else:
-            for r in rows:
-                st.write(f"#{r['id']} | Rest {r['restaurant_id']} | {r['datetime']} | seats {r['seats']} | {r['name']} | {r['status']}")
+    # Keyset paging: admin_pages holds the before_id cursor of every page
+    # visited so far, so "Newer" just pops back to the previous one.
+    if 'admin_pages' not in st.session_state:
+        st.session_state.admin_pages = [None]
+    rest_filter = st.text_input("Restaurant code", key='admin_restaurant')
+    status_filter = st.selectbox("Status", ["any", "confirmed", "cancelled"], key='admin_status')
+    name_filter = st.text_input("Customer name starts with", key='admin_name')
+    filters = {
+        'restaurant_id': int(rest_filter) if rest_filter.strip().isdigit() else None,
+        'status': None if status_filter == "any" else status_filter,
+        'name': name_filter.strip() or None,
+    }
+    if st.session_state.get('admin_filters') != filters:
+        st.session_state.admin_filters = filters
+        st.session_state.admin_pages = [None]
+
+    page = list_reservations_page(before_id=st.session_state.admin_pages[-1], limit=ADMIN_PAGE_SIZE, **filters)
+    rows = page['reservations']
+    if not rows:
+        st.write("No reservations found.")
+    for r in rows:
+        st.write(f"#{r['id']} | Rest {r['restaurant_id']} | {r['datetime']} | seats {r['seats']} | {r['name']} | {r['status']}")
+
+    newer, older = st.columns(2)
+    if newer.button("← Newer", disabled=len(st.session_state.admin_pages) == 1):
+        st.session_state.admin_pages.pop()
+        st.rerun()
+    if older.button("Older →", disabled=page['next_cursor'] is None):
+        st.session_state.admin_pages.append(page['next_cursor'])
+        st.rerun()
+    st.caption(f"Page {len(st.session_state.admin_pages)}")
     st.markdown("---")
     st.write("Dataset: data/restaurants.json")
     if Path('../data/restaurants.json').exists():
@@ -0,0 +1,80 @@
+"""
+Alternatives to offer when a requested slot is fully booked.
+
+Everything is answered from the in-memory catalog and occupancy index: each
+candidate time or restaurant is one peak query over the seating interval a
+booking there would hold (that restaurant's dining duration, on its slot
+grid), so evaluating dozens of candidates never goes back to SQLite.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from db import to_epoch
+from metrics import timed_db
+import reservations
+from occupancy import seating_interval
+from reservations import OCCUPANCY
+
+# Hours in which a table can start; candidate times outside are skipped.
+FIRST_SEATING_HOUR = 11
+LAST_SEATING_HOUR = 22
+# How far either side of the requested time to look for open slots.
+SEARCH_SPAN_HOURS = 4
+
+
+def open_slots(restaurant_id: int, dt: datetime, seats: int, limit: int = 3,
+               now: Optional[datetime] = None) -> List[datetime]:
+    """Nearest start times to dt (same minute past the hour) that can seat the party."""
+    now = now or datetime.now()
+    cap, dining, slot_seconds = reservations._seating(restaurant_id)
+    span = SEARCH_SPAN_HOURS
+    candidates = []
+    for offset in range(-span, span + 1):
+        if offset == 0:
+            continue
+        slot = dt + timedelta(hours=offset)
+        if slot <= now or not FIRST_SEATING_HOUR <= slot.hour <= LAST_SEATING_HOUR:
+            continue
+        lo, hi = seating_interval(to_epoch(slot), dining, slot_seconds)
+        if OCCUPANCY.peak(restaurant_id, lo, hi) + seats <= cap:
+            candidates.append((abs(offset), offset, slot))
+    candidates.sort()
+    return [slot for _, _, slot in candidates[:limit]]
+
+
+def alternative_restaurants(restaurant_id: int, dt: datetime, seats: int,
+                            limit: int = 3) -> List[Dict[str, Any]]:
+    """Closest restaurants with the same cuisine that are free at dt."""
+    import numpy as np
+    from geo import haversine_km_np
+
+    catalog = reservations.snapshot().catalog
+    origin = catalog.position(restaurant_id)
+    if origin is None:
+        raise KeyError(restaurant_id)
+    # Cuisine and size are filtered on the catalog columns; only the
+    # survivors are checked against the occupancy index, nearest first.
+    candidates = np.flatnonzero((catalog.cuisine == catalog.cuisine[origin]) & (catalog.capacity >= seats))
+    candidates = candidates[candidates != origin]
+    dist = haversine_km_np(float(catalog.lat[origin]), float(catalog.lon[origin]),
+                           catalog.lat[candidates], catalog.lon[candidates])
+    start_ts = to_epoch(dt)
+    found = []
+    for i in np.argsort(dist, kind='stable'):
+        pos = int(candidates[i])
+        lo, hi = seating_interval(start_ts, int(catalog.dining_minutes[pos]) * 60, int(catalog.slot_minutes[pos]) * 60)
+        if OCCUPANCY.peak(int(catalog.ids[pos]), lo, hi) + seats > catalog.capacity[pos]:
+            continue
+        found.append({'restaurant': catalog.restaurant(pos), 'distance_km': round(float(dist[i]), 2)})
+        if len(found) == limit:
+            break
+    return found
+
+
+@timed_db('suggest_alternatives')
+def suggest_alternatives(restaurant_id: int, dt: datetime, seats: int,
+                         now: Optional[datetime] = None) -> Dict[str, Any]:
+    return {
+        'times': open_slots(restaurant_id, dt, seats, now=now),
+        'restaurants': alternative_restaurants(restaurant_id, dt, seats),
+    }
@@ -4,9 +4,11 @@ MCP-style tool registry and specs for the GoodFoods reservation agent.
 
 This file defines:
 - TOOL_SPECS: metadata & JSON schemas for tools
+- register_tool(): add/replace a tool and invalidate the cached prompt
 - list_tools_for_prompt(): renders tools in a format the LLM can use
 """
 
+import json
 from typing import Dict, Any, List
 
 TOOL_SPECS: Dict[str, Dict[str, Any]] = {
@@ -27,6 +29,27 @@ TOOL_SPECS: Dict[str, Dict[str, Any]] = {
             "additionalProperties": False
         }
     },
+    "find_nearby_restaurants": {
+        "description": "Find the restaurants closest to a location, optionally within a radius and filtered by cuisine, party size, and features.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "lat": {"type": "number", "description": "Latitude of the user's location"},
+                "lon": {"type": "number", "description": "Longitude of the user's location"},
+                "radius_km": {"type": "number", "description": "Only return restaurants within this many km"},
+                "limit": {"type": "integer", "description": "Maximum number of restaurants to return (default 5)"},
+                "cuisine": {"type": "string", "description": "Preferred cuisine, e.g. 'Italian'"},
+                "seats": {"type": "integer", "description": "Number of people"},
+                "features": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Desired features, e.g. ['outdoor', 'parking']"
+                }
+            },
+            "required": ["lat", "lon"],
+            "additionalProperties": False
+        }
+    },
     "create_reservation": {
         "description": "Create a reservation at a restaurant for a specific date/time.",
         "inputSchema": {
@@ -47,6 +70,37 @@ TOOL_SPECS: Dict[str, Dict[str, Any]] = {
             "additionalProperties": False
         }
     },
+    "create_reservations_batch": {
+        "description": "Book several tables at once (events, corporate groups). Each booking is checked and saved together; mode 'all_or_nothing' books none unless all fit, 'best_effort' books the ones that fit.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "reservations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "restaurant_id": {"type": "integer", "description": "ID of the restaurant"},
+                            "seats": {"type": "integer", "description": "Number of people at this table"},
+                            "datetime": {"type": "string", "description": "ISO 8601 datetime string"},
+                            "name": {"type": "string", "description": "Name for the reservation"},
+                            "phone": {"type": "string", "description": "Phone number"},
+                            "email": {"type": "string", "description": "Email address"}
+                        },
+                        "required": ["restaurant_id", "seats", "datetime"]
+                    },
+                    "description": "The bookings to make"
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": ["all_or_nothing", "best_effort"],
+                    "description": "Default 'all_or_nothing'"
+                }
+            },
+            "required": ["reservations"],
+            "additionalProperties": False
+        }
+    },
     "cancel_reservation": {
         "description": "Cancel an existing reservation by its numeric ID.",
         "inputSchema": {
@@ -59,10 +113,19 @@ TOOL_SPECS: Dict[str, Dict[str, Any]] = {
         }
     },
     "list_reservations": {
-        "description": "List recent reservations for admin/debug purposes.",
+        "description": "List reservations, newest first, optionally filtered. For admin/debug purposes.",
         "inputSchema": {
             "type": "object",
-            "properties": {},
+            "properties": {
+                "restaurant_id": {"type": "integer", "description": "Only this restaurant"},
+                "status": {"type": "string", "enum": ["confirmed", "cancelled"], "description": "Only this status"},
+                "date_from": {"type": "string", "description": "ISO 8601; reservations at or after this time"},
+                "date_to": {"type": "string", "description": "ISO 8601; reservations before this time"},
+                "name": {"type": "string", "description": "Customer name (prefix, case-insensitive)"},
+                "phone": {"type": "string", "description": "Customer phone number"},
+                "before_id": {"type": "integer", "description": "Page cursor: next_cursor from the previous page"},
+                "limit": {"type": "integer", "description": "Page size (default 50, max 200)"}
+            },
             "required": [],
             "additionalProperties": False
         }
@@ -81,25 +144,38 @@ TOOL_SPECS: Dict[str, Dict[str, Any]] = {
 }
 
 
+# Bumped by register_tool(); prompts.py rebuilds its cached prompt when it changes.
+TOOL_SPECS_VERSION = 0
+
+
+def register_tool(name: str, spec: Dict[str, Any]) -> None:
+    """
+    Add or replace a tool. Always go through this rather than mutating
+    TOOL_SPECS directly, so the cached system prompt is invalidated.
+    """
+    global TOOL_SPECS_VERSION
+    TOOL_SPECS[name] = spec
+    TOOL_SPECS_VERSION += 1
+
+
+def _compact_schema(schema: Dict[str, Any]) -> str:
+    # Every inputSchema is a closed object; that is stated once in the prompt
+    # instead of repeating "type"/"additionalProperties" for every tool.
+    body = {k: v for k, v in schema.items() if k not in ("type", "additionalProperties")}
+    return json.dumps(body, separators=(",", ":"), ensure_ascii=False)
+
+
 def list_tools_for_prompt() -> str:
     """
     Render the tools in a text format to inject into the system prompt,
-    MCP-style: name, description, and JSON schema.
+    MCP-style: name, description, and JSON schema (as compact JSON).
     """
     lines: List[str] = []
-    lines.append("You have access to the following tools (MCP-style):")
-    for name, spec in TOOL_SPECS.items():
-        lines.append(f"- Tool name: {name}")
-        lines.append(f"  Description: {spec['description']}")
-        lines.append("  Input JSON schema:")
-        lines.append(f"  {spec['inputSchema']}")
-        lines.append("")
     lines.append(
-        "When you decide what to do, respond with a SINGLE JSON object:\n"
-        "{\n"
-        '  "intent": "<tool_name>",\n'
-        '  "params": { ... arguments according to the inputSchema ... }\n'
-        "}\n"
-        "Do NOT include any other text outside the JSON."
+        "You have access to the following tools (MCP-style). Each input schema is a "
+        "JSON object schema; do not add params that are not listed in its properties."
     )
+    for name, spec in TOOL_SPECS.items():
+        lines.append(f"- {name}: {spec['description']}")
+        lines.append(f"  input: {_compact_schema(spec['inputSchema'])}")
     return "\n".join(lines)
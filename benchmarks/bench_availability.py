@@ -0,0 +1,119 @@
+"""
+Availability-check latency versus reservations table size.
+
+Seeds a throwaway database with N synthetic reservations and times the
+capacity query behind check_availability (the most seats held at once
+during the booking's seating interval) three ways: the in-memory occupancy
+index, SQLite through the covering index with the sweep in Python, and
+SQLite forced to scan (the pre-migration behaviour):
+
+    python benchmarks/bench_availability.py                    # 10k and 1M rows
+    python benchmarks/bench_availability.py --sizes 10000 1000000 10000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+TMP_DIR = tempfile.mkdtemp(prefix='goodfoods-bench-')
+os.environ['GOODFOODS_DB_PATH'] = str(Path(TMP_DIR) / 'bench.db')
+
+import db  # noqa: E402
+import reservations  # noqa: E402
+from occupancy import MAX_SEATING_SECONDS, peak_seats, seating_interval  # noqa: E402
+
+SCAN_SQL = '''
+    SELECT start_ts, end_ts, seats FROM reservations NOT INDEXED
+    WHERE restaurant_id=? AND status='confirmed' AND start_ts>? AND start_ts<? AND end_ts>?
+'''
+BASE_DAY = datetime(2030, 1, 1)
+
+
+def seed(n, restaurant_ids, days=365, batch=100_000):
+    rng = random.Random(n)
+    conn = db.get_conn()
+    conn.execute('DELETE FROM reservations')
+    sql = '''
+        INSERT INTO reservations (restaurant_id, datetime, start_ts, end_ts, seats, name, phone, email, status)
+        VALUES (?, ?, ?, ?, ?, 'Bench', NULL, NULL, ?)
+    '''
+    done = 0
+    while done < n:
+        rows = []
+        for _ in range(min(batch, n - done)):
+            dt = BASE_DAY + timedelta(days=rng.randrange(days), hours=rng.randrange(11, 23),
+                                      minutes=rng.choice((0, 15, 30, 45)))
+            status = 'confirmed' if rng.random() < 0.9 else 'cancelled'
+            rid = rng.choice(restaurant_ids)
+            _, dining, slot = reservations._seating(rid)
+            start_ts = db.to_epoch(dt)
+            rows.append((rid, dt.isoformat(), start_ts, seating_interval(start_ts, dining, slot)[1],
+                         rng.randint(1, 8), status))
+        with db.transaction() as c:
+            c.executemany(sql, rows)
+        done += len(rows)
+
+
+def time_queries(fn, probes):
+    samples = []
+    for args in probes:
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000])
+    ap.add_argument('--probes', type=int, default=2000)
+    ap.add_argument('--scan-probes', type=int, default=20, help='probes for the unindexed scan')
+    args = ap.parse_args()
+
+    ids = sorted(reservations.RESTAURANTS)
+    rng = random.Random(0)
+    probes = []
+    for _ in range(args.probes):
+        dt = BASE_DAY + timedelta(days=rng.randrange(365), hours=rng.randrange(11, 23))
+        probes.append((rng.choice(ids), dt))
+
+    conn = db.get_conn()
+
+    def indexed(rid, dt):
+        _, dining, slot = reservations._seating(rid)
+        lo, hi = seating_interval(db.to_epoch(dt), dining, slot)
+        return reservations._seated_peak(conn.cursor(), rid, lo, hi, slot)
+
+    def in_memory(rid, dt):
+        _, dining, slot = reservations._seating(rid)
+        return reservations.OCCUPANCY.peak(rid, *seating_interval(db.to_epoch(dt), dining, slot))
+
+    def scan(rid, dt):
+        _, dining, slot = reservations._seating(rid)
+        lo, hi = seating_interval(db.to_epoch(dt), dining, slot)
+        rows = conn.execute(SCAN_SQL, (rid, lo - MAX_SEATING_SECONDS, hi, lo)).fetchall()
+        return peak_seats(((s - s % slot, e, n) for s, e, n in rows), lo, hi)
+
+    print(f"{'rows':>10}  {'memory p50':>12}  {'indexed p50':>12}  {'indexed p99':>12}  {'scan p50':>12}")
+    for n in args.sizes:
+        t0 = time.perf_counter()
+        seed(n, ids)
+        seeded = time.perf_counter() - t0
+        reservations.OCCUPANCY.load(conn)
+        m50, _ = time_queries(in_memory, probes)
+        p50, p99 = time_queries(indexed, probes)
+        s50, _ = time_queries(scan, probes[:args.scan_probes])
+        print(f"{n:>10}  {m50:>10.1f}us  {p50:>10.1f}us  {p99:>10.1f}us  {s50:>10.1f}us   (seeded in {seeded:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
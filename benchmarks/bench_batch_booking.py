@@ -0,0 +1,103 @@
+"""
+Booking N tables: N create_reservation calls vs one create_reservations_batch.
+
+Each single call does its own capacity query and COMMIT; the batch reads
+capacity for every slot in one query and writes all rows with one
+executemany and one COMMIT. Both run on a fresh throwaway database with the
+same requests (a spread of restaurants, some sharing time slots), and the
+per-item outcomes are checked to be identical.
+
+    python benchmarks/bench_batch_booking.py
+    python benchmarks/bench_batch_booking.py --sizes 10 50 200 1000 --repeat 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+TMP_DIR = tempfile.mkdtemp(prefix='goodfoods-bench-')
+os.environ['GOODFOODS_DB_PATH'] = str(Path(TMP_DIR) / 'bench.db')
+
+import db  # noqa: E402
+import reservations  # noqa: E402
+
+
+def _reset_db():
+    db.close_conn()
+    for suffix in ('', '-wal', '-shm'):
+        p = Path(str(db.DB_PATH) + suffix)
+        if p.exists():
+            p.unlink()
+    db.init_db()
+    reservations.OCCUPANCY.load(db.get_conn())
+
+
+def make_items(n, seed):
+    rng = random.Random(seed)
+    ids = list(reservations.RESTAURANTS)[:max(4, n // 8)]
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=7)
+    return [
+        {
+            'restaurant_id': rng.choice(ids),
+            'datetime': day + timedelta(hours=rng.randrange(18, 22)),
+            'seats': rng.randint(2, 10),
+            'name': f'Event guest {i}',
+        }
+        for i in range(n)
+    ]
+
+
+def run_single(items):
+    _reset_db()
+    t0 = time.perf_counter()
+    outcomes = [
+        reservations.create_reservation(it['restaurant_id'], it['datetime'], it['seats'], it['name']) is not None
+        for it in items
+    ]
+    return time.perf_counter() - t0, outcomes
+
+
+def run_batch(items):
+    _reset_db()
+    t0 = time.perf_counter()
+    results = reservations.create_reservations_batch(items, 'best_effort')
+    return time.perf_counter() - t0, [r['status'] == 'confirmed' for r in results]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200, 1000])
+    ap.add_argument('--repeat', type=int, default=3, help='runs per size; the median is reported')
+    args = ap.parse_args()
+
+    reservations.startup()
+    # One untimed pass of each path first, so the first size doesn't pay for
+    # lazy imports, statement preparation and the first connection.
+    warmup = make_items(args.sizes[0], seed=0)
+    run_single(warmup)
+    run_batch(warmup)
+    print(f"{'tables':>7} {'booked':>7} {'single ms':>10} {'batch ms':>9} {'speedup':>8}")
+    for n in args.sizes:
+        items = make_items(n, seed=n)
+        singles, batches = [], []
+        for _ in range(args.repeat):
+            t_single, single_ok = run_single(items)
+            t_batch, batch_ok = run_batch(items)
+            if single_ok != batch_ok:
+                raise SystemExit(f'batch and single bookings disagree for {n} tables')
+            singles.append(t_single)
+            batches.append(t_batch)
+        single, batch = statistics.median(singles), statistics.median(batches)
+        print(f"{n:>7} {sum(batch_ok):>7} {single * 1e3:>10.1f} {batch * 1e3:>9.1f} {single / batch:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
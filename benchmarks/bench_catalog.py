@@ -0,0 +1,150 @@
+"""
+Catalog load time and memory: pydantic dict from JSON vs columnar snapshot.
+
+Writes a synthetic restaurants.json (pretty-printed like
+generate_restaurants.py) and measures each way of loading it in a fresh
+interpreter:
+
+    json+pydantic   json.load + {id: Restaurant(**r)}  (the old RESTAURANTS)
+    json->columnar  Catalog.from_json, built in process memory
+    snapshot mmap   Catalog.load of the binary snapshot
+
+Memory is read from /proc while --workers processes hold the catalog at
+the same time: "private" is the growth in RssAnon (heap, never shared),
+"mapped" is the snapshot's resident pages in this process, and "mapped Pss"
+charges those shared pages 1/N to each of the N workers mapping them. The
+per-worker cost is private + mapped Pss.
+
+    python benchmarks/bench_catalog.py
+    python benchmarks/bench_catalog.py --sizes 10000 100000 --workers 4
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+MODES = ('json+pydantic', 'json->columnar', 'snapshot mmap')
+
+
+def _proc_kb(path, *fields):
+    out = {}
+    with open(path) as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in fields:
+                out[key] = int(rest.split()[0])
+    return out
+
+
+def mapping_kb(path):
+    """(Rss, Pss) in kB of this process's mappings of `path`."""
+    rss = pss = 0
+    inside = False
+    with open('/proc/self/smaps') as f:
+        for line in f:
+            first = line.split(None, 1)[0]
+            if '-' in first and not first.endswith(':'):
+                inside = line.rstrip().endswith(str(path))
+            elif inside and first == 'Rss:':
+                rss += int(line.split()[1])
+            elif inside and first == 'Pss:':
+                pss += int(line.split()[1])
+    return rss, pss
+
+
+def child(mode, json_path, snapshot):
+    """Load the catalog one way, touch every row, report, then wait for the parent."""
+    import numpy as np  # loaded up front so it isn't counted as catalog memory
+    from catalog import Catalog
+    from schema import Restaurant
+
+    before = _proc_kb('/proc/self/status', 'RssAnon')['RssAnon']
+    t0 = time.perf_counter()
+    if mode == 'json+pydantic':
+        with open(json_path, encoding='utf-8') as f:
+            catalog = {r['id']: Restaurant(**r) for r in json.load(f)}
+        touched = sum(r.capacity for r in catalog.values())
+    else:
+        catalog = Catalog.from_json(json_path) if mode == 'json->columnar' else Catalog.load(snapshot)
+        load = time.perf_counter() - t0
+        # Read one byte of every page of every column, as index builds and
+        # lookups eventually would.
+        touched = sum(int(a.view(np.uint8)[::4096].sum()) for a in catalog._columns.values())
+    elapsed = time.perf_counter() - t0
+    if mode == 'json+pydantic':
+        load = elapsed
+    print(json.dumps({'load': load, 'touch': elapsed - load, 'touched': touched}), flush=True)
+    # Hold the catalog until every worker has loaded, so Pss reflects sharing.
+    sys.stdin.readline()
+    private = _proc_kb('/proc/self/status', 'RssAnon')['RssAnon'] - before
+    rss, pss = mapping_kb(Path(snapshot).resolve())
+    print(json.dumps({'private': private, 'mapped': rss, 'mapped_pss': pss}), flush=True)
+
+
+def run_mode(mode, json_path, snapshot, workers):
+    cmd = [sys.executable, __file__, '--child', mode, '--json', str(json_path), '--snapshot', str(snapshot)]
+    procs, loaded = [], []
+    # Start workers one at a time so load times aren't skewed by contention,
+    # then measure memory while all of them hold the catalog.
+    for _ in range(workers):
+        p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        procs.append(p)
+        loaded.append(json.loads(p.stdout.readline()))
+    for p in procs:
+        p.stdin.write('\n')
+        p.stdin.flush()
+    after = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.wait()
+
+    def mean(values):
+        return sum(values) / workers
+
+    return (mean([l['load'] for l in loaded]), mean([l['touch'] for l in loaded]),
+            *(mean([a[k] for a in after]) / 1024 for k in ('private', 'mapped', 'mapped_pss')))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    ap.add_argument('--workers', type=int, default=4, help='processes holding the catalog at once')
+    ap.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    ap.add_argument('--json', help=argparse.SUPPRESS)
+    ap.add_argument('--snapshot', help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        child(args.child, args.json, args.snapshot)
+        return
+
+    from bench_search import synth_records
+    from catalog import Catalog
+
+    tmp = Path(tempfile.mkdtemp(prefix='goodfoods-catalog-'))
+    print(f"{args.workers} workers hold the catalog concurrently; times are means, memory is MiB per worker")
+    print(f"{'restaurants':>11}  {'mode':<15} {'load':>9} {'touch':>8} {'private':>8} {'mapped':>8} {'mapped Pss':>10}")
+    for n in args.sizes:
+        json_path = tmp / f'restaurants-{n}.json'
+        json_path.write_text(json.dumps(synth_records(n), indent=2), encoding='utf-8')
+        snapshot = json_path.with_suffix('.catalog')
+        t0 = time.perf_counter()
+        catalog = Catalog.from_json(json_path)
+        catalog.save(snapshot)
+        build = time.perf_counter() - t0
+        print(f"{n:>11}  json {json_path.stat().st_size / 2**20:.1f} MiB -> snapshot "
+              f"{snapshot.stat().st_size / 2**20:.1f} MiB in {build * 1e3:.0f}ms")
+        for mode in MODES:
+            load, touch, private, mapped, pss = run_mode(mode, json_path, snapshot, args.workers)
+            print(f"{'':>11}  {mode:<15} {load * 1e3:>7.1f}ms {touch * 1e3:>6.1f}ms "
+                  f"{private:>8.2f} {mapped:>8.2f} {pss:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
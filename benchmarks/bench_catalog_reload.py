@@ -0,0 +1,154 @@
+"""
+Catalog hot reload: cost of a reload, and what readers see while it runs.
+
+Writes a synthetic restaurants.json (generate_data.py), starts up, then:
+
+  restart       a fresh process doing reservations.startup() on the changed
+                file: what every worker paid per catalog change before
+  reload        reload_catalog() in the first worker to notice a change
+                (a child process parses the JSON and writes the snapshot;
+                this one maps it, builds indexes and swaps)
+  reload (mapped)  a worker noticing the same change later: the snapshot is
+                already current, so it maps it and builds indexes
+  readers       search/capacity/lookup latency from a reader thread, idle
+                and while a writer keeps changing the file and reloading;
+                readers take no lock, so any slowdown is GIL sharing with
+                the index build
+
+    python benchmarks/bench_catalog_reload.py
+    python benchmarks/bench_catalog_reload.py --restaurants 10000 --reloads 10
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+TMP = Path(tempfile.mkdtemp(prefix='goodfoods-bench-'))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(TMP / 'bench.db'))
+os.environ['GOODFOODS_RESTAURANTS_JSON'] = str(TMP / 'restaurants.json')
+
+import reservations  # noqa: E402
+from catalog import load_catalog  # noqa: E402
+from generate_data import generate_restaurants  # noqa: E402
+
+
+def bump_capacity(records, step):
+    """The JSON with one more capacity changed (what an operator edit looks like)."""
+    records[step % len(records)]['capacity'] += 1
+    return json.dumps(records).encode('utf-8')
+
+
+def replace_file(path, data):
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def restart_seconds():
+    code = ('import sys, time; sys.path.insert(0, sys.argv[1]); t = time.perf_counter(); '
+            'import reservations; reservations.startup(); print(time.perf_counter() - t)')
+    out = subprocess.run([sys.executable, '-c', code, str(APP_DIR)], capture_output=True, text=True,
+                         env=os.environ, check=True)
+    return float(out.stdout.split()[-1])
+
+
+def read_once(rid):
+    reservations.search_restaurants(cuisine='Italian', seats=4, limit=5)
+    reservations._seating(rid)
+    return reservations.RESTAURANTS[rid]
+
+
+def reader(stop, samples, errors, ids):
+    i = 0
+    while not stop.is_set():
+        rid = ids[i % len(ids)]
+        t = time.perf_counter()
+        try:
+            read_once(rid)
+        except Exception as e:  # a torn snapshot would show up here
+            errors.append(repr(e))
+        samples.append(time.perf_counter() - t)
+        i += 1
+
+
+def reader_latency(seconds, ids, writer=None):
+    stop = threading.Event()
+    samples, errors = [], []
+    t = threading.Thread(target=reader, args=(stop, samples, errors, ids))
+    t.start()
+    if writer:
+        writer()
+    else:
+        time.sleep(seconds)
+    stop.set()
+    t.join()
+    samples.sort()
+    return {
+        'ops': len(samples),
+        'p50_us': statistics.median(samples) * 1e6,
+        'p99_us': samples[int(len(samples) * 0.99)] * 1e6,
+        'max_us': samples[-1] * 1e6,
+        'errors': len(errors),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--restaurants', type=int, default=100_000)
+    ap.add_argument('--reloads', type=int, default=5)
+    args = ap.parse_args()
+
+    path = Path(os.environ['GOODFOODS_RESTAURANTS_JSON'])
+    generate_restaurants(args.restaurants, path, seed=7)
+    records = json.loads(path.read_text(encoding='utf-8'))
+    ids = [r['id'] for r in records[::max(1, len(records) // 1000)]]
+    gc.freeze()  # keep full collections of `records` out of the reader timings
+    reservations.startup()
+    reservations.name_index()
+
+    restarts, reloads, mapped = [], [], []
+    for step in range(args.reloads):
+        replace_file(path, bump_capacity(records, step))
+        restarts.append(restart_seconds())  # the fresh process also rewrites the snapshot
+        replace_file(path, bump_capacity(records, step))
+        t = time.perf_counter()
+        assert reservations.reload_catalog()
+        reloads.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        catalog = load_catalog(path)
+        reservations._build_indexes(catalog)
+        mapped.append(time.perf_counter() - t)
+
+    print(f"{args.restaurants} restaurants, catalog version {reservations.CATALOG_VERSION}")
+    print(f"{'per catalog change':<20} {'median ms':>10}")
+    for label, xs in (('restart', restarts), ('reload', reloads), ('reload (mapped)', mapped)):
+        print(f"{label:<20} {statistics.median(xs) * 1e3:>10.1f}")
+
+    # Serialized up front: json.dumps in this process would stall the reader itself.
+    versions = [bump_capacity(records, step) for step in range(args.reloads)]
+
+    def keep_reloading():
+        for data in versions:
+            replace_file(path, data)
+            reservations.reload_catalog()
+
+    read_once(ids[0])  # warm up (pydantic import, models)
+    idle = reader_latency(2.0, ids)
+    busy = reader_latency(None, ids, keep_reloading)
+    print(f"\n{'readers':<20} {'ops':>8} {'p50 us':>8} {'p99 us':>8} {'max us':>9} {'errors':>7}")
+    for label, r in (('idle', idle), ('during reloads', busy)):
+        print(f"{label:<20} {r['ops']:>8} {r['p50_us']:>8.1f} {r['p99_us']:>8.1f} {r['max_us']:>9.0f} {r['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
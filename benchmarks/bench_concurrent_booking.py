@@ -0,0 +1,84 @@
+"""
+Booking throughput with 1, 8 and 32 concurrent bookers.
+
+Runs against a throwaway database so data/reservations.db is never touched:
+
+    python benchmarks/bench_concurrent_booking.py
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+TMP_DIR = tempfile.mkdtemp(prefix='goodfoods-bench-')
+os.environ['GOODFOODS_DB_PATH'] = str(Path(TMP_DIR) / 'bench.db')
+
+import db  # noqa: E402
+import reservations  # noqa: E402
+
+
+def _reset_db():
+    db.close_conn()
+    for suffix in ('', '-wal', '-shm'):
+        p = Path(str(db.DB_PATH) + suffix)
+        if p.exists():
+            p.unlink()
+    db.init_db()
+
+
+def run(threads, duration):
+    _reset_db()
+    ids = list(reservations.RESTAURANTS)
+    start_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    stop_at = time.perf_counter() + duration
+    counts = {'ok': 0, 'full': 0, 'locked': 0}
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = {'ok': 0, 'full': 0, 'locked': 0}
+        while time.perf_counter() < stop_at:
+            dt = start_day + timedelta(days=rng.randrange(30), hours=rng.randrange(11, 23))
+            try:
+                res = reservations.create_reservation(rng.choice(ids), dt, rng.randint(1, 6), 'Bench')
+                local['ok' if res else 'full'] += 1
+            except sqlite3.OperationalError:
+                local['locked'] += 1
+        with lock:
+            for k, v in local.items():
+                counts[k] += v
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+    total = counts['ok'] + counts['full']
+    print(f"{threads:>3} bookers: {total / elapsed:9.1f} bookings/s  "
+          f"(ok={counts['ok']} full={counts['full']} locked_errors={counts['locked']})")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--duration', type=float, default=3.0, help='seconds per concurrency level')
+    ap.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    args = ap.parse_args()
+
+    print(f"db: {db.DB_PATH}")
+    for n in args.threads:
+        run(n, args.duration)
+
+
+if __name__ == '__main__':
+    main()
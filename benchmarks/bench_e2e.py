@@ -0,0 +1,167 @@
+"""
+End-to-end handle_user_message benchmark with model latency factored out.
+
+Every message in data/intent_corpus.jsonl goes through the real agent
+(router, intent cache, tool execution, SQLite) with the LLM replaced by the
+offline StubProvider replaying data/llm_recordings.jsonl. Time spent waiting
+on the provider is measured separately, so "overhead" is what our own code
+costs per message, independent of how fast the model is.
+
+Each pass runs the whole corpus; pass 1 starts with an empty intent cache,
+later passes hit it. Results are grouped by the path a message took:
+router (no LLM), cache (LLM answer reused) or llm.
+
+    python benchmarks/bench_e2e.py
+    python benchmarks/bench_e2e.py --latency 0.4 --token-delay 0.01 --passes 3 --async
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'app'))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db'))
+os.environ['LLM_PROVIDER'] = 'stub'
+
+import agent  # noqa: E402
+import llm_clients  # noqa: E402
+from intent_router import STATS as ROUTER_STATS  # noqa: E402
+from llm_providers import LLMProvider, StubProvider  # noqa: E402
+
+CORPUS = BENCH_DIR / 'data' / 'intent_corpus.jsonl'
+RECORDINGS = BENCH_DIR / 'data' / 'llm_recordings.jsonl'
+
+
+class TimedProvider(LLMProvider):
+    """Adds up the wall time spent inside another provider's calls."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+        self.calls = 0
+        self.seconds = 0.0
+
+    def complete(self, system_prompt, user_text):
+        self.calls += 1
+        t0 = time.perf_counter()
+        try:
+            return self.inner.complete(system_prompt, user_text)
+        finally:
+            self.seconds += time.perf_counter() - t0
+
+    async def complete_async(self, system_prompt, user_text):
+        self.calls += 1
+        t0 = time.perf_counter()
+        try:
+            return await self.inner.complete_async(system_prompt, user_text)
+        finally:
+            self.seconds += time.perf_counter() - t0
+
+    def stream(self, system_prompt, user_text):
+        self.calls += 1
+        it = self.inner.stream(system_prompt, user_text)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.seconds += time.perf_counter() - t0
+            yield item
+
+    async def stream_async(self, system_prompt, user_text):
+        self.calls += 1
+        it = self.inner.stream_async(system_prompt, user_text)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = await it.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                self.seconds += time.perf_counter() - t0
+            yield item
+
+
+def report(line):
+    print(line, file=sys.__stdout__, flush=True)
+
+
+def load_corpus():
+    with CORPUS.open(encoding='utf-8') as f:
+        return [json.loads(line)['text'] for line in f if line.strip()]
+
+
+def _path(router_hits, cache_hits, calls, timed):
+    if ROUTER_STATS.hits > router_hits:
+        return 'router'
+    if llm_clients.INTENT_CACHE.hits > cache_hits:
+        return 'cache'
+    if timed.calls > calls:
+        return 'llm'
+    return 'other'
+
+
+def run_pass(messages, timed, use_async):
+    samples = defaultdict(list)
+    for text in messages:
+        before = (ROUTER_STATS.hits, llm_clients.INTENT_CACHE.hits, timed.calls, timed.seconds)
+        t0 = time.perf_counter()
+        if use_async:
+            asyncio.run(agent.handle_user_message_async(text))
+        else:
+            agent.handle_user_message(text)
+        total = time.perf_counter() - t0
+        model = timed.seconds - before[3]
+        samples[_path(*before[:3], timed)].append((total, model))
+    return samples
+
+
+def summarize(label, samples):
+    for path in ('router', 'cache', 'llm', 'other'):
+        rows = samples.get(path)
+        if not rows:
+            continue
+        totals = [t * 1e3 for t, _ in rows]
+        models = [m * 1e3 for _, m in rows]
+        overhead = sorted(t - m for t, m in zip(totals, models))
+        p95 = overhead[min(len(overhead) - 1, int(len(overhead) * 0.95))]
+        report(f"{label:<8} {path:<7} {len(rows):>4} {statistics.mean(totals):>10.2f} "
+               f"{statistics.mean(models):>10.2f} {statistics.mean(overhead):>10.2f} {p95:>9.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--latency', type=float, default=0.3, help='stub seconds before the reply / first token')
+    ap.add_argument('--token-delay', type=float, default=0.0, help='stub seconds per output token')
+    ap.add_argument('--passes', type=int, default=2)
+    ap.add_argument('--async', dest='use_async', action='store_true', help='use handle_user_message_async')
+    ap.add_argument('--no-stream', action='store_true', help='wait for full completions instead of streaming')
+    args = ap.parse_args()
+
+    timed = TimedProvider(StubProvider.from_jsonl(RECORDINGS, latency=args.latency, token_delay=args.token_delay))
+    llm_clients.set_provider(timed)
+    agent.LLM_STREAMING = not args.no_stream
+    llm_clients.INTENT_CACHE.clear()
+    messages = load_corpus()
+
+    # The agent prints on every request; keep only the report on stdout.
+    sys.stdout = open(os.devnull, 'w')
+    report(f"stub model: {args.latency * 1e3:.0f}ms latency, {args.token_delay * 1e3:.0f}ms/token; "
+           f"{'async' if args.use_async else 'sync'}, {'full' if args.no_stream else 'streaming'} completions; "
+           f"{len(messages)} messages/pass")
+    report(f"{'pass':<8} {'path':<7} {'n':>4} {'total ms':>10} {'model ms':>10} {'overhead':>10} {'p95 ovh':>9}")
+    for i in range(args.passes):
+        summarize(f"pass {i + 1}", run_pass(messages, timed, args.use_async))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Nearest-restaurant queries on the grid GeoIndex.
+
+Times k-nearest and within-radius queries (with and without cuisine, seats
+and feature filters) on synthetic catalogs, and checks every answer against
+a brute-force haversine scan:
+
+    python benchmarks/bench_geo.py
+    python benchmarks/bench_geo.py --sizes 100000 1000000
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db'))
+
+from bench_search import synth_catalog  # noqa: E402
+from generate_restaurants import CUISINES, FEATURES  # noqa: E402
+from geo import EARTH_RADIUS_KM, GeoIndex  # noqa: E402
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    # Scalar reference for geo.haversine_km_np.
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def brute_force(restaurants, lat, lon, k=None, radius_km=None, cuisine=None, seats=None, features=None):
+    out = []
+    for r in restaurants:
+        if cuisine and r.cuisine.lower() != cuisine.lower():
+            continue
+        if seats and r.capacity < seats:
+            continue
+        if features and not all(f in r.features for f in features):
+            continue
+        d = haversine_km(lat, lon, r.lat, r.lon)
+        if radius_km is None or d <= radius_km:
+            out.append((d, r.id))
+    out.sort()
+    return [rid for _, rid in (out if k is None else out[:k])]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[80, 10_000, 100_000])
+    ap.add_argument('--queries', type=int, default=2000)
+    ap.add_argument('--verify', type=int, default=50, help='queries checked against brute force')
+    args = ap.parse_args()
+
+    rng = random.Random(1)
+    print(f"{'restaurants':>12}  {'build':>8}  {'knn p50':>9}  {'knn+filters':>11}  {'radius 2km':>10}  {'p99 (all)':>9}")
+    for n in args.sizes:
+        catalog, restaurants = synth_catalog(n)
+        t0 = time.perf_counter()
+        index = GeoIndex(catalog)
+        build = time.perf_counter() - t0
+
+        probes = []
+        for _ in range(args.queries):
+            lat, lon = 12.9 + rng.random() * 0.3, 77.45 + rng.random() * 0.3
+            filters = {'cuisine': rng.choice(CUISINES), 'seats': rng.choice((2, 4, 8)),
+                       'feature_filters': [rng.choice(FEATURES)]}
+            probes.append((lat, lon, filters))
+
+        for lat, lon, f in probes[:args.verify]:
+            got = [r.id for r, _ in index.nearest(lat, lon, 5, **f)]
+            assert got == brute_force(restaurants, lat, lon, k=5, cuisine=f['cuisine'], seats=f['seats'],
+                                      features=f['feature_filters']), (lat, lon, f)
+            got = [r.id for r, _ in index.within_radius(lat, lon, 2.0)]
+            assert got == brute_force(restaurants, lat, lon, radius_km=2.0), (lat, lon)
+
+        timings = {'knn': [], 'filtered': [], 'radius': []}
+        for lat, lon, f in probes:
+            t0 = time.perf_counter()
+            index.nearest(lat, lon, 5)
+            t1 = time.perf_counter()
+            index.nearest(lat, lon, 5, **f)
+            t2 = time.perf_counter()
+            index.within_radius(lat, lon, 2.0, limit=20)
+            t3 = time.perf_counter()
+            timings['knn'].append((t1 - t0) * 1e6)
+            timings['filtered'].append((t2 - t1) * 1e6)
+            timings['radius'].append((t3 - t2) * 1e6)
+        every = sorted(sum(timings.values(), []))
+        print(f"{n:>12}  {build * 1e3:>6.1f}ms  {statistics.median(timings['knn']):>7.1f}us  "
+              f"{statistics.median(timings['filtered']):>9.1f}us  {statistics.median(timings['radius']):>8.1f}us  "
+              f"{every[int(len(every) * 0.99)]:>7.1f}us")
+
+
+if __name__ == '__main__':
+    main()
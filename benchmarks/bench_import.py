@@ -0,0 +1,95 @@
+"""
+Cold-start cost of the app package, measured with `python -X importtime`.
+
+Each scenario runs in a fresh interpreter (so nothing is cached in
+sys.modules) on a throwaway database, --runs times. For each one it reports
+the median wall time of the snippet, the median time `-X importtime`
+attributes to its imports, and the heaviest third-party and stdlib packages
+those imports pulled in (last run).
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --runs 10 --top 15
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+APP_DIR = ROOT / 'app'
+OWN_MODULES = {p.stem for p in APP_DIR.glob('*.py')} | {'app'}
+
+SCENARIOS = [
+    ('import app', 'import app'),
+    ('import agent', 'import agent'),
+    ('agent + startup()', 'import agent; agent.startup()'),
+    ('first message', "import agent; agent.handle_user_message('list reservations')"),
+    ('import api', 'import api'),
+]
+
+_LINE_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+# Timing wrapper: the reported wall time covers only the snippet, not the
+# interpreter's own startup (site, encodings), which we can't influence.
+_WRAPPER = (
+    'import time as _t; _t0 = _t.perf_counter()\n'
+    '{code}\n'
+    'import sys as _s; _s.__stdout__.write("WALL %f\\n" % (_t.perf_counter() - _t0))\n'
+)
+
+
+def run_once(code, db_path):
+    env = dict(os.environ)
+    env['GOODFOODS_DB_PATH'] = str(db_path)
+    env.setdefault('LLM_PROVIDER', 'stub')
+    env['PYTHONPATH'] = os.pathsep.join([str(ROOT), str(APP_DIR), env.get('PYTHONPATH', '')])
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _WRAPPER.format(code=code)],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = float(re.search(r'^WALL (\S+)$', proc.stdout, re.M).group(1))
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return wall, rows
+
+
+def summarize(rows):
+    """(import microseconds, packages) for everything imported after interpreter startup."""
+    # Everything up to and including `site` is interpreter startup.
+    last_site = max((i for i, r in enumerate(rows) if r[0] == 'site' and r[3] == 0), default=-1)
+    rows = rows[last_site + 1:]
+    total = sum(r[2] for r in rows if r[3] == 0)
+    # Third-party/stdlib packages imported (at any depth) by our modules.
+    heavy = [r for r in rows if r[0] not in OWN_MODULES and '.' not in r[0]]
+    return total, heavy
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--runs', type=int, default=5)
+    ap.add_argument('--top', type=int, default=8, help='heaviest imports to list per scenario')
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix='goodfoods-import-'))
+    print(f"{'scenario':<20} {'wall ms':>9} {'imports ms':>11}  heaviest packages loaded (cumulative ms)")
+    for label, code in SCENARIOS:
+        walls, imports = [], []
+        for i in range(args.runs):
+            # A fresh DB each run, so startup() includes creating the schema.
+            wall, rows = run_once(code, tmp / f'{label.replace(" ", "_")}-{i}.db')
+            total, heavy = summarize(rows)
+            walls.append(wall * 1e3)
+            imports.append(total / 1e3)
+        heavy.sort(key=lambda r: r[2], reverse=True)
+        names = ', '.join(f"{name} {cum / 1e3:.0f}" for name, _, cum, _ in heavy[:args.top]) or '-'
+        print(f"{label:<20} {statistics.median(walls):>9.1f} {statistics.median(imports):>11.1f}  {names}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Hit rate, accuracy and latency of the local intent router.
+
+Replays benchmarks/data/intent_corpus.jsonl. Each line has the message, the
+intent the router should produce (null when it must defer to the LLM) and
+the expected params; booking times are given as "time" and "day" (days
+from today) so the corpus doesn't go stale.
+
+    python benchmarks/bench_intent_router.py
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / 'app'))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db'))
+
+from intent_router import STATS, route_locally  # noqa: E402
+
+CORPUS = HERE / 'data' / 'intent_corpus.jsonl'
+
+
+def expected_params(case, now):
+    params = dict(case['params'])
+    if 'time' in params:
+        hour, minute = map(int, params.pop('time').split(':'))
+        day = now + timedelta(days=params.pop('day'))
+        params['datetime'] = day.replace(hour=hour, minute=minute, second=0, microsecond=0).isoformat()
+    return params
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--corpus', type=Path, default=CORPUS)
+    ap.add_argument('--repeat', type=int, default=200)
+    args = ap.parse_args()
+
+    cases = [json.loads(line) for line in args.corpus.read_text(encoding='utf-8').splitlines() if line.strip()]
+    now = datetime.now()
+
+    wrong = []
+    for case in cases:
+        got = route_locally(case['text'], now=now)
+        if case['intent'] is None:
+            if got is not None:
+                wrong.append((case['text'], 'should defer to LLM', got))
+        elif got is None:
+            continue
+        elif got != {'intent': case['intent'], 'params': expected_params(case, now)}:
+            wrong.append((case['text'], 'wrong parse', got))
+
+    stats = STATS.snapshot()
+    routable = sum(1 for c in cases if c['intent'] is not None)
+    print(f"corpus: {len(cases)} messages ({routable} routable)")
+    print(f"hit rate: {stats['hit_rate']:.1%} overall, {stats['hits'] / routable:.1%} of routable")
+    print(f"by intent: {stats['by_intent']}")
+    print(f"wrong answers: {len(wrong)}")
+    for text, why, got in wrong:
+        print(f"  {why}: {text!r} -> {got}")
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for case in cases:
+            route_locally(case['text'], now=now)
+    per_msg = (time.perf_counter() - t0) / (args.repeat * len(cases)) * 1e6
+    print(f"latency: {per_msg:.1f}us per message")
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == '__main__':
+    main()
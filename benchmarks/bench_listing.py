@@ -0,0 +1,104 @@
+"""
+Reservation listing: OFFSET paging vs keyset paging, and the cancel lookup.
+
+Seeds a throwaway database with --rows reservations spread over the
+catalog, then measures
+
+    page N (OFFSET)     ORDER BY id DESC LIMIT ? OFFSET ?  (cost grows with N)
+    page N (keyset)     list_reservations_page(before_id=...)
+    cancel lookup       old: newest 200 rows, scanned in Python for the
+                        restaurant; new: latest_reservation() index seek
+
+and how many restaurants the old scan could not find a booking for at all.
+
+    python benchmarks/bench_listing.py
+    python benchmarks/bench_listing.py --rows 1000000 --page-size 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+os.environ['GOODFOODS_DB_PATH'] = str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db')
+
+import db  # noqa: E402
+import reservations  # noqa: E402
+
+
+def seed(rows):
+    rng = random.Random(7)
+    ids = list(reservations.RESTAURANTS)
+    start = datetime(2030, 1, 1)
+    batch = []
+    for i in range(rows):
+        dt = start + timedelta(hours=rng.randrange(24 * 365))
+        batch.append((rng.choice(ids), dt.isoformat(), db.to_epoch(dt), rng.randint(1, 8),
+                      f'Guest {rng.randrange(10_000)}', None, None,
+                      'confirmed' if rng.random() < 0.9 else 'cancelled'))
+    with db.transaction() as conn:
+        conn.executemany('''
+            INSERT INTO reservations (restaurant_id, datetime, start_ts, seats, name, phone, email, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e3
+
+
+def old_cancel_lookup(restaurant_id):
+    rows = [dict(zip(reservations.RESERVATION_COLUMNS, r)) for r in db.get_conn().execute(
+        reservations._SELECT_RESERVATIONS + ' ORDER BY id DESC LIMIT 200')]
+    for r in reversed(rows):
+        if r['restaurant_id'] == restaurant_id and r['status'] == 'confirmed':
+            return r
+    return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=200_000)
+    ap.add_argument('--page-size', type=int, default=50)
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    reservations.startup()
+    t0 = time.perf_counter()
+    seed(args.rows)
+    print(f"seeded {args.rows} reservations in {time.perf_counter() - t0:.1f}s")
+    conn = db.get_conn()
+
+    print(f"{'page':>8} {'OFFSET ms':>10} {'keyset ms':>10}")
+    max_id = conn.execute('SELECT MAX(id) FROM reservations').fetchone()[0]
+    for page in (1, 10, 100, 1000, args.rows // args.page_size - 1):
+        offset = page * args.page_size
+        # The keyset cursor for page N is the id of the last row on page N-1.
+        before_id = max_id - offset + 1
+        off = timed(lambda: conn.execute(reservations._SELECT_RESERVATIONS + ' ORDER BY id DESC LIMIT ? OFFSET ?',
+                                          (args.page_size, offset)).fetchall(), args.repeat)
+        key = timed(lambda: reservations.list_reservations_page(before_id=before_id, limit=args.page_size),
+                    args.repeat)
+        print(f"{page:>8} {off:>10.2f} {key:>10.2f}")
+
+    sample = random.Random(1).sample(list(reservations.RESTAURANTS), min(50, len(reservations.RESTAURANTS)))
+    old = timed(lambda: [old_cancel_lookup(rid) for rid in sample], args.repeat) / len(sample)
+    new = timed(lambda: [reservations.latest_reservation(rid) for rid in sample], args.repeat) / len(sample)
+    missed = sum(old_cancel_lookup(rid) is None and reservations.latest_reservation(rid) is not None for rid in sample)
+    print(f"cancel lookup: scan newest 200 {old:.3f}ms, index seek {new:.3f}ms per restaurant; "
+          f"scan missed {missed}/{len(sample)} restaurants that have confirmed bookings")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Restaurant names in booking messages: NameIndex versus the original scan.
+
+Builds catalogs with generate_data.py's name mix ("GoodFoods <surname>",
+"<Word> Bistro") and times three kinds of message against both:
+
+    exact       the name as written ("book GoodFoods Parker for 4 at 7pm")
+    misspelled  one letter of the distinctive word dropped, doubled or swapped
+    no name     a booking that names no restaurant (the common LLM fallback)
+
+"right" counts answers naming the intended restaurant (any venue sharing
+its name). The scan takes the first name contained anywhere in the message,
+so "GoodFoods Park" wins over "GoodFoods Parker" if it comes first, and it
+never finds a misspelled name.
+
+    python benchmarks/bench_names.py
+    python benchmarks/bench_names.py --sizes 100000 1000000 --messages 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db'))
+
+from catalog import Catalog  # noqa: E402
+from generate_data import generate_restaurants  # noqa: E402
+from names import NameIndex, normalize  # noqa: E402
+
+TEMPLATES = [
+    'book {} for 4 tomorrow at 7pm',
+    'can I get a table at {} on friday 8pm for two',
+    'reserve {}, 6 people, next saturday 1pm',
+]
+NO_NAME = [
+    'book a table for 4 tomorrow at 7pm',
+    'reserve for two tonight at 9pm please',
+    'table for 6 people on saturday at 1pm',
+]
+
+
+def linear_scan(names, text):
+    # Verbatim logic of the pre-index create_reservation branch.
+    lowered = text.lower()
+    return next((pos for pos, n in enumerate(names) if n.lower() in lowered), None)
+
+
+def _distinctive(words):
+    """Index of the longest word that is not shared by the whole family of names."""
+    return max(range(len(words)), key=lambda k: len(words[k]) if words[k] not in ('GoodFoods', 'Bistro') else 0)
+
+
+def misspell(name, rng):
+    words = name.split()
+    i = _distinctive(words)
+    w = words[i]
+    j = rng.randrange(1, len(w) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        w = w[:j] + w[j + 1:]
+    elif kind == 1:
+        w = w[:j] + w[j] + w[j:]
+    else:
+        w = w[:j - 1] + w[j] + w[j - 1] + w[j + 1:]
+    words[i] = w
+    return ' '.join(words)
+
+
+def messages(names, n, rng):
+    long_names = [name for name in names if len(name.split()[_distinctive(name.split())]) >= 5]
+    out = {'exact': [], 'misspelled': [], 'no name': []}
+    for _ in range(n):
+        name = rng.choice(names)
+        out['exact'].append((rng.choice(TEMPLATES).format(name), normalize(name)))
+        name = rng.choice(long_names)
+        out['misspelled'].append((rng.choice(TEMPLATES).format(misspell(name, rng)), normalize(name)))
+        out['no name'].append((rng.choice(NO_NAME), None))
+    return out
+
+
+def timed(fn, cases):
+    answers = []
+    t0 = time.perf_counter()
+    for text, _ in cases:
+        answers.append(fn(text))
+    return (time.perf_counter() - t0) / len(cases), answers
+
+
+def right(names, answers, cases):
+    return sum(
+        (pos is None) if want is None else (pos is not None and normalize(names[pos]) == want)
+        for pos, (_, want) in zip(answers, cases)
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[80, 10_000, 100_000])
+    ap.add_argument('--messages', type=int, default=300, help='messages of each kind')
+    ap.add_argument('--seed', type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    tmp = Path(tempfile.mkdtemp(prefix='goodfoods-bench-'))
+    print(f"{'restaurants':>12}  {'distinct':>8}  {'build ms':>8}  {'message':<10}  "
+          f"{'scan us':>9}  {'index us':>9}  {'scan right':>10}  {'index right':>11}")
+    for n in args.sizes:
+        path = tmp / f'restaurants-{n}.json'
+        generate_restaurants(n, path, seed=args.seed)
+        catalog = Catalog.from_json(path)
+        names = catalog.names()
+        t0 = time.perf_counter()
+        index = NameIndex(catalog)
+        build = time.perf_counter() - t0
+
+        def best(text):
+            found = index.match(text, limit=1)
+            return found[0][0] if found else None
+
+        for kind, cases in messages(names, args.messages, rng).items():
+            scan_s, scan_answers = timed(lambda text: linear_scan(names, text), cases)
+            index_s, index_answers = timed(best, cases)
+            print(f"{n:>12}  {len(index):>8}  {build * 1e3:>8.0f}  {kind:<10}  {scan_s * 1e6:>9.1f}  "
+                  f"{index_s * 1e6:>9.1f}  {right(names, scan_answers, cases):>10}  "
+                  f"{right(names, index_answers, cases):>11}")
+
+
+if __name__ == '__main__':
+    main()
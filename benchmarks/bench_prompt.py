@@ -0,0 +1,63 @@
+"""
+System prompt size and per-request build cost, before and after caching.
+
+The "legacy" prompt is rendered exactly as the original list_tools_for_prompt
+did (Python repr of each schema plus a repeated JSON instructions footer)
+and rebuilt per request; the current prompt is rendered once and returned
+from cache. Token counts use llm_clients.estimate_tokens, an offline
+approximation; real per-request prompt tokens reported by Groq are exposed
+as llm_tokens in GET /metrics.
+
+    python benchmarks/bench_prompt.py
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'app'))
+os.environ.setdefault('GROQ_API_KEY', 'offline-benchmark')
+
+from llm_clients import estimate_tokens  # noqa: E402
+from prompts import SYSTEM_PROMPT_BASE, build_system_prompt  # noqa: E402
+from tools import TOOL_SPECS  # noqa: E402
+
+
+def legacy_system_prompt():
+    lines = ["You have access to the following tools (MCP-style):"]
+    for name, spec in TOOL_SPECS.items():
+        lines.append(f"- Tool name: {name}")
+        lines.append(f"  Description: {spec['description']}")
+        lines.append("  Input JSON schema:")
+        lines.append(f"  {spec['inputSchema']}")
+        lines.append("")
+    lines.append(
+        "When you decide what to do, respond with a SINGLE JSON object:\n"
+        "{\n"
+        '  "intent": "<tool_name>",\n'
+        '  "params": { ... arguments according to the inputSchema ... }\n'
+        "}\n"
+        "Do NOT include any other text outside the JSON."
+    )
+    return "\n" + SYSTEM_PROMPT_BASE + "\n\n" + "\n".join(lines)
+
+
+def per_call_us(fn, n=20_000):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    legacy = legacy_system_prompt()
+    current = build_system_prompt()
+    lt, ct = estimate_tokens(legacy), estimate_tokens(current)
+    print(f"{'':>8}  {'chars':>6}  {'~tokens':>8}  {'build/request':>14}")
+    print(f"{'legacy':>8}  {len(legacy):>6}  {lt:>8}  {per_call_us(legacy_system_prompt):>12.2f}us")
+    print(f"{'current':>8}  {len(current):>6}  {ct:>8}  {per_call_us(build_system_prompt):>12.2f}us")
+    print(f"prompt tokens saved per LLM request: ~{lt - ct} ({(lt - ct) / lt:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+search_restaurants: bitset index versus the original linear filter chain.
+
+Builds synthetic catalogs of 80, 10k and 100k restaurants (same cuisine,
+feature and capacity distributions as generate_restaurants.py) and times a
+fixed mix of queries against both implementations:
+
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --sizes 80 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db'))
+
+from catalog import Catalog  # noqa: E402
+from generate_restaurants import CAPACITIES, CUISINES, FEATURES  # noqa: E402
+from reservations import RestaurantIndex  # noqa: E402
+from schema import Restaurant  # noqa: E402
+
+
+def synth_records(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        dict(
+            id=i, name=f'Venue {i}', address=f'{i} Bench Street',
+            lat=12.9 + rng.random() * 0.3, lon=77.45 + rng.random() * 0.3,
+            capacity=rng.choice(CAPACITIES), cuisine=rng.choice(CUISINES),
+            features=rng.sample(FEATURES, k=rng.randint(0, 2)),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def synth_catalog(n, seed=0):
+    """(Catalog, [Restaurant]) holding the same synthetic rows."""
+    records = synth_records(n, seed)
+    return Catalog.from_records(records), [Restaurant(**r) for r in records]
+
+
+def linear_search(restaurants, cuisine=None, seats=None, feature_filters=None, limit=20):
+    # Verbatim copy of the pre-index search_restaurants body.
+    results = list(restaurants)
+    if cuisine:
+        results = [r for r in results if r.cuisine.lower() == cuisine.lower()]
+    if seats:
+        results = [r for r in results if r.capacity >= seats]
+    if feature_filters:
+        results = [r for r in results if all(f in r.features for f in feature_filters)]
+    return results[:limit]
+
+
+QUERIES = [
+    {},
+    {'cuisine': 'Italian'},
+    {'seats': 6},
+    {'seats': 150},
+    {'cuisine': 'Japanese', 'seats': 4},
+    {'feature_filters': ['outdoor']},
+    {'cuisine': 'Thai', 'seats': 8, 'feature_filters': ['parking']},
+    {'cuisine': 'French', 'feature_filters': ['rooftop', 'live_music']},
+]
+
+
+def per_query_us(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for q in QUERIES:
+            fn(**q)
+    return (time.perf_counter() - t0) / (repeat * len(QUERIES)) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[80, 10_000, 100_000])
+    args = ap.parse_args()
+
+    print(f"{'restaurants':>12}  {'build':>9}  {'indexed':>11}  {'linear':>11}  {'speedup':>8}")
+    for n in args.sizes:
+        catalog, restaurants = synth_catalog(n)
+        t0 = time.perf_counter()
+        index = RestaurantIndex(catalog)
+        build = time.perf_counter() - t0
+
+        for q in QUERIES:
+            assert [r.id for r in index.query(**q)] == [r.id for r in linear_search(restaurants, **q)], q
+
+        repeat = max(1, 200_000 // n)
+        indexed = per_query_us(index.query, repeat)
+        linear = per_query_us(lambda **q: linear_search(restaurants, **q), max(1, repeat // 10))
+        print(f"{n:>12}  {build * 1e3:>7.1f}ms  {indexed:>9.1f}us  {linear:>9.1f}us  {linear / indexed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
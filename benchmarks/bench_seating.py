@@ -0,0 +1,146 @@
+"""
+Capacity by seated guests (occupancy.py) versus the old two-hour window.
+
+Replays the same stream of booking requests against both rules for a set
+of restaurants with mixed dining durations (90/120/150 minutes, 15-minute
+slots), admitting each request the rule allows:
+
+    window      seats booked from the top of the requested hour to two
+                hours later must fit (the rule before seating intervals)
+    seated      the most guests at their tables at once while the new
+                booking would be must fit (OccupancyIndex.peak)
+
+then measures what actually happens in each dining room: the most guests
+seated at once per restaurant and day, against capacity. "overbooked"
+counts restaurant-days where that exceeded capacity; "seat-hours" is the
+dining time sold. Also times one check of each rule.
+
+    python benchmarks/bench_seating.py
+    python benchmarks/bench_seating.py --restaurants 200 --requests 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db'))
+
+from occupancy import SECONDS_PER_DAY, OccupancyIndex, peak_seats, seating_interval  # noqa: E402
+
+BASE_TS = 1_893_456_000  # 2030-01-01
+DINING_MINUTES = (90, 120, 150)
+SLOT_SECONDS = 15 * 60
+CAPACITIES = (20, 40, 60, 80)
+
+
+class WindowRule:
+    """The pre-interval rule: 24 hourly buckets of booked seats per (restaurant, day)."""
+
+    def __init__(self):
+        self.days = {}
+
+    def booked(self, rid, start_ts):
+        day, hour = divmod(start_ts // 3600, 24)
+        total = 0
+        for h in (hour, hour + 1):
+            d, h = divmod(day * 24 + h, 24)
+            buckets = self.days.get((rid, d))
+            total += buckets[h] if buckets is not None else 0
+        return total
+
+    def add(self, rid, start_ts, seats):
+        day, hour = divmod(start_ts // 3600, 24)
+        buckets = self.days.get((rid, day))
+        if buckets is None:
+            buckets = self.days[(rid, day)] = array('i', bytes(4 * 24))
+        buckets[hour] += seats
+
+
+def requests(n, restaurants, days, rng):
+    # Dinner-heavy demand on 5-minute times, well above what the rooms hold.
+    out = []
+    for _ in range(n):
+        minute = min(max(int(rng.gauss(19.5 * 60, 110)), 11 * 60), 22 * 60 + 55) // 5 * 5
+        out.append((rng.randrange(restaurants), BASE_TS + rng.randrange(days) * SECONDS_PER_DAY + minute * 60,
+                    rng.choice((2, 2, 2, 4, 4, 6, 8))))
+    return out
+
+
+def replay(stream, venues, rule):
+    window, seated = WindowRule(), OccupancyIndex()
+    admitted = []
+    for rid, start_ts, seats in stream:
+        cap, dining = venues[rid]
+        lo, hi = seating_interval(start_ts, dining * 60, SLOT_SECONDS)
+        if rule == 'window':
+            ok = window.booked(rid, start_ts) + seats <= cap
+        else:
+            ok = seated.peak(rid, lo, hi) + seats <= cap
+        if ok:
+            window.add(rid, start_ts, seats)
+            seated.add(rid, start_ts, hi, seats)
+            admitted.append((rid, lo, hi, seats))
+    return admitted, window, seated
+
+
+def outcome(admitted, venues):
+    by_day = {}
+    for rid, lo, hi, seats in admitted:
+        by_day.setdefault((rid, lo // SECONDS_PER_DAY), []).append((lo, hi, seats))
+    over = worst = 0
+    for (rid, day), intervals in by_day.items():
+        ratio = peak_seats(intervals, 0, 2 ** 62) / venues[rid][0]
+        over += ratio > 1
+        worst = max(worst, ratio)
+    seat_hours = sum((hi - lo) * seats for _, lo, hi, seats in admitted) / 3600
+    return {'bookings': len(admitted), 'seat_hours': seat_hours, 'overbooked': over,
+            'restaurant_days': len(by_day), 'worst': worst}
+
+
+def time_checks(fn, probes):
+    samples = []
+    for args in probes:
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--restaurants', type=int, default=50)
+    ap.add_argument('--days', type=int, default=30)
+    ap.add_argument('--requests', type=int, default=50_000)
+    ap.add_argument('--seed', type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    venues = [(rng.choice(CAPACITIES), rng.choice(DINING_MINUTES)) for _ in range(args.restaurants)]
+    stream = requests(args.requests, args.restaurants, args.days, rng)
+
+    print(f"{args.requests} requests, {args.restaurants} restaurants x {args.days} days")
+    print(f"{'rule':<8} {'bookings':>9} {'seat-hours':>11} {'overbooked':>16} {'worst peak/cap':>15} {'check us':>9}")
+    probes = rng.sample(stream, min(5000, len(stream)))
+    for rule in ('window', 'seated'):
+        admitted, window, seated = replay(stream, venues, rule)
+        r = outcome(admitted, venues)
+        if rule == 'window':
+            check = time_checks(lambda rid, ts, seats: window.booked(rid, ts) + seats <= venues[rid][0], probes)
+        else:
+            def check_seated(rid, ts, seats):
+                cap, dining = venues[rid]
+                return seated.peak(rid, *seating_interval(ts, dining * 60, SLOT_SECONDS)) + seats <= cap
+            check = time_checks(check_seated, probes)
+        print(f"{rule:<8} {r['bookings']:>9} {r['seat_hours']:>11.0f} "
+              f"{r['overbooked']:>7}/{r['restaurant_days']:<8} {r['worst']:>15.2f} {check:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
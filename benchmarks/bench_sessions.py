@@ -0,0 +1,122 @@
+"""
+Follow-up turns with and without conversation state.
+
+Each conversation is a search followed by follow-ups that refer back to it:
+
+    find <cuisine> for 4
+    book the second one tomorrow at 7pm
+    make it 8pm instead
+
+    session     handle_user_message(text, session_id): follow-ups resolved
+                from the session (no LLM call, no search, no name scan); the
+                LLM would only ever get a one-line context summary
+    stateless   what a stateless agent needs instead: the transcript so far
+                is sent ahead of each follow-up and the LLM resolves it (the
+                stub answers with the booking), then the agent scans names
+
+Reports LLM calls and prompt tokens spent on context per follow-up, and our
+own time per follow-up with model latency excluded (the stub answers
+instantly). The intent cache is off, as real transcripts never repeat.
+
+First checks that GOODFOODS_SESSIONS=sqlite works in a fresh process on a
+fresh database that never called startup() (the session store has to run
+the migrations itself), and exits non-zero if it doesn't.
+
+    python benchmarks/bench_sessions.py
+    python benchmarks/bench_sessions.py --conversations 500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'app'))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db'))
+
+import agent  # noqa: E402
+import llm_clients  # noqa: E402
+from llm_clients import estimate_tokens  # noqa: E402
+from llm_providers import StubProvider  # noqa: E402
+from sessions import SESSIONS  # noqa: E402
+
+CUISINES = ['italian', 'indian', 'chinese', 'mexican', 'japanese', 'french', 'thai', 'korean']
+FOLLOWUPS = ['book the second one tomorrow at 7pm', 'make it 8pm instead']
+
+
+FRESH_PROCESS = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from agent import handle_user_message
+for text in ('find italian for 4', 'book the second one tomorrow at 7pm'):
+    print(handle_user_message(text, 'fresh').replace('\\n', ' '))
+"""
+
+
+def check_fresh_sqlite_sessions():
+    env = dict(os.environ, GOODFOODS_SESSIONS='sqlite', LLM_PROVIDER='stub',
+               GOODFOODS_DB_PATH=str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'fresh.db'))
+    out = subprocess.run([sys.executable, '-c', FRESH_PROCESS, str(BENCH_DIR.parent / 'app')],
+                         env=env, capture_output=True, text=True)
+    replies = out.stdout.splitlines()
+    if out.returncode or len(replies) != 2 or any(r.startswith('Error handling message') for r in replies):
+        raise SystemExit(f"FAIL: sqlite sessions in a fresh process\n{out.stdout}{out.stderr[-2000:]}")
+    print("sqlite sessions in a fresh process: OK")
+
+
+def run(conversations, stateful, provider):
+    samples, context_tokens = [], []
+    calls_before = provider.calls
+    for i in range(conversations):
+        cuisine = CUISINES[i % len(CUISINES)]
+        sid = f'bench-{stateful}-{i}' if stateful else None
+        first = f'find {cuisine} for 4'
+        transcript = [f'User: {first}', f'Assistant: {agent.handle_user_message(first, sid)}']
+        for text in FOLLOWUPS:
+            if stateful:
+                context = agent.context_summary(SESSIONS.get(sid))
+                message = text
+            else:
+                context = '\n'.join(transcript)
+                message = f'{context}\nUser: {text}'
+            context_tokens.append(estimate_tokens(context))
+            t0 = time.perf_counter()
+            reply = agent.handle_user_message(message, sid)
+            samples.append(time.perf_counter() - t0)
+            transcript += [f'User: {text}', f'Assistant: {reply}']
+    followups = conversations * len(FOLLOWUPS)
+    return {
+        'llm_calls': (provider.calls - calls_before) / followups,
+        'context_tokens': statistics.mean(context_tokens),
+        'ms': statistics.median(samples) * 1e3,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--conversations', type=int, default=200)
+    args = ap.parse_args()
+
+    check_fresh_sqlite_sessions()
+    agent.startup()
+    # Stands in for the model resolving "the second one" from the transcript.
+    booking = json.dumps({'intent': 'create_reservation', 'params': {'restaurant_id': 2, 'seats': 4}})
+    provider = StubProvider(default=booking)
+    llm_clients.set_provider(provider)
+    llm_clients.INTENT_CACHE.max_entries = 0
+
+    rows = [('stateless', run(args.conversations, False, provider)),
+            ('session', run(args.conversations, True, provider))]
+    print(f"{args.conversations} conversations, {len(FOLLOWUPS)} follow-ups each")
+    print(f"{'per follow-up':<14} {'LLM calls':>10} {'context ~tokens':>16} {'ms (no LLM wait)':>17}")
+    for label, r in rows:
+        print(f"{label:<14} {r['llm_calls']:>10.2f} {r['context_tokens']:>16.0f} {r['ms']:>17.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Time to first action: full completion + parse vs streaming + incremental parse.
+
+Runs the agent against fake_llm_server.FakeLLMServer (no network, no API
+quota), which streams canned completions token by token with a fixed time to
+first token and per-token delay. For each message it reports when the
+intent was ready to dispatch and when the reply was done, with LLM_STREAMING
+off and on. list_reservations also gets a speculative DB read started as
+soon as its intent name has streamed in.
+
+    python benchmarks/bench_streaming.py
+    python benchmarks/bench_streaming.py --ttft 0.4 --token-delay 0.03 --rounds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'app'))
+sys.path.insert(0, str(BENCH_DIR))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db'))
+os.environ.setdefault('GROQ_API_KEY', 'offline-benchmark')
+
+from fake_llm_server import FakeLLMServer  # noqa: E402
+
+COMPLETIONS = {
+    "I'd love somewhere Italian for a big group": {
+        "intent": "search_restaurants", "params": {"cuisine": "Italian", "seats": 8}},
+    "could you put me down at Spice Route, four of us, saturday 8pm, I'm Priya": {
+        "intent": "create_reservation",
+        "params": {"seats": 4, "datetime": "2030-06-01T20:00:00", "name": "Priya", "phone": None, "email": None}},
+    "show everything booked so far": {
+        "intent": "list_reservations", "params": {}},
+}
+
+
+def report(line):
+    print(line, file=sys.__stdout__, flush=True)
+
+
+def seed_reservations(n):
+    from reservations import RESTAURANTS, create_reservation
+    start = datetime(2030, 1, 1, 12)
+    rids = sorted(RESTAURANTS)
+    for i in range(n):
+        create_reservation(rids[i % len(rids)], start + timedelta(hours=i % 9, days=i // 90), 2, f'Seed {i}')
+
+
+async def time_message(agent, text, streaming):
+    agent.LLM_STREAMING = streaming
+    intent_at = []
+    resolve = agent.resolve_intent_async
+
+    async def timed_resolve(*args, **kwargs):
+        parsed = await resolve(*args, **kwargs)
+        intent_at.append(time.perf_counter())
+        return parsed
+
+    agent.resolve_intent_async = timed_resolve
+    try:
+        t0 = time.perf_counter()
+        await agent.handle_user_message_async(text)
+        done = time.perf_counter()
+    finally:
+        agent.resolve_intent_async = resolve
+    return (intent_at[0] - t0) * 1e3, (done - t0) * 1e3
+
+
+async def run(args):
+    import agent
+    import llm_clients
+    # Every request should go to the (fake) model.
+    llm_clients.INTENT_CACHE.max_entries = 0
+    seed_reservations(args.seed_reservations)
+
+    report(f"fake model: {args.ttft * 1e3:.0f}ms to first token, {args.token_delay * 1e3:.0f}ms/token; "
+           f"{args.rounds} rounds, median ms")
+    report(f"{'message':<34} {'mode':<10} {'intent':>8} {'reply':>8}")
+    for text, completion in COMPLETIONS.items():
+        rows = {}
+        for streaming in (False, True):
+            samples = [await time_message(agent, text, streaming) for _ in range(args.rounds)]
+            rows[streaming] = [statistics.median(s) for s in zip(*samples)]
+            label = 'stream' if streaming else 'full'
+            report(f"{text[:32]:<34} {label:<10} {rows[streaming][0]:>8.1f} {rows[streaming][1]:>8.1f}")
+        saved = rows[False][1] - rows[True][1]
+        report(f"{'':<34} {'saved':<10} {rows[False][0] - rows[True][0]:>8.1f} {saved:>8.1f}  "
+               f"({completion['intent']})")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--ttft', type=float, default=0.3, help='simulated seconds to first token')
+    ap.add_argument('--token-delay', type=float, default=0.02, help='simulated seconds per token')
+    ap.add_argument('--rounds', type=int, default=3)
+    ap.add_argument('--seed-reservations', type=int, default=200)
+    args = ap.parse_args()
+
+    # Models often pretty-print JSON when not forced into JSON mode.
+    responses = {text: json.dumps(c, indent=2) for text, c in COMPLETIONS.items()}
+    default = json.dumps({'intent': 'clarify', 'params': {'question': '?'}})
+    server = FakeLLMServer(responses, default, args.ttft, args.token_delay).start()
+    os.environ['GROQ_BASE_URL'] = server.base_url
+    # The agent prints on every request; keep only the report on stdout.
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        asyncio.run(run(args))
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Answers any POST with a canned completion chosen by the last user message,
+either as one JSON body or, when the request has "stream": true, as
+server-sent events with a configurable time to first token and per-token
+delay. Point the Groq client at it with GROQ_BASE_URL.
+
+    python benchmarks/fake_llm_server.py --port 8011 --ttft 0.3 --token-delay 0.02
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Roughly how a llama tokenizer splits a short JSON object: punctuation,
+# whitespace-led words and quotes come out as separate tokens.
+_TOKEN_RE = re.compile(r'\s*[A-Za-z_]+|\s*\d+|\s*[^\sA-Za-z_\d]')
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text)
+
+
+def _usage(prompt, completion):
+    p, c = len(prompt) // 4, len(tokenize(completion))
+    return {'prompt_tokens': p, 'completion_tokens': c, 'total_tokens': p + c}
+
+
+class FakeLLMServer:
+    def __init__(self, responses, default, ttft=0.3, token_delay=0.02, host='127.0.0.1', port=0):
+        """`responses` maps a user message to the completion text to send back."""
+        self.responses = responses
+        self.default = default
+        self.ttft = ttft
+        self.token_delay = token_delay
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def completion_for(self, body):
+        messages = body.get('messages') or [{}]
+        return self.responses.get(messages[-1].get('content', ''), self.default)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                text = server.completion_for(body)
+                prompt = ''.join(m.get('content', '') for m in body.get('messages', []))
+                base = {'id': 'chatcmpl-fake', 'created': int(time.time()), 'model': body.get('model', 'fake')}
+                if body.get('stream'):
+                    self._stream(base, text, prompt)
+                else:
+                    time.sleep(server.ttft + server.token_delay * len(tokenize(text)))
+                    payload = json.dumps(dict(base, object='chat.completion', choices=[{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': text},
+                        'finish_reason': 'stop',
+                    }], usage=_usage(prompt, text))).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+
+            def _stream(self, base, text, prompt):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+
+                def event(choices, **extra):
+                    chunk = dict(base, object='chat.completion.chunk', choices=choices, **extra)
+                    self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+                    self.wfile.flush()
+
+                try:
+                    time.sleep(server.ttft)
+                    for i, tok in enumerate(tokenize(text)):
+                        if i:
+                            time.sleep(server.token_delay)
+                        event([{'index': 0, 'delta': {'content': tok}, 'finish_reason': None}])
+                    event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+                          x_groq={'id': 'fake', 'usage': _usage(prompt, text)})
+                    self.wfile.write(b'data: [DONE]\n\n')
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading once it had what it needed.
+                    pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--port', type=int, default=8011)
+    ap.add_argument('--ttft', type=float, default=0.3, help='seconds before the first token')
+    ap.add_argument('--token-delay', type=float, default=0.02, help='seconds between tokens')
+    args = ap.parse_args()
+    default = json.dumps({'intent': 'list_reservations', 'params': {}})
+    server = FakeLLMServer({}, default, args.ttft, args.token_delay, port=args.port)
+    print(f'fake LLM listening on {server.base_url}')
+    server.httpd.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Load generator for the HTTP API (app/api.py).
+
+Fires a mix of direct tool calls and router-handled /chat messages (no LLM
+round trip) from N concurrent clients and reports requests/s and latency
+percentiles. By default it starts its own uvicorn server on a throwaway
+database; pass --url to target a server you started yourself.
+
+    python benchmarks/load_api.py --workers 4 --concurrency 64 --duration 10
+    python benchmarks/load_api.py --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CUISINES = ['Indian', 'Italian', 'Chinese', 'Mexican', 'Mediterranean', 'Japanese', 'French', 'American', 'Thai', 'Korean']
+CHAT = [
+    'list reservations',
+    'find italian for 6',
+    'suggest a restaurant for 4 with outdoor seating',
+    'book a table for 2 tomorrow at 8pm',
+]
+
+
+def _request(rng):
+    roll = rng.random()
+    if roll < 0.35:
+        return 'POST', '/tools/search_restaurants', {'cuisine': rng.choice(CUISINES), 'seats': rng.randint(1, 10)}
+    if roll < 0.55:
+        return 'POST', '/tools/find_nearby_restaurants', {
+            'lat': 12.9 + rng.random() * 0.3, 'lon': 77.45 + rng.random() * 0.3, 'limit': 5}
+    if roll < 0.80:
+        dt = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(
+            days=rng.randint(1, 60), hours=rng.randint(0, 10))
+        return 'POST', '/tools/create_reservation', {
+            'restaurant_id': rng.randint(1, 80), 'seats': rng.randint(1, 6),
+            'datetime': dt.isoformat(), 'name': 'Load'}
+    if roll < 0.85:
+        return 'POST', '/tools/list_reservations', {}
+    return 'POST', '/chat', {'message': rng.choice(CHAT)}
+
+
+async def _client(i, http, stop_at, latencies, statuses):
+    rng = random.Random(i)
+    while time.perf_counter() < stop_at:
+        method, path, body = _request(rng)
+        t0 = time.perf_counter()
+        try:
+            resp = await http.request(method, path, json=body)
+            status = resp.status_code
+        except httpx.HTTPError:
+            status = 'error'
+        latencies.append(time.perf_counter() - t0)
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+async def run(url, concurrency, duration):
+    latencies, statuses = [], {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=30, limits=limits) as http:
+        stop_at = time.perf_counter() + duration
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_client(i, http, stop_at, latencies, statuses) for i in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1e3
+
+    print(f"{len(latencies)} requests in {elapsed:.1f}s: {len(latencies) / elapsed:.0f} req/s")
+    print(f"latency ms: p50 {pct(0.50):.1f}  p90 {pct(0.90):.1f}  p99 {pct(0.99):.1f}  max {latencies[-1] * 1e3:.1f}")
+    print(f"status codes: {dict(sorted(statuses.items(), key=str))}")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(workers):
+    port = _free_port()
+    env = dict(os.environ)
+    env.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-load-')) / 'load.db'))
+    env.setdefault('GROQ_API_KEY', 'offline-load-test')
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api:app', '--app-dir', str(ROOT / 'app'),
+         '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(url + '/health', timeout=1).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError('API server did not become healthy')
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--url', help='target an already running server')
+    ap.add_argument('--workers', type=int, default=4, help='uvicorn workers when spawning a server')
+    ap.add_argument('--concurrency', type=int, default=64)
+    ap.add_argument('--duration', type=float, default=10.0)
+    args = ap.parse_args()
+
+    proc = None
+    url = args.url
+    if not url:
+        proc, url = spawn_server(args.workers)
+        print(f"started uvicorn with {args.workers} workers at {url}")
+    try:
+        asyncio.run(run(url, args.concurrency, args.duration))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+How many concurrent conversations one process sustains with the async pipeline.
+
+The LLM is the offline StubProvider, which waits --llm-latency seconds (no
+network, no API quota) and replays a canned intent, so the numbers show our
+own concurrency limits rather than the model's. For each
+concurrency level, N simulated users send messages back to back for
+--duration seconds through handle_user_message_async; the same load is also
+run through the sync handle_user_message on N threads for comparison.
+
+    python benchmarks/load_async_conversations.py
+    python benchmarks/load_async_conversations.py --levels 10 100 1000 --llm-latency 0.8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+os.environ.setdefault('GOODFOODS_DB_PATH', str(Path(tempfile.mkdtemp(prefix='goodfoods-bench-')) / 'bench.db'))
+os.environ['LLM_PROVIDER'] = 'stub'
+
+import agent  # noqa: E402
+import llm_clients  # noqa: E402
+from llm_providers import StubProvider  # noqa: E402
+
+# Messages the local router can't parse, so every one reaches the "LLM".
+MESSAGES = [
+    ("I'd love somewhere Italian for a big group", {"intent": "search_restaurants", "params": {"cuisine": "Italian", "seats": 8}}),
+    ("anything with a rooftop?", {"intent": "search_restaurants", "params": {"features": ["rooftop"]}}),
+    ("what do you have for date night", {"intent": "search_restaurants", "params": {"seats": 2}}),
+    ("show everything booked so far", {"intent": "list_reservations", "params": {}}),
+]
+
+
+def install_fake_llm(latency):
+    responses = {text: json.dumps(intent) for text, intent in MESSAGES}
+    llm_clients.set_provider(StubProvider(responses, latency=latency))
+    # Every request should pay the simulated model latency.
+    llm_clients.INTENT_CACHE.max_entries = 0
+
+
+def report(line):
+    print(line, file=sys.__stdout__, flush=True)
+
+
+def _summary(label, n, latencies, elapsed):
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1e3
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1e3
+    report(f"{label:>6} {n:>6} users: {len(latencies) / elapsed:9.1f} msg/s  p50 {p50:7.1f}ms  p95 {p95:7.1f}ms")
+
+
+async def run_async(users, duration):
+    latencies = []
+    stop_at = time.perf_counter() + duration
+
+    async def user(i):
+        rng = random.Random(i)
+        while time.perf_counter() < stop_at:
+            text = rng.choice(MESSAGES)[0]
+            t0 = time.perf_counter()
+            await agent.handle_user_message_async(text)
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(users)))
+    _summary('async', users, latencies, time.perf_counter() - t0)
+
+
+def run_threads(users, duration):
+    latencies = []
+    stop_at = time.perf_counter() + duration
+
+    def user(i):
+        rng = random.Random(i)
+        while time.perf_counter() < stop_at:
+            text = rng.choice(MESSAGES)[0]
+            t0 = time.perf_counter()
+            agent.handle_user_message(text)
+            latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    _summary('sync', users, latencies, time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--levels', type=int, nargs='+', default=[1, 10, 100, 500])
+    ap.add_argument('--duration', type=float, default=5.0)
+    ap.add_argument('--llm-latency', type=float, default=0.5, help='simulated model latency in seconds')
+    ap.add_argument('--sync-max', type=int, default=100, help='skip the threaded run above this many users')
+    args = ap.parse_args()
+
+    install_fake_llm(args.llm_latency)
+    # The agent prints on every request; keep only the report on stdout.
+    sys.stdout = open(os.devnull, 'w')
+    for n in args.levels:
+        report(f"-- {n} concurrent conversations, {args.llm_latency * 1e3:.0f}ms simulated LLM latency")
+        asyncio.run(run_async(n, args.duration))
+        if n <= args.sync_max:
+            run_threads(n, args.duration)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Overbooking stress test for create_reservation.
+
+Several processes, each running many threads, fire thousands of bookings at
+the same time slot of a handful of restaurants. Afterwards the confirmed
+seats per restaurant must never exceed its capacity, and parties of zero or
+negative seats must be refused. Exits non-zero if any restaurant is
+overbooked or such a party was booked.
+
+    python benchmarks/stress_overbooking.py --processes 4 --threads 16 --attempts 50
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+
+def _slot():
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return day.replace(hour=19)
+
+
+def _process_main(db_path, restaurant_ids, threads, attempts, seed, out):
+    os.environ['GOODFOODS_DB_PATH'] = db_path
+    import reservations
+
+    slot = _slot()
+    results = {'ok': 0, 'full': 0}
+    lock = threading.Lock()
+
+    def worker(n):
+        rng = random.Random(seed * 1000 + n)
+        ok = full = 0
+        for _ in range(attempts):
+            rid = rng.choice(restaurant_ids)
+            if reservations.create_reservation(rid, slot, rng.randint(1, 4), 'Stress'):
+                ok += 1
+            else:
+                full += 1
+        with lock:
+            results['ok'] += ok
+            results['full'] += full
+
+    ts = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    out.put(results)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--processes', type=int, default=4)
+    ap.add_argument('--threads', type=int, default=16)
+    ap.add_argument('--attempts', type=int, default=50, help='bookings per thread')
+    ap.add_argument('--restaurants', type=int, default=5, help='number of contended restaurants')
+    args = ap.parse_args()
+
+    db_path = str(Path(tempfile.mkdtemp(prefix='goodfoods-stress-')) / 'stress.db')
+    os.environ['GOODFOODS_DB_PATH'] = db_path
+    import db
+    import reservations
+    from occupancy import seating_interval
+
+    restaurant_ids = sorted(reservations.RESTAURANTS)[:args.restaurants]
+    out = mp.Queue()
+    procs = [
+        mp.Process(target=_process_main,
+                   args=(db_path, restaurant_ids, args.threads, args.attempts, i, out))
+        for i in range(args.processes)
+    ]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    totals = {'ok': 0, 'full': 0}
+    for _ in procs:
+        r = out.get()
+        totals['ok'] += r['ok']
+        totals['full'] += r['full']
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    attempts = totals['ok'] + totals['full']
+    print(f"{attempts} booking attempts in {elapsed:.2f}s "
+          f"({attempts / elapsed:.0f}/s): {totals['ok']} confirmed, {totals['full']} rejected")
+
+    slot = _slot()
+    conn = db.get_conn()
+    overbooked = 0
+    for rid in restaurant_ids:
+        cap, dining, slot_seconds = reservations._seating(rid)
+        lo, hi = seating_interval(db.to_epoch(slot), dining, slot_seconds)
+        booked = reservations._seated_peak(conn.cursor(), rid, lo, hi, slot_seconds)
+        flag = 'OK' if booked <= cap else 'OVERBOOKED'
+        if booked > cap:
+            overbooked += 1
+        print(f"  restaurant {rid:>4}: {booked:>4}/{cap:<4} seats  {flag}")
+
+    # A party of zero or fewer would free seats for the next booking.
+    accepted = []
+    for seats in (0, -20):
+        try:
+            if reservations.create_reservation(restaurant_ids[0], slot, seats, 'Stress'):
+                accepted.append(seats)
+        except ValueError:
+            pass
+    print(f"  non-positive parties accepted: {accepted or 'none'}")
+
+    if overbooked:
+        print(f"FAIL: {overbooked} restaurant(s) overbooked")
+        sys.exit(1)
+    if accepted:
+        print(f"FAIL: booked parties of {accepted} seats")
+        sys.exit(1)
+    print("PASS: no overbooking")
+
+
+if __name__ == '__main__':
+    main()
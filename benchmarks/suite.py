@@ -0,0 +1,348 @@
+"""
+Benchmark suite for the agent, search, availability and booking paths.
+
+Runs offline: the LLM is the StubProvider replaying data/llm_recordings.jsonl.
+Every case is a catalog size x a reservations table size. For each case the
+catalog is generated with generate_restaurants.gen_restaurant (cached per
+size and seed), a fresh database is seeded, and the benchmarks below run in
+a fresh interpreter, so startup and memory never leak between cases:
+
+    startup                       reservations.startup() (catalog, indexes, occupancy load)
+    search_restaurants            random cuisine / party size / feature filters
+    check_availability            random restaurant and slot
+    create_reservation            writes: random restaurant, slot and party size
+    list_reservations             newest page, alternately unfiltered and per restaurant
+    resolve_reservation_datetime  relative and absolute date phrases
+    handle_user_message           data/intent_corpus.jsonl through the whole agent
+
+Results are written as JSON; `compare` lines up two result files and exits
+non-zero when a benchmark's median got slower by more than --threshold.
+
+    python benchmarks/suite.py run                     # 80 / 10k / 100k venues x 0 / 100k bookings
+    python benchmarks/suite.py run --restaurants 80 --reservations 0 1000000 10000000 -o big.json
+    python benchmarks/suite.py run --only search_restaurants check_availability --ops 2000
+    python benchmarks/suite.py compare baseline.json benchmarks/results/<timestamp>.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent / 'app'
+sys.path.insert(0, str(APP_DIR))
+
+CORPUS = BENCH_DIR / 'data' / 'intent_corpus.jsonl'
+RECORDINGS = BENCH_DIR / 'data' / 'llm_recordings.jsonl'
+RESULTS_DIR = BENCH_DIR / 'results'
+CACHE_DIR = Path(tempfile.gettempdir()) / 'goodfoods-suite'
+
+BENCHMARKS = (
+    'startup',
+    'search_restaurants',
+    'check_availability',
+    'create_reservation',
+    'list_reservations',
+    'resolve_reservation_datetime',
+    'handle_user_message',
+)
+# Bookings are seeded over one year from here, from lunch to late dinner.
+BASE_DAY = datetime(2030, 1, 1)
+SEED_DAYS = 365
+DATE_PHRASES = [
+    ('book a table tomorrow at 7pm', None),
+    ('reserve for today at 8:30 pm', None),
+    ('next friday at 9pm please', None),
+    ('book for 4', '2030-03-14 19:30'),
+    ('table for two', 'March 15 2030 8pm'),
+    ('dinner', None),
+]
+
+
+def _parse_count(text):
+    text = text.lower().replace('_', '')
+    for suffix, mult in (('k', 1_000), ('m', 1_000_000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * mult)
+    return int(text)
+
+
+def catalog_json(n, seed, cache_dir):
+    """restaurants.json with n venues from gen_restaurant, generated once per (n, seed)."""
+    path = Path(cache_dir) / f'restaurants-{n}-seed{seed}.json'
+    if path.exists():
+        return path
+    import generate_restaurants
+    from faker.exceptions import UniquenessException
+    random.seed(seed)
+    generate_restaurants.fake.seed_instance(seed)
+    out = []
+    for i in range(1, n + 1):
+        try:
+            out.append(generate_restaurants.gen_restaurant(i))
+        except UniquenessException:
+            # Faker has ~1k last names; past that, names repeat.
+            generate_restaurants.fake.unique.clear()
+            out.append(generate_restaurants.gen_restaurant(i))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(out, f, indent=2, ensure_ascii=False)
+    tmp.replace(path)
+    return path
+
+
+def seed_reservations(n, seating, seed, batch=100_000):
+    """n random bookings; seating maps restaurant id to (dining, slot) seconds."""
+    import db
+    from occupancy import seating_interval
+    rng = random.Random(seed)
+    restaurant_ids = list(seating)
+    sql = '''
+        INSERT INTO reservations (restaurant_id, datetime, start_ts, end_ts, seats, name, phone, email, status)
+        VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?)
+    '''
+    done = 0
+    while done < n:
+        rows = []
+        for _ in range(min(batch, n - done)):
+            dt = BASE_DAY + timedelta(days=rng.randrange(SEED_DAYS), hours=rng.randrange(11, 23),
+                                      minutes=rng.choice((0, 15, 30, 45)))
+            rid = rng.choice(restaurant_ids)
+            start_ts = db.to_epoch(dt)
+            rows.append((rid, dt.isoformat(), start_ts, seating_interval(start_ts, *seating[rid])[1], rng.randint(1, 8),
+                         f'Guest {rng.randrange(10_000)}', 'confirmed' if rng.random() < 0.9 else 'cancelled'))
+        with db.transaction() as c:
+            c.executemany(sql, rows)
+        done += len(rows)
+
+
+def _random_slot(rng):
+    return BASE_DAY + timedelta(days=rng.randrange(SEED_DAYS), hours=rng.randrange(11, 23))
+
+
+def _ops(rng, restaurant_ids, corpus):
+    """name -> factory for one timed operation (a zero-argument call with its own random inputs)."""
+    import agent
+    import reservations
+    from generate_restaurants import CUISINES, FEATURES
+
+    def search():
+        cuisine = rng.choice(CUISINES + [None])
+        seats = rng.choice((None, 2, 4, 8, 50))
+        features = rng.sample(FEATURES, k=rng.choice((0, 0, 1, 2)))
+        return lambda: reservations.search_restaurants(cuisine, seats, features or None)
+
+    def availability():
+        rid, dt, seats = rng.choice(restaurant_ids), _random_slot(rng), rng.randint(1, 8)
+        return lambda: reservations.check_availability(rid, dt, seats)
+
+    def book():
+        rid, dt, seats = rng.choice(restaurant_ids), _random_slot(rng), rng.randint(1, 4)
+        return lambda: reservations.create_reservation(rid, dt, seats, 'Suite', '5550100')
+
+    def listing():
+        if rng.random() < 0.5:
+            return lambda: reservations.list_reservations(limit=reservations.DEFAULT_PAGE_SIZE)
+        rid = rng.choice(restaurant_ids)
+        return lambda: reservations.list_reservations(limit=reservations.DEFAULT_PAGE_SIZE, restaurant_id=rid)
+
+    def resolve():
+        text, dt_text = rng.choice(DATE_PHRASES)
+        return lambda: agent.resolve_reservation_datetime(text, dt_text)
+
+    def message():
+        text = rng.choice(corpus)
+        return lambda: agent.handle_user_message(text)
+
+    return {
+        'search_restaurants': search,
+        'check_availability': availability,
+        'create_reservation': book,
+        'list_reservations': listing,
+        'resolve_reservation_datetime': resolve,
+        'handle_user_message': message,
+    }
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        'ops': len(samples),
+        'median_us': statistics.median(samples) * 1e6,
+        'p95_us': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1e6,
+        'mean_us': statistics.fmean(samples) * 1e6,
+    }
+
+
+def run_case(json_path, reservations_n, seed, ops, only):
+    """One case, in this (fresh) process: seed, start up, time each benchmark."""
+    import agent
+    import db
+    import llm_clients
+    import reservations
+    from llm_providers import StubProvider
+
+    from occupancy import DEFAULT_DINING_MINUTES, DEFAULT_SLOT_MINUTES
+
+    with open(json_path, encoding='utf-8') as f:
+        seating = {r['id']: ((r.get('dining_minutes') or DEFAULT_DINING_MINUTES) * 60,
+                             (r.get('slot_minutes') or DEFAULT_SLOT_MINUTES) * 60) for r in json.load(f)}
+    db.init_db()
+    t0 = time.perf_counter()
+    seed_reservations(reservations_n, seating, seed)
+    seeded = time.perf_counter() - t0
+
+    results = {}
+    t0 = time.perf_counter()
+    reservations.startup()
+    if 'startup' in only:
+        results['startup'] = _summary([time.perf_counter() - t0])
+
+    llm_clients.set_provider(StubProvider.from_jsonl(RECORDINGS))
+    agent.startup()
+    with CORPUS.open(encoding='utf-8') as f:
+        corpus = [json.loads(line)['text'] for line in f if line.strip()]
+    for text in corpus:
+        agent.handle_user_message(text)  # fill the intent cache; the LLM path is bench_e2e's job
+
+    rng = random.Random(seed)
+    for name, make in _ops(rng, list(seating), corpus).items():
+        if name not in only:
+            continue
+        calls = [make() for _ in range(ops)]
+        for call in calls[:min(10, ops)]:
+            call()  # warm up (models, statement cache)
+        samples = []
+        for call in calls:
+            t = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - t)
+        results[name] = _summary(samples)
+    return {'seed_seconds': seeded, 'results': results}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    only = args.only or list(BENCHMARKS)
+    unknown = set(only) - set(BENCHMARKS)
+    if unknown:
+        sys.exit(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    out = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'ops': args.ops,
+        },
+        'results': [],
+    }
+    print(f"{'restaurants':>11} {'bookings':>10} {'benchmark':<30} {'ops':>6} {'median us':>11} {'p95 us':>11}")
+    for n in args.restaurants:
+        json_path = catalog_json(n, args.seed, args.cache_dir)
+        for m in args.reservations:
+            with tempfile.TemporaryDirectory(prefix='goodfoods-suite-') as tmp:
+                env = dict(os.environ,
+                           GOODFOODS_DB_PATH=str(Path(tmp) / 'bench.db'),
+                           GOODFOODS_RESTAURANTS_JSON=str(json_path),
+                           LLM_PROVIDER='stub',
+                           GOODFOODS_LOG_LEVEL='WARNING')
+                cmd = [sys.executable, __file__, '_case', str(json_path), str(m),
+                       '--seed', str(args.seed), '--ops', str(args.ops), '--only', *only]
+                proc = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, text=True)
+                if proc.returncode:
+                    sys.exit(f"case {n} restaurants x {m} bookings failed (exit {proc.returncode})")
+            case = json.loads(proc.stdout.strip().splitlines()[-1])
+            for name, stats in case['results'].items():
+                report['results'].append({'restaurants': n, 'reservations': m, 'benchmark': name, **stats})
+                print(f"{n:>11} {m:>10} {name:<30} {stats['ops']:>6} {stats['median_us']:>11.1f} {stats['p95_us']:>11.1f}")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {out}")
+
+
+def _load_results(path):
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    return report['meta'], {(r['restaurants'], r['reservations'], r['benchmark']): r for r in report['results']}
+
+
+def compare(args):
+    old_meta, old = _load_results(args.baseline)
+    new_meta, new = _load_results(args.current)
+    print(f"baseline {args.baseline} ({old_meta.get('commit')}) vs {args.current} ({new_meta.get('commit')})")
+    print(f"{'restaurants':>11} {'bookings':>10} {'benchmark':<30} {'old us':>10} {'new us':>10} {'change':>8}")
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key]['median_us'], new[key]['median_us']
+        change = after / before - 1 if before else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = 'REGRESSION'
+            regressions += 1
+        elif change < -args.threshold:
+            flag = 'faster'
+        print(f"{key[0]:>11} {key[1]:>10} {key[2]:<30} {before:>10.1f} {after:>10.1f} {change:>+8.1%} {flag}")
+    unmatched = len(old.keys() ^ new.keys())
+    if unmatched:
+        print(f"{unmatched} result(s) only in one of the files, not compared")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest='command', required=True)
+
+    r = sub.add_parser('run', help='run the suite and write JSON results')
+    r.add_argument('--restaurants', type=_parse_count, nargs='+', default=[80, 10_000, 100_000])
+    r.add_argument('--reservations', type=_parse_count, nargs='+', default=[0, 100_000])
+    r.add_argument('--only', nargs='+', help=f"subset of: {', '.join(BENCHMARKS)}")
+    r.add_argument('--ops', type=int, default=500, help='timed operations per benchmark')
+    r.add_argument('--seed', type=int, default=7)
+    r.add_argument('--cache-dir', default=str(CACHE_DIR), help='where generated catalogs are kept')
+    r.add_argument('-o', '--output', help='results file (default benchmarks/results/<timestamp>.json)')
+
+    c = sub.add_parser('compare', help='compare two result files')
+    c.add_argument('baseline')
+    c.add_argument('current')
+    # Run-to-run noise on a shared machine is ~5-10%.
+    c.add_argument('--threshold', type=float, default=0.20, help='relative slowdown of the median to flag')
+
+    case = sub.add_parser('_case')
+    case.add_argument('json_path')
+    case.add_argument('reservations', type=int)
+    case.add_argument('--seed', type=int, required=True)
+    case.add_argument('--ops', type=int, required=True)
+    case.add_argument('--only', nargs='+', required=True)
+
+    args = ap.parse_args()
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        sys.exit(compare(args))
+    else:
+        print(json.dumps(run_case(args.json_path, args.reservations, args.seed, args.ops, set(args.only))))
+
+
+if __name__ == '__main__':
+    main()